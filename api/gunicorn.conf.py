@@ -0,0 +1,16 @@
+"""Profil produksi: gunicorn sebagai manajer proses + UvicornWorker.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Setelan (worker = jumlah CPU, preload_app, timeout, ...) ada di wisata_common/gunicorn_base.py.
+Dengan preload, GeoJSON, index titik, graf jalan & kNN dimuat SEKALI di master sebelum fork lalu dibagi ke worker (copy-on-write).
+"""
+import os
+import sys
+
+# Paket bersama wisata_common/ ada di root repo (image Docker menaruhnya di PYTHONPATH)
+_REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.isdir(os.path.join(_REPO_DIR, "wisata_common")) and _REPO_DIR not in sys.path:
+    sys.path.append(_REPO_DIR)
+
+from wisata_common.gunicorn_base import *  # noqa: E402,F401,F403  bind, workers, worker_class, preload_app, ...
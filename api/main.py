@@ -1,33 +1,135 @@
 # api/main.py
+from __future__ import annotations
+
+import time
+_MODULE_T0 = time.perf_counter()
+
+import gc
 import os
 import sys
 import math
+import io
+import csv
+import json
+import zlib
+import base64
 import platform
 import hashlib
+import asyncio
+import logging
+import importlib
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any, Literal, Tuple
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Literal, Tuple, Callable, Iterable
 
-import pandas as pd
-import geopandas as gpd
-from shapely.geometry.base import BaseGeometry
-from geopy.distance import geodesic
+# api/ (routing.py) & root repo (paket bersama wisata_common/) masuk path sejak import, tidak bergantung pada cwd;
+# routing.py ikut meng-import numpy & shapely, jadi ia dimuat bersama library berat di _import_heavy.
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_DIR = os.path.dirname(_APP_DIR)
+if _APP_DIR not in sys.path:
+    sys.path.insert(0, _APP_DIR)
+if os.path.isdir(os.path.join(_REPO_DIR, "wisata_common")) and _REPO_DIR not in sys.path:
+    sys.path.append(_REPO_DIR)   # di belakang: main.py di root repo tidak boleh menutupi modul app
 
-from fastapi import FastAPI, Query, HTTPException, status
+from fastapi import FastAPI, Query, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
+from wisata_common.metrics import MetricsMiddleware, MetricsRegistry
+from wisata_common.profiling import ProfiledRoute, ProfilingMiddleware
+from wisata_common.singleflight import SingleFlight
+
+try:  # brotli opsional; tanpa paket ini hanya gzip yang ditawarkan
+    import brotli
+except ImportError:
+    brotli = None
+
+# Library berat (numpy/pandas/geopandas/shapely/pyproj) TIDAK di-import saat modul dimuat:
+# app & /healthz hidup seketika, lalu _import_heavy() mengisi nama-nama ini di thread warm-up.
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import shape
+    from shapely.geometry.base import BaseGeometry
+    from pyproj import Geod
+    import routing
+    from routing import RoadGraph
+    from wisata_common import geocell, geometry
+
+
+HEAVY_MODULES = ["numpy", "pandas", "shapely", "pyproj", "geopandas", "routing", "wisata_common.geocell",
+                 "wisata_common.geometry"]
+IMPORT_TIMINGS_MS: Dict[str, float] = {}
+LIB_VERSIONS: Dict[str, str] = {}
+
+def _import_heavy() -> None:
+    """Import library berat sekali (urut dependensi) & catat durasi per modul."""
+    global np, pd, gpd, shapely, shape, GEOD, routing, geocell, geometry
+    if LIB_VERSIONS:
+        return
+    mods = {}
+    for name in HEAVY_MODULES:
+        t0 = time.perf_counter()
+        mods[name] = importlib.import_module(name)
+        IMPORT_TIMINGS_MS[name] = round((time.perf_counter() - t0) * 1000.0, 3)
+    np, pd, gpd, shapely = mods["numpy"], mods["pandas"], mods["geopandas"], mods["shapely"]
+    routing, geocell, geometry = mods["routing"], mods["wisata_common.geocell"], mods["wisata_common.geometry"]
+    shape = importlib.import_module("shapely.geometry").shape
+    GEOD = mods["pyproj"].Geod(ellps="WGS84")  # jarak geodesic vektor; pyproj wajib (dependensi geopandas)
+    for lib in ("numpy", "pandas", "geopandas", "shapely", "pyproj"):
+        LIB_VERSIONS[lib] = getattr(importlib.import_module(lib), "__version__", "unknown")
+
 # =========================
 # Konfigurasi & Data Path
 # =========================
 GEOJSON_PATH = os.getenv("GEOJSON_PATH", "mapsjatebg.geojson")
 APP_VERSION = os.getenv("APP_VERSION", "1.0.0")
 GIT_SHA = os.getenv("GIT_SHA", None)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 << 20)))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))      # 0..1, 0 = tidak ada sampling acak
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")                  # header X-Profile / X-Admin-Token; wajib untuk /admin/profiles
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", "20"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_ADMIN_TOKEN)
+# Graf jalan offline (turunan OSM) untuk rank_by=travel_time & isochrone /wisata/reachable. Default kosong =
+# nonaktif (travel_time -> 503, reachable memakai REACH_SPEED_KMH). data/sample_road_graph.json hanya grid
+# sintetis untuk pengujian/benchmark, jangan dipakai di produksi.
+ROAD_GRAPH_PATH = os.getenv("ROAD_GRAPH_PATH", "")
+ROUTE_CANDIDATES = int(os.getenv("ROUTE_CANDIDATES", "25"))  # kandidat geodesic yang di-rank ulang per query
+REACH_SPEED_KMH = float(os.getenv("REACH_SPEED_KMH", "30"))   # kecepatan efektif garis lurus bila tanpa graf jalan
+ISO_GRID_DEG = float(os.getenv("ISO_GRID_DEG", "0.01"))       # kuantisasi titik asal isochrone (~1.1 km)
+ISO_CACHE_SIZE = int(os.getenv("ISO_CACHE_SIZE", "256"))
+KNN_K = int(os.getenv("KNN_K", "10"))                           # 0 = nonaktifkan graf tetangga
+KNN_CACHE_DIR = os.getenv("KNN_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "knn"))
+KNN_TRAVEL_TIME = os.getenv("KNN_TRAVEL_TIME", "0") == "1"     # hitung juga waktu tempuh antar tetangga (butuh graf jalan)
+CELL_PRECISION = int(os.getenv("CELL_PRECISION", "5"))          # presisi sel geohash untuk ring nearest (5 = ~4.9 x 4.9 km)
+ATTR_MAX_CARDINALITY = int(os.getenv("ATTR_MAX_CARDINALITY", "256"))  # kolom properti dengan nilai unik lebih banyak tidak di-index
 
 TAGS_METADATA = [
     {"name": "system", "description": "Liveness/Readiness & metadata aplikasi."},
     {"name": "wisata", "description": "Endpoint rekomendasi & daftar objek wisata."},
 ]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup tidak memblokir: warm-up (import + data) berjalan sebagai task; /readyz melaporkan progresnya."""
+    global LIVE_AFTER_MS
+    LIVE_AFTER_MS = round((time.perf_counter() - _MODULE_T0) * 1000.0, 3)
+    task = None if READY else asyncio.create_task(_warmup_async())
+    try:
+        yield
+    finally:
+        if task is not None and not task.done():
+            task.cancel()
+
 app = FastAPI(
     title="Pariwisata API",
     description="API rekomendasi objek wisata terdekat berbasis GeoJSON (geodesic).",
@@ -35,13 +137,142 @@ app = FastAPI(
     contact={"name": "Pariwisata API", "url": "https://example.com"},
     license_info={"name": "MIT"},
     openapi_tags=TAGS_METADATA,
+    lifespan=lifespan,
 )
 
+# =========================
+# Kompresi (gzip / brotli)
+# =========================
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pilih encoding terbaik dari header Accept-Encoding (br > gzip), hormati q=0."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token] = q
+    for enc in (["br"] if brotli is not None else []) + ["gzip"]:
+        if accepted.get(enc, accepted.get("*", 0.0)) > 0:
+            return enc
+    return None
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return zlib.compress(data, 6, wbits=31)
+
+class _StreamCompressor:
+    """Kompresor inkremental dengan antarmuka seragam untuk gzip & brotli."""
+    def __init__(self, encoding: str):
+        self._br = brotli.Compressor(quality=5) if encoding == "br" else None
+        self._gz = None if self._br else zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._br.process(data) if self._br else self._gz.compress(data)
+
+    def flush(self) -> bytes:
+        return self._br.finish() if self._br else self._gz.flush()
+
+def _with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Gabungkan semua header Vary jadi satu yang memuat Accept-Encoding tepat sekali."""
+    tokens: List[str] = []
+    rest = []
+    for k, v in headers:
+        if k.lower() == b"vary":
+            tokens += [t.strip() for t in v.decode("latin-1").split(",") if t.strip()]
+        else:
+            rest.append((k, v))
+    merged: List[str] = []
+    for t in tokens + ["Accept-Encoding"]:
+        if t.lower() not in {m.lower() for m in merged}:
+            merged.append(t)
+    return rest + [(b"vary", ", ".join(merged).encode("latin-1"))]
+
+class CompressionMiddleware:
+    """Kompres respons dinamis di atas ambang ukuran; respons streaming/yang sudah terkompres dilewatkan.
+
+    Semua respons HTTP membawa tepat satu ``Vary: Accept-Encoding`` (juga yang tidak dikompres), agar cache
+    perantara tidak menyajikan body gzip/br ke klien yang tidak memintanya atau sebaliknya.
+    """
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict((k.decode("latin-1"), v.decode("latin-1")) for k, v in scope.get("headers", []))
+        encoding = _negotiate_encoding(headers.get("accept-encoding", ""))
+
+        start_msg: Dict[str, Any] = {}
+
+        async def _send(message):
+            nonlocal start_msg
+            if message["type"] == "http.response.start":
+                start_msg = {**message, "headers": _with_vary([(k.lower(), v) for k, v in message["headers"]])}
+                return
+            if not start_msg:
+                return await send(message)
+            start, start_msg = start_msg, {}
+            resp_headers = start["headers"]
+            body = message.get("body", b"")
+            skip = encoding is None or any(k == b"content-encoding" for k, _ in resp_headers)
+            if skip or message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(start)
+                return await send(message)
+            body = _compress(body, encoding)
+            resp_headers = [(k, v) for k, v in resp_headers if k != b"content-length"]
+            resp_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ]
+            await send({**start, "headers": resp_headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, _send)
+
+# =========================
+# Metrics (format teks Prometheus)
+# =========================
+METRICS = MetricsRegistry()
+METRICS.describe("pariwisata_stage_duration_seconds", "histogram", "Durasi tahap internal per endpoint.")
+METRICS.describe("pariwisata_startup_stage_seconds", "gauge", "Durasi tahap pemuatan data saat startup.")
+METRICS.describe("pariwisata_cache_requests_total", "counter", "Lookup cache per hasil (hit/miss).")
+METRICS.describe("pariwisata_cache_hit_ratio", "gauge", "Rasio hit cache sejak proses mulai.")
+
+@contextmanager
+def _stage(endpoint: str, stage: str):
+    """Ukur durasi satu tahap internal endpoint ke histogram pariwisata_stage_duration_seconds."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe("pariwisata_stage_duration_seconds", {"endpoint": endpoint, "stage": stage}, time.perf_counter() - t0)
+
+def _record_cache(cache: str, hit: bool) -> None:
+    METRICS.inc("pariwisata_cache_requests_total", {"cache": cache, "result": "hit" if hit else "miss"})
+
+# =========================
+# Profiling (opt-in, sampling; lihat wisata_common.profiling)
+# =========================
+PROFILES: deque = deque(maxlen=PROFILE_RING_SIZE)
+
 # Izinkan akses dari mana saja (ubah sesuai kebutuhan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+app.add_middleware(MetricsMiddleware, metrics=METRICS, prefix="pariwisata")
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, profiles=PROFILES, admin_token=PROFILE_ADMIN_TOKEN,
+                       sample_rate=PROFILE_SAMPLE_RATE, interval_ms=PROFILE_INTERVAL_MS)
+    app.router.route_class = ProfiledRoute  # route di bawah ini dibungkus profiled()
 
 # =========================
 # Model Respons
@@ -54,6 +285,8 @@ class TouristItem(BaseModel):
     latitude: float
     longitude: float
     distance_km: Optional[float] = None
+    travel_time_min: Optional[float] = Field(None, description="Waktu tempuh via graf jalan (rank_by=travel_time)")
+    route: Optional[Dict[str, Any]] = Field(None, description="Geometri rute GeoJSON LineString (rank_by=travel_time)")
     properties: Dict[str, Any] = Field(default_factory=dict, description="Kolom lain (tanpa geometry)")
 
 class NearestResponse(BaseModel):
@@ -62,12 +295,55 @@ class NearestResponse(BaseModel):
     method: Literal["representative", "centroid"]
     k: int
     radius_km: Optional[float] = None
+    rank_by: Literal["distance", "travel_time"] = "distance"
+    filters: Dict[str, List[str]] = Field(default_factory=dict, description="Filter atribut yang diterapkan")
+    facets: Optional[Dict[str, Dict[str, int]]] = Field(None, description="Jumlah per nilai kolom facet atas semua objek yang lolos filter (dan radius)")
     count: int
     items: List[TouristItem]
 
 class ObjectsResponse(BaseModel):
     count: int
     items: List[TouristItem]
+    next_cursor: Optional[str] = Field(None, description="Token halaman berikutnya (None jika sudah habis)")
+
+class WithinRequest(BaseModel):
+    geometry: Dict[str, Any] = Field(..., description="GeoJSON Polygon/MultiPolygon (boleh juga Feature/FeatureCollection), WGS84")
+    method: Literal["representative", "centroid"] = Field("representative", description="Metode titik dari geometry.")
+    mode: Literal["items", "count"] = Field("items", description="'items' = kembalikan objek, 'count' = hanya jumlah")
+    limit: Optional[int] = Field(None, ge=1, description="Batasi jumlah item (opsional)")
+    stream: bool = Field(False, description="Jika true, item dikirim sebagai NDJSON (satu objek per baris)")
+
+class WithinResponse(BaseModel):
+    count: int
+    items: List[TouristItem] = Field(default_factory=list)
+
+class ReachableResponse(BaseModel):
+    user_lat: float
+    user_lon: float
+    minutes: int
+    mode: Literal["road_graph", "speed_profile"]
+    origin_cell: List[float] = Field(..., description="[lon, lat] pusat sel grid asal; isochrone dihitung dari titik ini")
+    cached: bool
+    polygon: Optional[Dict[str, Any]] = Field(None, description="Area terjangkau (GeoJSON Polygon/MultiPolygon)")
+    count: int
+    items: List[TouristItem]
+
+class NeighborsResponse(BaseModel):
+    index: int
+    method: Literal["representative", "centroid"]
+    k: int
+    count: int
+    items: List[TouristItem]
+
+class CellResponse(BaseModel):
+    cell: str
+    precision: int
+    method: Literal["representative", "centroid"]
+    bbox: List[float] = Field(..., description="[min_lon, min_lat, max_lon, max_lat] sel")
+    parent: Optional[str] = Field(None, description="Sel induk (satu presisi lebih kasar)")
+    neighbors: List[str] = Field(..., description="Sel tetangga pada presisi yang sama (N, NE, E, SE, S, SW, W, NW)")
+    count: int
+    items: List[TouristItem]
 
 class WisataStatus(BaseModel):
     status: str
@@ -84,6 +360,7 @@ class MetaResponse(BaseModel):
     platform: str
     libs: Dict[str, str]
     data: Dict[str, Any]
+    startup: Dict[str, Any] = Field(default_factory=dict, description="Waktu sampai live, durasi import per modul")
 
 # =========================
 # Utils
@@ -97,25 +374,6 @@ def _choose_name_column(gdf: gpd.GeoDataFrame) -> Optional[str]:
             return cand
     return None
 
-def _compute_point(geom: Optional[BaseGeometry], method: str):
-    if geom is None or (hasattr(geom, "is_empty") and geom.is_empty):
-        return None
-    if geom.geom_type == "Point":
-        return geom
-    if method == "centroid":
-        return geom.centroid
-    # default representative point
-    try:
-        return geom.representative_point()
-    except Exception:
-        try:
-            return geom.centroid
-        except Exception:
-            return None
-
-def _geodesic_km(a_lat: float, a_lon: float, b_lat: float, b_lon: float) -> float:
-    return geodesic((a_lat, a_lon), (b_lat, b_lon)).kilometers
-
 def _extract_xy_base(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """Pastikan minimal ada salah satu: (x,y) atau geometry. Normalisasi nama x/y jika sudah ada."""
     gdf2 = gdf.copy()
@@ -145,9 +403,7 @@ def _compute_xy_from_geom(gdf: gpd.GeoDataFrame, method: Literal["representative
     gdf2 = _extract_xy_base(gdf)
     if "geometry" not in gdf2.columns:
         return gdf2
-    pts = gdf2["geometry"].apply(lambda g: _compute_point(g, method))
-    gdf2["x"] = pts.apply(lambda p: float(p.x) if p is not None else math.nan)
-    gdf2["y"] = pts.apply(lambda p: float(p.y) if p is not None else math.nan)
+    gdf2["x"], gdf2["y"] = geometry.points_xy(gdf2["geometry"].to_numpy(), method)
     return gdf2
 
 def _row_to_item(idx: int, row: pd.Series, include_distance: bool, name_col: Optional[str]) -> TouristItem:
@@ -181,6 +437,283 @@ def _row_to_item(idx: int, row: pd.Series, include_distance: bool, name_col: Opt
         properties=props,
     )
 
+def _build_name_index(gdf: gpd.GeoDataFrame, name_col: Optional[str]) -> Dict[str, np.ndarray]:
+    """Peta nama (lowercase) -> posisi baris terurut, gabungan dari semua kolom nama kandidat."""
+    parts: Dict[str, List[np.ndarray]] = {}
+    cols = [c for c in dict.fromkeys([name_col] + ["nama_objek", "Nama", "name", "NAMOBJ", "namobj"]) if c and c in gdf.columns]
+    for c in cols:
+        keys = _safe_str(gdf[c]).str.lower().to_numpy()
+        for key, pos in pd.Series(np.arange(len(gdf))).groupby(keys).groups.items():
+            parts.setdefault(key, []).append(np.asarray(pos, dtype=np.int64))
+    return {k: np.unique(np.concatenate(v)) for k, v in parts.items()}
+
+def _name_positions(name: Optional[str]) -> Optional[np.ndarray]:
+    """Posisi baris yang cocok dengan filter nama; None berarti tanpa filter."""
+    if not name or name.lower() == "semua":
+        return None
+    return NAME_INDEX.get(name.lower(), np.empty(0, dtype=np.int64))
+
+# Filter atribut & facet: kolom properti kategorikal di-dictionary-encode (kode int per baris) dan
+# tiap nilainya punya bitmap baris (packbits). Filter = OR bitmap dalam satu kolom, AND antar kolom;
+# facet = bincount kode pada baris hasil.
+ATTR_EXCLUDE_COLS = {"geometry", "x", "y"}
+ATTR_MAX_DISTINCT_RATIO = 0.5   # kolom yang hampir unik per baris (nama, alamat lengkap, deskripsi) dilewati
+ATTR_FILTER_PREFIX = "filter."   # filter atribut diberi namespace; query param lain (cache-buster, tracking) diabaikan
+
+def _build_attr_index(gdf: gpd.GeoDataFrame) -> Dict[str, Dict[str, Any]]:
+    n = len(gdf)
+    out: Dict[str, Dict[str, Any]] = {}
+    for col in gdf.columns:
+        if col in ATTR_EXCLUDE_COLS:
+            continue
+        notna = gdf[col].notna().to_numpy()
+        n_valid = int(notna.sum())
+        if n_valid == 0:
+            continue
+        text = np.full(n, None, dtype=object)
+        text[notna] = gdf[col][notna].astype(str).str.strip().to_numpy()
+        codes, values = pd.factorize(text, sort=True)   # None -> -1
+        if len(values) > ATTR_MAX_CARDINALITY or len(values) > ATTR_MAX_DISTINCT_RATIO * n_valid:
+            continue
+        lookup: Dict[str, List[int]] = {}
+        for i, v in enumerate(values):
+            lookup.setdefault(str(v).lower(), []).append(i)
+        out[str(col)] = {
+            "values": [str(v) for v in values],
+            "lookup": lookup,
+            "codes": codes.astype(np.int32),
+            "bitmaps": np.stack([np.packbits(codes == i) for i in range(len(values))]),
+        }
+    return out
+
+def _parse_attr_filters(request: Request) -> Dict[str, List[str]]:
+    """Filter atribut dari query param ber-prefix `filter.` (`filter.jenis_obje=Candi&filter.jenis_obje=Museum`)."""
+    filters: Dict[str, List[str]] = {}
+    for key in dict.fromkeys(request.query_params.keys()):
+        if not key.startswith(ATTR_FILTER_PREFIX):
+            continue
+        col = key[len(ATTR_FILTER_PREFIX):]
+        if col not in ATTR_INDEX:
+            raise HTTPException(status_code=400, detail=f"Kolom filter tidak dikenal: '{col}'. Kolom yang bisa difilter: {sorted(ATTR_INDEX)}")
+        filters[col] = request.query_params.getlist(key)
+    return filters
+
+def _parse_facets(facets: Optional[str]) -> List[str]:
+    cols = list(dict.fromkeys(c.strip() for c in (facets or "").split(",") if c.strip()))
+    unknown = [c for c in cols if c not in ATTR_INDEX]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Kolom facet tidak dikenal: {unknown}. Tersedia: {sorted(ATTR_INDEX)}")
+    return cols
+
+def _attr_mask(filters: Optional[Dict[str, List[str]]]) -> Optional[np.ndarray]:
+    """Bool per baris yang lolos semua filter atribut (nilai dicocokkan case-insensitive); None = tanpa filter."""
+    if not filters:
+        return None
+    acc: Optional[np.ndarray] = None
+    for col, values in filters.items():
+        idx = ATTR_INDEX[col]
+        codes = [c for v in values for c in idx["lookup"].get(v.strip().lower(), [])]
+        bm = np.bitwise_or.reduce(idx["bitmaps"][codes], axis=0) if codes else np.zeros(idx["bitmaps"].shape[1], dtype=np.uint8)
+        acc = bm if acc is None else acc & bm
+    return np.unpackbits(acc, count=len(GDF_BASE)).astype(bool)
+
+def _facet_counts(cols: Iterable[str], positions: np.ndarray) -> Dict[str, Dict[str, int]]:
+    """Jumlah baris per nilai untuk tiap kolom facet, urut terbanyak (nilai kosong tidak dihitung)."""
+    out: Dict[str, Dict[str, int]] = {}
+    for col in cols:
+        idx = ATTR_INDEX[col]
+        codes = idx["codes"][positions]
+        counts = np.bincount(codes[codes >= 0], minlength=len(idx["values"]))
+        out[col] = {idx["values"][i]: int(counts[i]) for i in np.argsort(-counts, kind="stable") if counts[i] > 0}
+    return out
+
+def _encode_cursor(after: int, name: Optional[str]) -> str:
+    payload = {"v": DATA_VERSION, "a": int(after), "q": (name or "").lower()}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, name: Optional[str]) -> int:
+    """Kembalikan posisi baris terakhir halaman sebelumnya; tolak cursor rusak/basi."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        after = int(payload["a"])
+        version, q = payload["v"], payload["q"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid.")
+    if version != DATA_VERSION:
+        raise HTTPException(status_code=409, detail="Dataset sudah dimuat ulang; mulai paginasi lagi tanpa cursor.")
+    if q != (name or "").lower():
+        raise HTTPException(status_code=400, detail="Cursor tidak cocok dengan filter nama.")
+    return after
+
+def _polygon_from_geojson(obj: Dict[str, Any]) -> BaseGeometry:
+    """Ubah GeoJSON (geometry/Feature/FeatureCollection) menjadi satu (Multi)Polygon yang valid."""
+    gtype = obj.get("type")
+    if gtype == "Feature":
+        return _polygon_from_geojson(obj.get("geometry") or {})
+    if gtype == "FeatureCollection":
+        parts = [_polygon_from_geojson(f) for f in obj.get("features", [])]
+        if not parts:
+            raise ValueError("FeatureCollection kosong.")
+        return shapely.union_all(parts)
+    geom = shape(obj)
+    if geom.geom_type not in ("Polygon", "MultiPolygon"):
+        raise ValueError(f"Geometry harus Polygon/MultiPolygon, bukan {geom.geom_type}.")
+    if not geom.is_valid:
+        geom = shapely.make_valid(geom)
+    return geom
+
+def _build_point_index(gdf: gpd.GeoDataFrame) -> Dict[str, Any]:
+    """Index spasial titik (STRtree) + array koordinat untuk baris yang punya x/y."""
+    x = gdf["x"].to_numpy(dtype=float)
+    y = gdf["y"].to_numpy(dtype=float)
+    pos = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    x, y = x[pos], y[pos]
+    # "cells": kode geohash per titik (baris index ini) untuk ring nearest & /wisata/cells
+    return {"pos": pos, "x": x, "y": y, "tree": shapely.STRtree(shapely.points(x, y)),
+            "cells": geocell.build_cell_index(y, x, CELL_PRECISION)}
+
+def _point_index(method: Literal["representative", "centroid"]) -> Optional[Dict[str, Any]]:
+    return POINT_INDEX.get(method) or POINT_INDEX.get("representative")
+
+def _points_within(geom: BaseGeometry, method: Literal["representative", "centroid"]) -> np.ndarray:
+    """Posisi baris (iloc) yang titiknya berada di dalam geom: prefilter bbox via STRtree, lalu point-in-polygon vektor."""
+    idx = _point_index(method)
+    if idx is None:
+        return np.empty(0, dtype=np.int64)
+    cand = np.sort(idx["tree"].query(shapely.box(*geom.bounds)))
+    if cand.size == 0:
+        return cand
+    shapely.prepare(geom)
+    inside = shapely.intersects_xy(geom, idx["x"][cand], idx["y"][cand])
+    return idx["pos"][cand[inside]]
+
+def _build_knn(x: np.ndarray, y: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Graf k-tetangga terdekat (geodesic) untuk semua titik dalam bentuk CSR (indptr, indices, distance_km).
+
+    Titik di-bucket ke grid ~persegi (meter); kandidat diambil dari ring sel di sekitarnya dan ring diperlebar
+    sampai pasti mencakup jarak tetangga ke-k. Baris tanpa koordinat tidak punya (dan bukan) tetangga.
+    """
+    n = len(x)
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    kk = min(k, max(len(valid) - 1, 0))
+    nbr_idx = np.full((n, kk), -1, dtype=np.int64)
+    nbr_km = np.full((n, kk), np.nan)
+    if kk > 0:
+        lat0 = float(np.mean(y[valid]))
+        mx = x[valid] * 111_320.0 * math.cos(math.radians(lat0))
+        my = y[valid] * 110_574.0
+        area = (np.ptp(mx) + 1.0) * (np.ptp(my) + 1.0)
+        cell_m = max(100.0, math.sqrt(area * kk / len(valid)))
+        cx = ((mx - mx.min()) // cell_m).astype(np.int64)
+        cy = ((my - my.min()) // cell_m).astype(np.int64)
+        buckets: Dict[Tuple[int, int], np.ndarray] = {}
+        for key, members in pd.Series(np.arange(len(valid))).groupby([cx, cy]).groups.items():
+            buckets[key] = np.asarray(members, dtype=np.int64)
+        max_ring = int(max(cx.max(), cy.max())) + 1
+
+        def ring(c: Tuple[int, int], r: int) -> np.ndarray:
+            parts = [buckets[(c[0] + dx, c[1] + dy)] for dx in range(-r, r + 1) for dy in range(-r, r + 1)
+                     if (c[0] + dx, c[1] + dy) in buckets]
+            return np.concatenate(parts)
+
+        for c, members in buckets.items():
+            r = 0
+            cand = ring(c, r)
+            while len(cand) < kk + 1 and r < max_ring:
+                r += 1
+                cand = ring(c, r)
+            src = valid[members]
+            tgt = valid[cand]
+
+            def dist_matrix(tgt: np.ndarray) -> np.ndarray:
+                shape = (len(src), len(tgt))
+                _, _, m = GEOD.inv(np.broadcast_to(x[src, None], shape).ravel(), np.broadcast_to(y[src, None], shape).ravel(),
+                                   np.broadcast_to(x[tgt], shape).ravel(), np.broadcast_to(y[tgt], shape).ravel())
+                d = np.asarray(m).reshape(shape) / 1000.0
+                d[src[:, None] == tgt[None, :]] = np.inf  # bukan tetangga dirinya sendiri
+                return d
+
+            d = dist_matrix(tgt)
+            # tetangga ke-k bisa berada di luar ring yang baru dicek -> perlebar sampai radius itu tercakup
+            need = int(math.ceil(np.partition(d, kk - 1, axis=1)[:, kk - 1].max() * 1000.0 * 1.02 / cell_m))
+            if need > r:
+                tgt = valid[ring(c, min(need, max_ring))]
+                d = dist_matrix(tgt)
+            part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+            part_d = np.take_along_axis(d, part, axis=1)
+            order = np.argsort(part_d, axis=1, kind="stable")
+            nbr_idx[src] = tgt[np.take_along_axis(part, order, axis=1)]
+            nbr_km[src] = np.take_along_axis(part_d, order, axis=1)
+
+    has = nbr_idx[:, 0] >= 0 if kk > 0 else np.zeros(n, dtype=bool)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.where(has, kk, 0), out=indptr[1:])
+    return indptr, nbr_idx[has].ravel().astype(np.int32), nbr_km[has].ravel().astype(np.float32)
+
+EXPORT_CHUNK_ROWS = 2000
+
+def _json_value(v: Any) -> Any:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+def _iter_export(gdf: gpd.GeoDataFrame, fmt: Literal["ndjson", "geojsonseq", "csv"]):
+    """Generator teks per chunk baris (kolumnar), memori konstan terhadap ukuran layer."""
+    props = [c for c in gdf.columns if c not in ("geometry", "x", "y")]
+    has_geom = "geometry" in gdf.columns
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["index", *props, "latitude", "longitude"])
+        yield buf.getvalue()
+
+    for start in range(0, len(gdf), EXPORT_CHUNK_ROWS):
+        chunk = gdf.iloc[start : start + EXPORT_CHUNK_ROWS]
+        index = chunk.index.tolist()
+        cols = {c: chunk[c].tolist() for c in props}
+        xs, ys = chunk["x"].tolist(), chunk["y"].tolist()
+        geoms = shapely.to_geojson(chunk.geometry.to_numpy()) if has_geom and fmt == "geojsonseq" else None
+        buf = io.StringIO()
+        writer = csv.writer(buf) if fmt == "csv" else None
+        for i in range(len(chunk)):
+            row = {c: _json_value(cols[c][i]) for c in props}
+            lat, lon = _json_value(ys[i]), _json_value(xs[i])
+            if fmt == "csv":
+                writer.writerow([index[i], *row.values(), lat, lon])
+            elif fmt == "ndjson":
+                rec = {"index": int(index[i]), "latitude": lat, "longitude": lon, "properties": row}
+                buf.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+            else:
+                # RFC 8142: RS + GeoJSON text + LF
+                geom = geoms[i] if geoms is not None and geoms[i] is not None else (
+                    json.dumps({"type": "Point", "coordinates": [lon, lat]}) if lat is not None else "null")
+                feat = json.dumps({"index": int(index[i]), **row}, ensure_ascii=False, default=str)
+                buf.write(f'\x1e{{"type":"Feature","geometry":{geom},"properties":{feat}}}\n')
+        yield buf.getvalue()
+
+def _compress_stream(chunks: Iterable[str], encoding: str, on_complete: Optional[Callable[[bytes], None]] = None):
+    """Kompres on-the-fly tanpa menampung seluruh body; hasil akhir opsional diserahkan ke on_complete (cache)."""
+    comp = _StreamCompressor(encoding)
+    kept: Optional[List[bytes]] = [] if on_complete else None
+    kept_size = 0
+    for text in chunks:
+        data = comp.compress(text.encode("utf-8"))
+        if data:
+            if kept is not None:
+                kept_size += len(data)
+                if kept_size > EXPORT_CACHE_MAX_BYTES:
+                    kept = None  # terlalu besar untuk disimpan, tetap di-stream
+                else:
+                    kept.append(data)
+            yield data
+    data = comp.flush()
+    yield data
+    if kept is not None and on_complete is not None:
+        on_complete(b"".join(kept) + data)
+
 def _file_stats(path: str) -> Dict[str, Any]:
     st = os.stat(path)
     h = hashlib.sha256()
@@ -215,42 +748,158 @@ def _bbox_from_gdf(gdf: gpd.GeoDataFrame) -> Tuple[float, float, float, float]:
 # =========================
 BOOT_TIME = datetime.now(tz=timezone.utc)
 READY = False
+CENT_READY = False
+WARMUP_ERROR: Optional[str] = None
+LIVE_AFTER_MS: Optional[float] = None
 GDF_BASE: Optional[gpd.GeoDataFrame] = None
 GDF_REPR: Optional[gpd.GeoDataFrame] = None
 GDF_CENT: Optional[gpd.GeoDataFrame] = None
 NAME_COL: Optional[str] = None
 DATA_STATS: Dict[str, Any] = {}
 DATA_BBOX: Tuple[float, float, float, float] = (0, 0, 0, 0)
+POINT_INDEX: Dict[str, Dict[str, Any]] = {}
+NAME_INDEX: Dict[str, np.ndarray] = {}
+ATTR_INDEX: Dict[str, Dict[str, Any]] = {}
+DATA_VERSION: str = ""
+ROAD_GRAPH: Optional[RoadGraph] = None
+STARTUP_WORKERS = int(os.getenv("STARTUP_WORKERS", "4"))
+STARTUP_STAGES = ["import_heavy", "read_file", "xy_representative", "xy_centroid", "name_index", "attr_index", "file_hash", "bbox", "road_graph", "knn_graph"]
+STARTUP_PROGRESS: Dict[str, Dict[str, Any]] = {}
 
-@app.on_event("startup")
-def _load_data():
-    global READY, GDF_BASE, GDF_REPR, GDF_CENT, NAME_COL, DATA_STATS, DATA_BBOX
-
+def _read_base() -> Tuple[gpd.GeoDataFrame, Optional[str]]:
     if not os.path.exists(GEOJSON_PATH):
-        READY = False
         raise RuntimeError(f"GeoJSON tidak ditemukan: {GEOJSON_PATH}")
-
-    # Load & normalize
     gdf = gpd.read_file(GEOJSON_PATH)
     gdf.columns = gdf.columns.str.strip()
-    GDF_BASE = _extract_xy_base(gdf)
-    NAME_COL = _choose_name_column(GDF_BASE)
+    base = _extract_xy_base(gdf)
+    return base, _choose_name_column(base)
+
+def _load_road_graph() -> Optional[RoadGraph]:
+    """Muat graf jalan offline (api/routing.py); None jika ROAD_GRAPH_PATH kosong / file tidak ada."""
+    if not ROAD_GRAPH_PATH or not os.path.exists(ROAD_GRAPH_PATH):
+        return None
+    return routing.RoadGraph.from_file(ROAD_GRAPH_PATH)
+
+def _xy_and_index(base: gpd.GeoDataFrame, method: Literal["representative", "centroid"]):
+    gdf = _compute_xy_from_geom(base, method)
+    return gdf, _build_point_index(gdf)
+
+async def _run_stage(pool: ThreadPoolExecutor, stage: str, fn: Callable, *args):
+    """Jalankan satu tahap startup di thread pool sambil mencatat progres (dibaca /readyz) & durasinya."""
+    STARTUP_PROGRESS[stage] = {"status": "running"}
+    t0 = time.perf_counter()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BaseException:
+        STARTUP_PROGRESS[stage] = {"status": "failed", "seconds": round(time.perf_counter() - t0, 3)}
+        raise
+    dt = time.perf_counter() - t0
+    STARTUP_PROGRESS[stage] = {"status": "done", "seconds": round(dt, 3)}
+    METRICS.set("pariwisata_startup_stage_seconds", {"stage": stage}, dt)
+    return result
+
+async def _load_data_async() -> None:
+    """Muat data: baca file, lalu XY per metode, index nama & atribut, hash file & bbox berjalan paralel.
+
+    READY diset begitu metode 'representative' + index nama + versi data siap;
+    titik 'centroid' boleh menyusul (sementara itu _gdf_by_method jatuh ke representative).
+    """
+    global READY, CENT_READY, GDF_BASE, GDF_REPR, GDF_CENT, NAME_COL, DATA_STATS, DATA_BBOX, POINT_INDEX, NAME_INDEX, ATTR_INDEX, DATA_VERSION, ROAD_GRAPH
 
-    # Precompute XY utk 2 metode (hemat waktu request)
-    GDF_REPR = _compute_xy_from_geom(GDF_BASE, "representative")
-    GDF_CENT = _compute_xy_from_geom(GDF_BASE, "centroid")
+    t_total = time.perf_counter()
+    STARTUP_PROGRESS.update({stage: {"status": "pending"} for stage in STARTUP_STAGES})
+    pool = ThreadPoolExecutor(max_workers=STARTUP_WORKERS, thread_name_prefix="warmup")
+    try:
+        await _run_stage(pool, "import_heavy", _import_heavy)
+        base, name_col = await _run_stage(pool, "read_file", _read_base)
+
+        t_cent = asyncio.ensure_future(_run_stage(pool, "xy_centroid", _xy_and_index, base, "centroid"))
+        (gdf_repr, idx_repr), name_index, attr_index, stats, bbox, road_graph = await asyncio.gather(
+            _run_stage(pool, "xy_representative", _xy_and_index, base, "representative"),
+            _run_stage(pool, "name_index", _build_name_index, base, name_col),
+            _run_stage(pool, "attr_index", _build_attr_index, base),
+            _run_stage(pool, "file_hash", _file_stats, GEOJSON_PATH),
+            _run_stage(pool, "bbox", _bbox_from_gdf, base),
+            _run_stage(pool, "road_graph", _load_road_graph),
+        )
+        GDF_BASE, NAME_COL, NAME_INDEX, ATTR_INDEX, ROAD_GRAPH = base, name_col, name_index, attr_index, road_graph
+        GDF_REPR, POINT_INDEX = gdf_repr, {"representative": idx_repr}
+        DATA_STATS, DATA_VERSION, DATA_BBOX = stats, stats["sha256"][:16], bbox
+        READY = True  # geo endpoints sudah bisa melayani
 
-    # File stats & bbox
-    DATA_STATS = _file_stats(GEOJSON_PATH)
-    DATA_BBOX = _bbox_from_gdf(GDF_BASE)
+        t_knn = asyncio.ensure_future(_run_stage(pool, "knn_graph", _knn_graph, "representative"))
+        gdf_cent, idx_cent = await t_cent
+        GDF_CENT, POINT_INDEX = gdf_cent, {**POINT_INDEX, "centroid": idx_cent}
+        CENT_READY = True
+        await t_knn
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    METRICS.set("pariwisata_startup_stage_seconds", {"stage": "total"}, time.perf_counter() - t_total)
 
-    READY = True
+def _load_data() -> None:
+    """Versi sinkron (mis. untuk preload di luar event loop)."""
+    asyncio.run(_load_data_async())
+
+async def _warmup_async() -> None:
+    global WARMUP_ERROR
+    try:
+        await _load_data_async()
+    except Exception as e:
+        WARMUP_ERROR = f"{type(e).__name__}: {e}"
+        logging.getLogger("uvicorn.error").exception("Warm-up gagal")
+
+def _require_ready() -> None:
+    if not READY or GDF_BASE is None:
+        detail = {"status": "failed" if WARMUP_ERROR else "starting", "error": WARMUP_ERROR, "progress": STARTUP_PROGRESS}
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
 
 def _gdf_by_method(method: Literal["representative", "centroid"]) -> gpd.GeoDataFrame:
     if method == "centroid":
         return GDF_CENT if GDF_CENT is not None else GDF_REPR
     return GDF_REPR if GDF_REPR is not None else GDF_CENT
 
+# =========================
+# Cache body per versi dataset (sekali kompres, dipakai ulang)
+# =========================
+BODY_CACHE: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+BODY_CACHE_LOCK = threading.Lock()
+
+def _body_cache_get(key: str, encoding: str) -> Optional[bytes]:
+    with BODY_CACHE_LOCK:
+        return BODY_CACHE.get((DATA_VERSION, key, encoding))
+
+def _body_cache_put(key: str, encoding: str, body: bytes) -> None:
+    with BODY_CACHE_LOCK:
+        # dataset dimuat ulang: body versi lama selalu berada di depan (disisipkan sebelum versi baru)
+        while BODY_CACHE and next(iter(BODY_CACHE))[0] != DATA_VERSION:
+            BODY_CACHE.popitem(last=False)
+        BODY_CACHE[(DATA_VERSION, key, encoding)] = body
+
+def _cached_response(request: Request, key: str, build: Callable[[], Any]) -> Response:
+    """Respons JSON yang body-nya dibangun & dikompres sekali per versi dataset."""
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", "")) or "identity"
+    body = _body_cache_get(key, encoding)
+    _record_cache("body", body is not None)
+    if body is None:
+        raw = _body_cache_get(key, "identity")
+        if raw is None:
+            raw = json.dumps(build(), ensure_ascii=False, default=str).encode("utf-8")
+            _body_cache_put(key, "identity", raw)
+        body = raw if encoding == "identity" else _compress(raw, encoding)
+        _body_cache_put(key, encoding, body)
+    headers = {"Vary": "Accept-Encoding", "ETag": f'"{DATA_VERSION}-{key}"'}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# =========================
+# Single-flight: request identik yang bersamaan berbagi satu komputasi
+# =========================
+def _json_body(obj: Any) -> bytes:
+    return json.dumps(jsonable_encoder(obj), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+NEAREST_FLIGHTS = SingleFlight("nearest", METRICS, "pariwisata_singleflight_total")
+
 # =========================
 # System / Health / Meta
 # =========================
@@ -260,33 +909,62 @@ def root():
 
 @app.get("/healthz", tags=["system"])
 def healthz():
-    """Liveness probe: server hidup."""
-    if not READY:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Not ready")
+    """Liveness probe: server hidup (tidak menunggu data; gagal hanya jika warm-up error)."""
+    if WARMUP_ERROR:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=WARMUP_ERROR)
     return {"status": "ok"}
 
 @app.get("/readyz", tags=["system"])
 def readyz():
     """Readiness probe: data sudah dimuat & siap melayani."""
-    if not READY or GDF_BASE is None or len(GDF_BASE) == 0:
+    _require_ready()
+    if len(GDF_BASE) == 0:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Not ready")
-    return {"status": "ok", "rows": int(len(GDF_BASE))}
+    return {"status": "ok", "rows": int(len(GDF_BASE)), "centroid_ready": CENT_READY, "progress": STARTUP_PROGRESS}
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["system"])
+def metrics():
+    """Metrics format Prometheus: request per route, histogram latensi, durasi tahap internal & startup, cache."""
+    for cache in ("body", "export"):
+        hits = METRICS.get("pariwisata_cache_requests_total", {"cache": cache, "result": "hit"})
+        misses = METRICS.get("pariwisata_cache_requests_total", {"cache": cache, "result": "miss"})
+        if hits + misses:
+            METRICS.set("pariwisata_cache_hit_ratio", {"cache": cache}, hits / (hits + misses))
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+def _require_admin(request: Request) -> None:
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling tidak aktif.")
+    # Profil memuat query string (koordinat pengguna): tanpa token, endpoint admin selalu ditolak
+    # walau profiling aktif lewat PROFILE_SAMPLE_RATE.
+    if not PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoint admin butuh PROFILE_ADMIN_TOKEN.")
+    if request.headers.get("x-admin-token") != PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token tidak valid")
+
+@app.get("/admin/profiles", tags=["system"])
+def list_profiles(request: Request):
+    """Daftar profil terakhir di ring buffer (tanpa isi stack)."""
+    _require_admin(request)
+    return [{k: v for k, v in p.items() if k != "folded"} for p in reversed(PROFILES)]
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse, tags=["system"])
+def download_profile(profile_id: str, request: Request):
+    """Unduh satu profil sebagai folded stacks (bisa langsung dipakai flamegraph.pl / speedscope)."""
+    _require_admin(request)
+    for p in PROFILES:
+        if p["id"] == profile_id:
+            return PlainTextResponse(p["folded"], headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'})
+    raise HTTPException(status_code=404, detail="Profil tidak ditemukan.")
 
 @app.get("/meta", response_model=MetaResponse, tags=["system"])
-def meta():
-    libs = {
-        "pandas": pd.__version__,
-        "geopandas": gpd.__version__,
-        "python": sys.version.split()[0],
-    }
-    try:
-        import shapely; libs["shapely"] = shapely.__version__
-    except Exception:
-        libs["shapely"] = "unknown"
-    try:
-        import geopy; libs["geopy"] = geopy.__version__
-    except Exception:
-        libs["geopy"] = "unknown"
+def meta(request: Request):
+    if not READY:
+        return _meta_payload()  # masih warm-up: jangan di-cache
+    return _cached_response(request, "meta", lambda: _meta_payload().model_dump())
+
+def _meta_payload() -> MetaResponse:
+    libs = {**LIB_VERSIONS, "python": sys.version.split()[0]}
 
     data = {
         "geojson": DATA_STATS,
@@ -295,6 +973,12 @@ def meta():
         "bbox_wgs84": list(DATA_BBOX),
         "has_geometry": bool(GDF_BASE is not None and "geometry" in GDF_BASE.columns),
         "columns": list(GDF_BASE.columns) if GDF_BASE is not None else [],
+        "road_graph": ROAD_GRAPH.info() if ROAD_GRAPH is not None else None,
+    }
+    startup = {
+        "live_after_ms": LIVE_AFTER_MS,
+        "import_ms": dict(IMPORT_TIMINGS_MS),
+        "warmup_error": WARMUP_ERROR,
     }
 
     return MetaResponse(
@@ -307,6 +991,7 @@ def meta():
         platform=platform.platform(),
         libs=libs,
         data=data,
+        startup=startup,
     )
 
 # =========================
@@ -314,12 +999,21 @@ def meta():
 # =========================
 @app.get("/wisata", response_model=WisataStatus, tags=["wisata"])
 def wisata_status():
-    assert GDF_BASE is not None
+    _require_ready()
     return WisataStatus(status="ok", count=len(GDF_BASE), name_column=NAME_COL)
 
 @app.get("/wisata/names", response_model=List[str], tags=["wisata"])
-def list_unique_names():
-    assert GDF_BASE is not None
+def list_unique_names(request: Request):
+    _require_ready()
+    return _cached_response(request, "names", _unique_names)
+
+@app.get("/wisata/facets", response_model=Dict[str, Dict[str, int]], tags=["wisata"])
+def list_facets(request: Request):
+    """Kolom yang bisa dipakai sebagai `filter.<kolom>` / facet di /wisata/nearest beserta jumlah per nilai (seluruh data)."""
+    _require_ready()
+    return _cached_response(request, "facets", lambda: _facet_counts(sorted(ATTR_INDEX), np.arange(len(GDF_BASE))))
+
+def _unique_names() -> List[str]:
     gdf = GDF_BASE
     if NAME_COL and NAME_COL in gdf.columns:
         vals = gdf[NAME_COL].dropna().astype(str).unique().tolist()
@@ -335,81 +1029,165 @@ def list_objects(
     name: Optional[str] = Query(None, description="Filter tepat untuk nama (jika diketahui kolomnya)."),
     limit: int = Query(100, ge=1, le=10000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Token dari next_cursor halaman sebelumnya (menggantikan offset)."),
     method: Literal["representative", "centroid"] = Query("representative", description="Metode titik dari geometry."),
 ):
-    assert GDF_BASE is not None
+    _require_ready()
     gdf = _gdf_by_method(method)
 
-    # Filter nama jika diminta
-    if name and name.lower() != "semua":
-        mask = False
-        for cand in [NAME_COL] + ["nama_objek", "Nama", "name", "NAMOBJ", "namobj"]:
-            if cand and cand in gdf.columns:
-                mask = mask | (_safe_str(gdf[cand]).str.lower() == name.lower())
-        gdf = gdf[mask]
-
-    total = len(gdf)
+    # Filter nama jika diminta (lookup index, bukan scan)
+    positions = _name_positions(name)
+    total = len(gdf) if positions is None else int(positions.size)
     if total == 0:
         return ObjectsResponse(count=0, items=[])
 
-    sliced = gdf.iloc[offset : offset + limit]
+    if cursor:
+        after = _decode_cursor(cursor, name)
+        start = after + 1 if positions is None else int(np.searchsorted(positions, after, side="right"))
+    else:
+        start = offset
+
+    page = np.arange(start, min(start + limit, total)) if positions is None else positions[start : start + limit]
+    sliced = gdf.iloc[page]
     items = [_row_to_item(int(idx), row, include_distance=False, name_col=NAME_COL) for idx, row in sliced.iterrows()]
-    return ObjectsResponse(count=total, items=items)
+    next_cursor = _encode_cursor(int(page[-1]), name) if len(page) and start + limit < total else None
+    return ObjectsResponse(count=total, items=items, next_cursor=next_cursor)
 
 @app.get("/wisata/nearest", response_model=NearestResponse, tags=["wisata"])
 def nearest_objects(
+    request: Request,
     lat: float = Query(..., description="Latitude pengguna"),
     lon: float = Query(..., description="Longitude pengguna"),
     k: int = Query(3, ge=1, le=100),
     name: Optional[str] = Query(None, description="Filter tepat untuk nama (opsional)"),
     radius_km: Optional[float] = Query(None, gt=0, description="Jika diisi, batasi hasil dalam radius ini"),
     method: Literal["representative", "centroid"] = Query("representative", description="Metode titik dari geometry."),
+    rank_by: Literal["distance", "travel_time"] = Query("distance", description="Urutkan berdasarkan jarak lurus atau waktu tempuh via graf jalan."),
+    facets: Optional[str] = Query(None, description="Kolom facet dipisah koma, mis. 'jenis_obje'"),
 ):
-    assert GDF_BASE is not None
+    """Objek terdekat. Filter atribut lewat `filter.<kolom>` (mis. `filter.jenis_obje=Candi&filter.jenis_obje=Museum`;
+    diulang = OR, antar kolom = AND); daftar kolom di /wisata/facets."""
+    _require_ready()
+    filters = _parse_attr_filters(request)
+    facet_cols = _parse_facets(facets)
+    # key ternormalisasi: nama dicocokkan case-insensitive, radius float; versi data ikut agar reload tak tercampur
+    name_key = None if not name or name.lower() == "semua" else name.lower()
+    key = (DATA_VERSION, float(lat), float(lon), k, name_key, None if radius_km is None else float(radius_km), method, rank_by,
+           tuple((c, tuple(v)) for c, v in sorted(filters.items())), tuple(facet_cols))
+    body = NEAREST_FLIGHTS.do(key, lambda: _json_body(_nearest_impl(lat, lon, k, name, radius_km, method, rank_by, filters, facet_cols)))
+    return Response(content=body, media_type="application/json")
+
+def _nearest_impl(
+    lat: float,
+    lon: float,
+    k: int,
+    name: Optional[str],
+    radius_km: Optional[float],
+    method: Literal["representative", "centroid"],
+    rank_by: Literal["distance", "travel_time"],
+    filters: Optional[Dict[str, List[str]]] = None,
+    facet_cols: Iterable[str] = (),
+) -> NearestResponse:
+    if rank_by == "travel_time" and ROAD_GRAPH is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Graf jalan tidak tersedia (set ROAD_GRAPH_PATH).")
     gdf = _gdf_by_method(method)
+    idx = _point_index(method)
+    facet_cols = list(facet_cols)
+
+    with _stage("nearest", "name_filter"):
+        positions = _name_positions(name)
 
-    if name and name.lower() != "semua":
-        mask = False
-        for cand in [NAME_COL] + ["nama_objek", "Nama", "name", "NAMOBJ", "namobj"]:
-            if cand and cand in gdf.columns:
-                mask = mask | (_safe_str(gdf[cand]).str.lower() == name.lower())
-        gdf = gdf[mask]
+    with _stage("nearest", "attr_filter"):
+        mask = _attr_mask(filters)
+        if mask is not None:
+            positions = np.flatnonzero(mask) if positions is None else positions[mask[positions]]
 
-    if gdf.empty:
-        raise HTTPException(status_code=404, detail="Data kosong setelah filter nama.")
+    if gdf.empty or (positions is not None and positions.size == 0):
+        raise HTTPException(status_code=404, detail="Data kosong setelah filter atribut." if filters else "Data kosong setelah filter nama.")
 
-    gdf = gdf.dropna(subset=["x", "y"]).copy()
-    gdf["distance_km"] = gdf.apply(lambda r: _geodesic_km(float(lat), float(lon), float(r["y"]), float(r["x"])), axis=1)
+    n_take = k if rank_by == "distance" else max(ROUTE_CANDIDATES, 3 * k)
+    allowed = None
+    if positions is not None:
+        allowed = np.zeros(len(gdf), dtype=bool)
+        allowed[positions] = True
+        allowed = allowed[idx["pos"]]
+    with _stage("nearest", "distance"):
+        if allowed is not None and np.count_nonzero(allowed) <= 4 * n_take:
+            rows = np.flatnonzero(allowed)
+            dist = geocell.geodesic_km(lat, lon, idx["y"][rows], idx["x"][rows])
+        else:
+            # hanya titik (yang lolos filter) di ring sel geohash sekitar pengguna yang dihitung jaraknya;
+            # facet dalam radius butuh seluruh isi radius, bukan hanya k terdekat
+            need = math.inf if facet_cols and radius_km is not None else n_take
+            rows, dist = geocell.ring_nearest(idx["cells"], idx["y"], idx["x"], lat, lon, need, radius_km, allowed)
+
+    with _stage("nearest", "sort_select"):
+        if radius_km is not None:
+            inside = dist <= radius_km
+            rows, dist = rows[inside], dist[inside]
+        pos = idx["pos"][rows]
+        order = np.lexsort((pos, dist))[:n_take]
+        gdf_sorted = gdf.iloc[pos[order]].copy()
+        gdf_sorted["distance_km"] = dist[order]
 
-    if radius_km is not None:
-        gdf = gdf[gdf["distance_km"] <= radius_km]
+    facets = None
+    if facet_cols:
+        with _stage("nearest", "facets"):
+            # populasi facet = semua objek ber-koordinat yang lolos filter (dalam radius bila diisi)
+            if radius_km is not None:
+                facet_pos = pos
+            else:
+                facet_pos = idx["pos"] if allowed is None else idx["pos"][allowed]
+            facets = _facet_counts(facet_cols, facet_pos)
 
-    if gdf.empty:
+    if gdf_sorted.empty:
         raise HTTPException(status_code=404, detail="Tidak ada objek dalam radius/kriteria.")
 
-    gdf_sorted = gdf.sort_values("distance_km").head(k)
-    items = [_row_to_item(int(idx), row, include_distance=True, name_col=NAME_COL) for idx, row in gdf_sorted.iterrows()]
+    minutes, routes = None, None
+    if rank_by == "travel_time":
+        with _stage("nearest", "route"):
+            # rank ulang kandidat geodesic terdekat berdasarkan waktu tempuh; yang tak terjangkau di akhir
+            secs, routes = ROAD_GRAPH.travel_times(lat, lon, gdf_sorted["y"].to_numpy(float), gdf_sorted["x"].to_numpy(float))
+            order = np.argsort(secs, kind="stable")[:k]
+            gdf_sorted = gdf_sorted.iloc[order]
+            minutes = [None if math.isinf(secs[i]) else round(float(secs[i]) / 60.0, 2) for i in order]
+            routes = [routes[i] for i in order]
+
+    with _stage("nearest", "serialize"):
+        items = [_row_to_item(int(idx), row, include_distance=True, name_col=NAME_COL) for idx, row in gdf_sorted.iterrows()]
+        if minutes is not None:
+            for it, mins, coords in zip(items, minutes, routes):
+                it.travel_time_min = mins
+                it.route = {"type": "LineString", "coordinates": coords} if coords else None
     return NearestResponse(
         user_lat=lat,
         user_lon=lon,
         method=method,
         k=k,
         radius_km=radius_km,
+        rank_by=rank_by,
+        filters=filters or {},
+        facets=facets,
         count=len(items),
         items=items,
     )
 
 @app.get("/wisata/geojson", tags=["wisata"])
 def nearest_as_geojson(
+    request: Request,
     lat: float = Query(..., description="Latitude pengguna"),
     lon: float = Query(..., description="Longitude pengguna"),
     k: int = Query(3, ge=1, le=100),
     name: Optional[str] = Query(None, description="Filter tepat untuk nama (opsional)"),
     radius_km: Optional[float] = Query(None, gt=0, description="Jika diisi, batasi hasil dalam radius ini"),
     method: Literal["representative", "centroid"] = Query("representative", description="Metode titik dari geometry."),
+    rank_by: Literal["distance", "travel_time"] = Query("distance", description="Urutkan berdasarkan jarak lurus atau waktu tempuh via graf jalan."),
+    facets: Optional[str] = Query(None, description="Kolom facet dipisah koma, mis. 'jenis_obje'"),
 ):
     """Hasil yang sama dengan /wisata/nearest namun dikembalikan dalam format GeoJSON FeatureCollection."""
-    resp = nearest_objects(lat=lat, lon=lon, k=k, name=name, radius_km=radius_km, method=method)  # reuse logic
+    _require_ready()
+    filters = _parse_attr_filters(request)
+    resp = _nearest_impl(lat, lon, k, name, radius_km, method, rank_by, filters, _parse_facets(facets))  # reuse logic
     features = []
     for it in resp.items:
         features.append({
@@ -421,10 +1199,306 @@ def nearest_as_geojson(
                 "jenis_obje": it.jenis_obje,
                 "alamat": it.alamat,
                 "distance_km": it.distance_km,
+                "travel_time_min": it.travel_time_min,
                 **it.properties,
             }
         })
+        if it.route:
+            features.append({"type": "Feature", "geometry": it.route,
+                             "properties": {"index": it.index, "kind": "route", "travel_time_min": it.travel_time_min}})
     return {"type": "FeatureCollection", "features": features, "metadata": {
         "user": {"lat": resp.user_lat, "lon": resp.user_lon},
-        "method": resp.method, "k": resp.k, "radius_km": resp.radius_km
+        "method": resp.method, "k": resp.k, "radius_km": resp.radius_km, "rank_by": resp.rank_by,
+        "filters": resp.filters, "facets": resp.facets,
     }}
+
+
+@app.get("/wisata/cells/{cell}", response_model=CellResponse, tags=["wisata"])
+def objects_in_cell(
+    request: Request,
+    cell: str,
+    method: Literal["representative", "centroid"] = Query("representative", description="Metode titik dari geometry."),
+):
+    """Objek wisata di dalam satu sel geohash (presisi 1-9; prefix = sel induk).
+
+    ETag = versi data + sel, sehingga klien/CDN bisa meng-cache hasil per sel dan cukup revalidasi (304).
+    """
+    _require_ready()
+    cell = cell.lower()
+    if not 1 <= len(cell) <= geocell.INDEX_PRECISION:
+        raise HTTPException(status_code=400, detail=f"Panjang sel geohash harus 1-{geocell.INDEX_PRECISION} karakter.")
+    try:
+        code = geocell.decode(cell)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag = f'"{DATA_VERSION}-cell-{method}-{cell}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    precision = len(cell)
+    idx = _point_index(method)
+    gdf = _gdf_by_method(method)
+    with _stage("cells", "lookup"):
+        pos = np.sort(idx["pos"][geocell.cell_rows(idx["cells"], np.array([code], dtype=np.int64), precision)])
+    with _stage("cells", "serialize"):
+        items = [_row_to_item(int(i), row, include_distance=False, name_col=NAME_COL) for i, row in gdf.iloc[pos].iterrows()]
+        nlon, nlat = geocell.bits(precision)
+        ix, iy = geocell.deinterleave(code, precision)
+        neighbors = []
+        for dx, dy in ((0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)):
+            if 0 <= iy + dy < (1 << nlat):
+                neighbors.append(geocell.encode(int(geocell.interleave((ix + dx) % (1 << nlon), iy + dy, precision)), precision))
+        body = _json_body(CellResponse(
+            cell=cell,
+            precision=precision,
+            method=method,
+            bbox=list(geocell.bounds(ix, iy, precision)),
+            parent=cell[:-1] or None,
+            neighbors=neighbors,
+            count=len(items),
+            items=items,
+        ))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.post("/wisata/within", response_model=WithinResponse, tags=["wisata"])
+def objects_within(req: WithinRequest):
+    """Objek wisata yang berada di dalam poligon (mis. batas kabupaten/kecamatan)."""
+    _require_ready()
+    try:
+        geom = _polygon_from_geojson(req.geometry)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"GeoJSON poligon tidak valid: {e}")
+
+    positions = _points_within(geom, req.method)
+    total = int(positions.size)
+    if req.mode == "count":
+        return WithinResponse(count=total)
+
+    if req.limit is not None:
+        positions = positions[: req.limit]
+    gdf = _gdf_by_method(req.method)
+
+    if req.stream:
+        def _iter_ndjson():
+            # per-chunk agar memori tetap kecil walau hasilnya besar
+            for start in range(0, len(positions), 1000):
+                chunk = gdf.iloc[positions[start : start + 1000]]
+                for idx, row in chunk.iterrows():
+                    item = _row_to_item(int(idx), row, include_distance=False, name_col=NAME_COL)
+                    yield item.model_dump_json() + "\n"
+        return StreamingResponse(_iter_ndjson(), media_type="application/x-ndjson", headers={"X-Total-Count": str(total)})
+
+    sliced = gdf.iloc[positions]
+    items = [_row_to_item(int(idx), row, include_distance=False, name_col=NAME_COL) for idx, row in sliced.iterrows()]
+    return WithinResponse(count=total, items=items)
+
+
+# =========================
+# Isochrone (cache LRU per sel grid asal)
+# =========================
+ISO_CACHE: "OrderedDict[Tuple[Any, ...], Tuple[BaseGeometry, Dict[str, Any]]]" = OrderedDict()
+ISO_LOCK = threading.Lock()
+
+def _isochrone(lat: float, lon: float, minutes: int) -> Tuple[BaseGeometry, Dict[str, Any], str, List[float], bool]:
+    """Poligon terjangkau dari sel grid tempat (lat, lon) berada. Sel yang sama (mis. hub populer) dilayani dari cache."""
+    mode = "road_graph" if ROAD_GRAPH is not None else "speed_profile"
+    ci, cj = round(lat / ISO_GRID_DEG), round(lon / ISO_GRID_DEG)
+    c_lat, c_lon = ci * ISO_GRID_DEG, cj * ISO_GRID_DEG
+    key = (mode, id(ROAD_GRAPH), ci, cj, minutes)
+    with ISO_LOCK:
+        hit = ISO_CACHE.get(key)
+        if hit is not None:
+            ISO_CACHE.move_to_end(key)
+    _record_cache("isochrone", hit is not None)
+    if hit is not None:
+        return hit[0], hit[1], mode, [c_lon, c_lat], True
+
+    if ROAD_GRAPH is not None:
+        poly = ROAD_GRAPH.isochrone(c_lat, c_lon, minutes * 60.0)
+    else:
+        poly = routing.speed_profile_isochrone(c_lat, c_lon, minutes * 60.0, REACH_SPEED_KMH)
+    shapely.prepare(poly)
+    geojson = json.loads(shapely.to_geojson(shapely.set_precision(poly, 1e-6)))
+    with ISO_LOCK:
+        ISO_CACHE[key] = (poly, geojson)
+        while len(ISO_CACHE) > ISO_CACHE_SIZE:
+            ISO_CACHE.popitem(last=False)
+    return poly, geojson, mode, [c_lon, c_lat], False
+
+@app.get("/wisata/reachable", response_model=ReachableResponse, tags=["wisata"])
+def reachable_objects(
+    lat: float = Query(..., description="Latitude pengguna"),
+    lon: float = Query(..., description="Longitude pengguna"),
+    minutes: int = Query(30, ge=1, le=180, description="Batas waktu tempuh (menit)"),
+    method: Literal["representative", "centroid"] = Query("representative", description="Metode titik dari geometry."),
+    limit: int = Query(100, ge=1, le=1000, description="Maksimum item (urut jarak terdekat)"),
+    include_polygon: bool = Query(True, description="Sertakan poligon isochrone pada respons"),
+):
+    """Objek wisata yang terjangkau dalam `minutes` menit: isochrone dari graf jalan offline,
+    atau lingkaran kecepatan efektif (REACH_SPEED_KMH) bila graf tidak tersedia."""
+    _require_ready()
+    with _stage("reachable", "isochrone"):
+        poly, geojson, mode, cell, cached = _isochrone(lat, lon, minutes)
+
+    with _stage("reachable", "within"):
+        positions = _points_within(poly, method)   # hanya baris ber-koordinat (dari index titik)
+        gdf = _gdf_by_method(method)
+
+    with _stage("reachable", "distance"):
+        dist = geocell.geodesic_km(lat, lon, gdf["y"].to_numpy(float)[positions], gdf["x"].to_numpy(float)[positions])
+        top = np.argpartition(dist, limit - 1)[:limit] if dist.size > limit else np.arange(dist.size)
+        top = top[np.lexsort((positions[top], dist[top]))]
+
+    with _stage("reachable", "serialize"):
+        gdf = gdf.iloc[positions[top]].copy()
+        gdf["distance_km"] = dist[top]
+        items = [_row_to_item(int(idx), row, include_distance=True, name_col=NAME_COL) for idx, row in gdf.iterrows()]
+    return ReachableResponse(
+        user_lat=lat,
+        user_lon=lon,
+        minutes=minutes,
+        mode=mode,
+        origin_cell=cell,
+        cached=cached,
+        polygon=geojson if include_polygon else None,
+        count=int(positions.size),
+        items=items,
+    )
+
+
+# =========================
+# Graf tetangga (kNN) POI-ke-POI: CSR di disk, dibaca via memory-map
+# =========================
+KNN_GRAPHS: Dict[str, Dict[str, np.ndarray]] = {}
+KNN_LOCK = threading.Lock()
+
+def _knn_method(method: Literal["representative", "centroid"]) -> Literal["representative", "centroid"]:
+    return "centroid" if method == "centroid" and GDF_CENT is not None else "representative"
+
+def _knn_graph(method: Literal["representative", "centroid"]) -> Optional[Dict[str, np.ndarray]]:
+    """Muat graf kNN dari cache disk (per versi data, metode, k), atau bangun & simpan dulu bila belum ada."""
+    if KNN_K <= 0:
+        return None
+    with_tt = KNN_TRAVEL_TIME and ROAD_GRAPH is not None
+    key = f"{DATA_VERSION}-{method}-k{KNN_K}" + ("-tt" if with_tt else "")
+    graph = KNN_GRAPHS.get(method)
+    if graph is not None and graph["key"] == key:
+        return graph
+    with KNN_LOCK:
+        graph = KNN_GRAPHS.get(method)
+        if graph is not None and graph["key"] == key:
+            return graph
+        names = ["indptr", "indices", "distance_km"] + (["travel_min"] if with_tt else [])
+        folder = os.path.join(KNN_CACHE_DIR, key)
+        _record_cache("knn", os.path.isdir(folder))
+        if not os.path.isdir(folder):
+            gdf = _gdf_by_method(method)
+            x, y = gdf["x"].to_numpy(float), gdf["y"].to_numpy(float)
+            arrays = dict(zip(["indptr", "indices", "distance_km"], _build_knn(x, y, KNN_K)))
+            if with_tt:
+                indptr, indices = arrays["indptr"], arrays["indices"]
+                travel = np.full(len(indices), np.nan, dtype=np.float32)
+                for i in np.flatnonzero(np.diff(indptr)):
+                    nb = indices[indptr[i]:indptr[i + 1]]
+                    secs, _ = ROAD_GRAPH.travel_times(y[i], x[i], y[nb], x[nb], with_routes=False)
+                    travel[indptr[i]:indptr[i + 1]] = np.where(np.isinf(secs), np.nan, secs / 60.0)
+                arrays["travel_min"] = travel
+            tmp = f"{folder}.tmp-{os.getpid()}-{threading.get_ident()}"
+            os.makedirs(tmp, exist_ok=True)
+            for name in names:
+                np.save(os.path.join(tmp, f"{name}.npy"), arrays[name])
+            try:
+                os.replace(tmp, folder)  # atomik; proses lain yang menang duluan juga menghasilkan isi yang sama
+            except OSError:
+                for name in names:
+                    os.remove(os.path.join(tmp, f"{name}.npy"))
+                os.rmdir(tmp)
+        graph = {"key": key, **{name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r") for name in names}}
+        KNN_GRAPHS[method] = graph
+        return graph
+
+@app.get("/wisata/{index}/neighbors", response_model=NeighborsResponse, tags=["wisata"])
+def neighbors(
+    index: int,
+    k: int = Query(5, ge=1, le=100, description="Jumlah tetangga (maks KNN_K)"),
+    method: Literal["representative", "centroid"] = Query("representative", description="Metode titik dari geometry."),
+):
+    """Tetangga terdekat (geodesic) dari satu objek, dibaca langsung dari graf kNN yang sudah dihitung (O(k))."""
+    _require_ready()
+    if KNN_K <= 0:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Graf tetangga dinonaktifkan (KNN_K=0).")
+    if k > KNN_K:
+        raise HTTPException(status_code=400, detail=f"k maksimum {KNN_K} (KNN_K).")
+    method = _knn_method(method)
+    gdf = _gdf_by_method(method)
+    try:
+        pos = gdf.index.get_loc(index)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Index {index} tidak ditemukan.")
+
+    with _stage("neighbors", "lookup"):
+        graph = _knn_graph(method)
+        start, end = int(graph["indptr"][pos]), int(graph["indptr"][pos + 1])
+        end = min(end, start + k)
+        rows = gdf.iloc[np.asarray(graph["indices"][start:end])].copy()
+        rows["distance_km"] = np.asarray(graph["distance_km"][start:end], dtype=float)
+
+    with _stage("neighbors", "serialize"):
+        items = [_row_to_item(int(idx), row, include_distance=True, name_col=NAME_COL) for idx, row in rows.iterrows()]
+        if "travel_min" in graph:
+            for it, mins in zip(items, np.asarray(graph["travel_min"][start:end], dtype=float)):
+                it.travel_time_min = None if np.isnan(mins) else round(float(mins), 2)
+    return NeighborsResponse(index=index, method=method, k=k, count=len(items), items=items)
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "geojsonseq": ("application/geo+json-seq", "geojsons"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+@app.get("/wisata/export", tags=["wisata"])
+def export_layer(
+    request: Request,
+    format: Literal["ndjson", "geojsonseq", "csv"] = Query("ndjson", description="Format dump seluruh layer."),
+    method: Literal["representative", "centroid"] = Query("representative", description="Metode titik dari geometry."),
+):
+    """Dump seluruh layer secara streaming (gzip/brotli sesuai Accept-Encoding, body terkompres di-cache per versi data)."""
+    _require_ready()
+    gdf = _gdf_by_method(method)
+    media_type, ext = EXPORT_MEDIA_TYPES[format]
+    headers = {
+        "Content-Disposition": f'attachment; filename="wisata.{ext}"',
+        "X-Total-Count": str(len(gdf)),
+        "Vary": "Accept-Encoding",
+    }
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        body = _iter_export(gdf, format)
+        return StreamingResponse((t.encode("utf-8") for t in body), media_type=media_type, headers=headers)
+
+    # Body terkompres disimpan per versi dataset; request berikutnya langsung dilayani dari cache
+    headers["Content-Encoding"] = encoding
+    cache_key = f"export:{format}:{method}"
+    cached = _body_cache_get(cache_key, encoding)
+    _record_cache("export", cached is not None)
+    if cached is not None:
+        return Response(content=cached, media_type=media_type, headers=headers)
+    version = DATA_VERSION
+
+    def _store(body: bytes) -> None:
+        if version == DATA_VERSION:
+            _body_cache_put(cache_key, encoding, body)
+
+    return StreamingResponse(_compress_stream(_iter_export(gdf, format), encoding, _store), media_type=media_type, headers=headers)
+
+IMPORT_TIMINGS_MS["main"] = round((time.perf_counter() - _MODULE_T0) * 1000.0, 3)
+
+# Preload (gunicorn.conf.py): data dimuat sekali di master sebelum fork; lifespan worker melihat READY
+# dan tidak warm-up ulang. gc.freeze() memindahkan objek hasil load ke generasi permanen sehingga
+# siklus GC di worker tidak menulis header objek tsb (halaman tetap dibagi copy-on-write).
+if os.getenv("PRELOAD_DATA") == "1" and not READY:
+    _load_data()
+    gc.freeze()
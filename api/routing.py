@@ -0,0 +1,287 @@
+# api/routing.py
+"""Routing offline di atas graf jalan lokal (turunan OSM) untuk ranking berdasarkan waktu tempuh.
+
+Format file graf (JSON):
+
+    {
+      "meta":  {"name": "...", "default_speed_kmh": 30, "access_speed_kmh": 20},
+      "nodes": [[lon, lat], ...],
+      "edges": [[u, v, speed_kmh], ...]            # atau [u, v, speed_kmh, length_m, oneway]
+    }
+
+`length_m` boleh dihilangkan (dihitung haversine dari koordinat node), `oneway` default 0 (dua arah).
+File seperti ini bisa diekspor dari OSM (mis. osmnx -> node/edge + maxspeed) lalu dipasang lewat
+env ROAD_GRAPH_PATH (default kosong = fitur nonaktif). Contoh kecil yang dibundel
+(data/sample_road_graph.json) adalah grid sintetis untuk pengujian/benchmark, dibangkitkan oleh
+`python routing.py --sample <out>`.
+
+Graf disimpan sebagai CSR (indptr/indices/seconds). Query memakai Dijkstra satu-ke-banyak yang
+berhenti begitu semua node tujuan sudah final (atau melewati batas waktu), jadi biayanya sebanding
+dengan area yang dijelajahi, bukan seluruh graf.
+"""
+from __future__ import annotations
+
+import os
+import json
+import math
+import heapq
+import argparse
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+import shapely
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def _local_xy(lon, lat, lon0: float, lat0: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Proyeksi equirectangular lokal (meter) di sekitar (lon0, lat0); cukup akurat untuk skala kota/provinsi."""
+    kx = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(lat0))
+    ky = math.radians(1) * EARTH_RADIUS_M
+    return (np.asarray(lon, dtype=float) - lon0) * kx, (np.asarray(lat, dtype=float) - lat0) * ky
+
+
+def _to_lonlat(geom, lon0: float, lat0: float):
+    kx = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(lat0))
+    ky = math.radians(1) * EARTH_RADIUS_M
+    return shapely.transform(geom, lambda xy: np.column_stack([xy[:, 0] / kx + lon0, xy[:, 1] / ky + lat0]))
+
+
+def speed_profile_isochrone(lat: float, lon: float, seconds: float, speed_kmh: float):
+    """Fallback tanpa graf: lingkaran radius = kecepatan efektif x waktu (poligon WGS84)."""
+    radius_m = max(seconds, 0.0) * speed_kmh / 3.6
+    return _to_lonlat(shapely.buffer(shapely.points(0.0, 0.0), radius_m, quad_segs=16), lon, lat)
+
+
+def haversine_m(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """Jarak great-circle (meter), vectorized."""
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(a, dtype=float)) for a in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class RoadGraph:
+    """Graf jalan berarah dalam bentuk CSR; bobot sisi = detik tempuh."""
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                 seconds: np.ndarray, meta: Optional[Dict[str, Any]] = None):
+        self.lon = np.asarray(lon, dtype=float)
+        self.lat = np.asarray(lat, dtype=float)
+        self.meta = dict(meta or {})
+        self.access_speed_kmh = float(self.meta.get("access_speed_kmh", 20.0))
+
+        order = np.argsort(src, kind="stable")
+        self.indices = np.asarray(dst, dtype=np.int64)[order]
+        self.seconds = np.asarray(seconds, dtype=float)[order]
+        self.indptr = np.zeros(len(self.lon) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(self.lon)), out=self.indptr[1:])
+        # list Python untuk loop Dijkstra (akses elemen numpy satu-satu jauh lebih lambat) dibuat
+        # saat query pertama: dengan preload gunicorn hanya array numpy yang dibagi dari master;
+        # list (yang refcount-nya ditulis di tiap akses) dibangun sendiri oleh tiap worker.
+        self._adjacency: Optional[Tuple[list, list, list]] = None
+
+        self._tree = shapely.STRtree(shapely.points(self.lon, self.lat))
+
+    # ---------- loading ----------
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RoadGraph":
+        meta = data.get("meta", {})
+        nodes = np.asarray(data["nodes"], dtype=float).reshape(-1, 2)
+        lon, lat = nodes[:, 0], nodes[:, 1]
+        default_speed = float(meta.get("default_speed_kmh", 30.0))
+
+        src: List[int] = []
+        dst: List[int] = []
+        secs: List[float] = []
+        for e in data["edges"]:
+            u, v = int(e[0]), int(e[1])
+            speed = float(e[2]) if len(e) > 2 and e[2] else default_speed
+            length = float(e[3]) if len(e) > 3 and e[3] is not None else float(haversine_m(lon[u], lat[u], lon[v], lat[v]))
+            oneway = bool(e[4]) if len(e) > 4 else False
+            t = length / (speed / 3.6)
+            src.append(u); dst.append(v); secs.append(t)
+            if not oneway:
+                src.append(v); dst.append(u); secs.append(t)
+        return cls(lon, lat, np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64), np.asarray(secs), meta)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RoadGraph":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.lon)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def info(self) -> Dict[str, Any]:
+        return {"name": self.meta.get("name"), "nodes": self.node_count, "edges": self.edge_count,
+                "access_speed_kmh": self.access_speed_kmh}
+
+    # ---------- query ----------
+    def snap(self, lons, lats) -> Tuple[np.ndarray, np.ndarray]:
+        """Node terdekat untuk tiap titik + jarak akses (meter)."""
+        pts = shapely.points(np.atleast_1d(lons), np.atleast_1d(lats))
+        _, nodes = self._tree.query_nearest(pts, all_matches=False)
+        return nodes, haversine_m(np.atleast_1d(lons), np.atleast_1d(lats), self.lon[nodes], self.lat[nodes])
+
+    def _access_seconds(self, meters: np.ndarray) -> np.ndarray:
+        return np.asarray(meters, dtype=float) / (self.access_speed_kmh / 3.6)
+
+    def _dijkstra(self, source: int, targets: Optional[set] = None,
+                  max_seconds: float = math.inf) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """Dijkstra terbatas: berhenti saat semua `targets` final atau jarak melewati `max_seconds`."""
+        if self._adjacency is None:
+            self._adjacency = (self.indptr.tolist(), self.indices.tolist(), self.seconds.tolist())
+        indptr, indices, seconds = self._adjacency
+        dist: Dict[int, float] = {source: 0.0}
+        pred: Dict[int, int] = {}
+        done: set = set()
+        remaining = set(targets) if targets is not None else None
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            if d > max_seconds:
+                break
+            done.add(u)
+            if remaining is not None:
+                remaining.discard(u)
+                if not remaining:
+                    break
+            for j in range(indptr[u], indptr[u + 1]):
+                v = indices[j]
+                nd = d + seconds[j]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return {n: dist[n] for n in done}, pred
+
+    def isochrone(self, lat: float, lon: float, seconds: float,
+                  road_buffer_m: float = 300.0, max_access_m: float = math.inf):
+        """Poligon area terjangkau dalam `seconds` (WGS84).
+
+        Gabungan dari: ruas jalan yang terjangkau (sebagian, sesuai sisa waktu) di-buffer `road_buffer_m`,
+        plus lingkaran di tiap node terjangkau dengan radius sisa-waktu x kecepatan akses (opsional dibatasi
+        `max_access_m`), konsisten dengan perhitungan akses pada travel_times().
+        """
+        (o_node,), (o_m,) = self.snap(lon, lat)
+        budget = seconds - float(self._access_seconds(o_m))
+        if budget <= 0:
+            return speed_profile_isochrone(lat, lon, seconds, self.access_speed_kmh)
+        dist, _ = self._dijkstra(int(o_node), max_seconds=budget)
+
+        nodes = np.fromiter(dist.keys(), dtype=np.int64, count=len(dist))
+        remain = budget - np.fromiter(dist.values(), dtype=float, count=len(dist))
+        nx, ny = _local_xy(self.lon, self.lat, lon, lat)
+
+        # ruas keluar dari node terjangkau, dipotong sejauh sisa waktu
+        starts = np.repeat(nodes, self.indptr[nodes + 1] - self.indptr[nodes])
+        edge_ids = np.concatenate([np.arange(self.indptr[n], self.indptr[n + 1]) for n in nodes.tolist()])
+        remain_all = np.zeros(self.node_count)
+        remain_all[nodes] = remain
+        frac = np.minimum(1.0, remain_all[starts] / np.maximum(self.seconds[edge_ids], 1e-9))
+        ends = self.indices[edge_ids]
+        ex = nx[starts] + (nx[ends] - nx[starts]) * frac
+        ey = ny[starts] + (ny[ends] - ny[starts]) * frac
+        coords = np.stack([np.column_stack([nx[starts], ny[starts]]), np.column_stack([ex, ey])], axis=1)
+        parts = [shapely.buffer(shapely.linestrings(coords), road_buffer_m, quad_segs=4)] if len(coords) else []
+
+        radii = np.minimum(remain * self.access_speed_kmh / 3.6, max_access_m)
+        parts.append(shapely.buffer(shapely.points(nx[nodes], ny[nodes]), np.maximum(radii, road_buffer_m), quad_segs=8))
+        # titik asal -> node (jalur akses)
+        parts.append(np.array([shapely.buffer(shapely.linestrings([[0.0, 0.0], [nx[o_node], ny[o_node]]]), road_buffer_m, quad_segs=4)]))
+        poly = shapely.union_all(np.concatenate(parts))
+        poly = shapely.simplify(poly, road_buffer_m / 4)
+        return _to_lonlat(poly, lon, lat)
+
+    def _path(self, pred: Dict[int, int], source: int, target: int) -> List[int]:
+        path = [target]
+        while path[-1] != source:
+            path.append(pred[path[-1]])
+        return path[::-1]
+
+    def travel_times(self, lat: float, lon: float, t_lats, t_lons,
+                     with_routes: bool = True) -> Tuple[np.ndarray, List[Optional[List[List[float]]]]]:
+        """Waktu tempuh (detik) dari (lat, lon) ke tiap target + geometri rute [[lon, lat], ...].
+
+        Total = akses asal->node + jalan di graf + node->akses tujuan. Target tak terjangkau -> inf.
+        """
+        t_lats = np.atleast_1d(np.asarray(t_lats, dtype=float))
+        t_lons = np.atleast_1d(np.asarray(t_lons, dtype=float))
+        (o_node,), (o_m,) = self.snap(lon, lat)
+        t_nodes, t_m = self.snap(t_lons, t_lats)
+        dist, pred = self._dijkstra(int(o_node), targets={int(n) for n in t_nodes})
+
+        o_s = float(self._access_seconds(o_m))
+        t_s = self._access_seconds(t_m)
+        out = np.full(len(t_nodes), np.inf)
+        routes: List[Optional[List[List[float]]]] = [None] * len(t_nodes)
+        for i, n in enumerate(t_nodes.tolist()):
+            if n not in dist:
+                continue
+            out[i] = o_s + dist[n] + t_s[i]
+            if with_routes:
+                path = self._path(pred, int(o_node), n)
+                coords = [[float(lon), float(lat)]]
+                coords += [[round(float(self.lon[p]), 6), round(float(self.lat[p]), 6)] for p in path]
+                coords.append([float(t_lons[i]), float(t_lats[i])])
+                routes[i] = coords
+        return out, routes
+
+
+# =========================
+# Graf contoh (offline, deterministik) untuk pengujian
+# =========================
+# Puncak gunung di Jateng/DIY: kecepatan di sekitarnya diturunkan agar ranking waktu tempuh
+# berbeda dari jarak lurus seperti di kondisi nyata.
+SAMPLE_PEAKS = [(110.446, -7.541), (110.440, -7.454), (110.072, -7.384), (109.992, -7.300),
+                (109.906, -7.205), (110.350, -7.185), (111.192, -7.627), (109.208, -7.242)]
+
+
+def build_sample_graph(bbox=(109.0, -8.25, 111.6, -6.55), step: float = 0.05) -> Dict[str, Any]:
+    """Grid jalan sintetis di atas bbox data: arteri tiap 4 garis (60 km/j), lokal 30 km/j, lambat di lereng gunung."""
+    minx, miny, maxx, maxy = bbox
+    xs = np.round(np.arange(minx, maxx + 1e-9, step), 5)
+    ys = np.round(np.arange(miny, maxy + 1e-9, step), 5)
+    nx = len(xs)
+    nodes = [[float(x), float(y)] for y in ys for x in xs]
+
+    def speed(i0: int, j0: int, i1: int, j1: int) -> float:
+        arterial = (i0 == i1 and i0 % 4 == 0) or (j0 == j1 and j0 % 4 == 0)
+        base = 60.0 if arterial else 30.0
+        mx, my = (xs[i0] + xs[i1]) / 2, (ys[j0] + ys[j1]) / 2
+        near = min(float(haversine_m(mx, my, px, py)) for px, py in SAMPLE_PEAKS)
+        factor = 0.3 + 0.7 * min(1.0, near / 15000.0)   # <15 km dari puncak -> makin lambat
+        return round(base * factor, 1)
+
+    edges = []
+    for j in range(len(ys)):
+        for i in range(nx):
+            u = j * nx + i
+            if i + 1 < nx:
+                edges.append([u, u + 1, speed(i, j, i + 1, j)])
+            if j + 1 < len(ys):
+                edges.append([u, u + nx, speed(i, j, i, j + 1)])
+    return {
+        "meta": {"name": "sample-grid-jateng-diy", "default_speed_kmh": 30, "access_speed_kmh": 20,
+                 "bbox": list(bbox), "step_deg": step},
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Utilitas graf jalan offline.")
+    ap.add_argument("--sample", metavar="OUT", help="Tulis graf contoh (grid) ke file JSON ini.")
+    args = ap.parse_args()
+    if args.sample:
+        os.makedirs(os.path.dirname(os.path.abspath(args.sample)), exist_ok=True)
+        with open(args.sample, "w", encoding="utf-8") as f:
+            json.dump(build_sample_graph(), f, separators=(",", ":"))
+        print(f"Graf contoh ditulis ke {args.sample}")
@@ -1,17 +1,28 @@
+import gc
 import os
-import math
+import sys
 from typing import Optional, List, Dict
 from dotenv import load_dotenv
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 from geopy.distance import geodesic
 
-from fastapi import FastAPI, Query, HTTPException, Security, Depends
+from fastapi import FastAPI, Query, HTTPException, Security, Depends, Request, Response
 from fastapi.security.api_key import APIKeyHeader
 from fastapi.openapi.utils import get_openapi
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, Field
 
+# Paket bersama wisata_common/ ada di root repo (image Docker menaruhnya di PYTHONPATH)
+_REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if os.path.isdir(os.path.join(_REPO_DIR, "wisata_common")) and _REPO_DIR not in sys.path:
+    sys.path.append(_REPO_DIR)
+
+from wisata_common.geometry import points_xy
+from wisata_common.ratelimit import enforce_rate_limit, make_rate_limiter
+
 # =========================
 # Konfigurasi & Data Path
 # =========================
@@ -20,22 +31,52 @@ APP_VERSION = os.getenv("APP_VERSION", "1.0.0")
 GEOJSON_PATH = os.getenv("GEOJSON_PATH", "mapsjatebg.geojson")
 API_KEY = os.getenv("API_KEY", "secret123")
 API_KEY_NAME = "X-API-Key"
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+# Key tambahan (dipisah koma); tiap key punya bucket rate limit sendiri
+API_KEYS = {API_KEY, *(k.strip() for k in os.getenv("API_KEYS", "").split(",") if k.strip())}
+
+# Rate limit token bucket per API key: RATE_LIMIT_RPS token/detik, kapasitas RATE_LIMIT_BURST; 0 = nonaktif.
+# Override per key: RATE_LIMIT_KEYS="keyA=5/10,keyB=200/400" (rps/burst). Bobot per route lihat RATE_LIMIT_COSTS.
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "100"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "200"))
+RATE_LIMIT_KEYS = os.getenv("RATE_LIMIT_KEYS", "")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")   # bucket dibagi antar worker/instance (butuh paket redis)
+# Jumlah proses worker (gunicorn.conf.py mengisinya; uvicorn --workers juga membaca WEB_CONCURRENCY).
+# Tanpa Redis tiap worker punya bucket sendiri, jadi kuota dibagi rata agar total tetap RATE_LIMIT_*.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY") or "1"))
 
 TAGS_METADATA = [
     {"name": "system", "description": "Liveness/Readiness & metadata aplikasi."},
     {"name": "wisata", "description": "Endpoint rekomendasi objek wisata terdekat."},
 ]
 
+# =========================
+# Rate limiting (token bucket per API key; lihat wisata_common.ratelimit)
+# =========================
+# Biaya token per template route: /recommend memindai seluruh layer, health gratis untuk probe.
+RATE_LIMIT_COSTS: Dict[str, float] = {
+    "/health": 0.0,
+    "/recommend": 2.0,
+}
+RATE_LIMIT_DEFAULT_COST = 1.0
+
+RATE_LIMITER = make_rate_limiter(RATE_LIMIT_RPS, RATE_LIMIT_BURST, RATE_LIMIT_KEYS, RATE_LIMIT_REDIS_URL,
+                                 workers=WEB_CONCURRENCY, redis_prefix="pariwisata:rl:")
+
+def _enforce_rate_limit(request: Request, response: Response, api_key: str) -> None:
+    enforce_rate_limit(RATE_LIMITER, request, response, api_key, RATE_LIMIT_COSTS, RATE_LIMIT_DEFAULT_COST)
+
 # =========================
 # API Key Dependency
 # =========================
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
-def get_api_key(api_key: str = Security(api_key_header)):
-    if api_key == API_KEY:
-        return api_key
-    # (opsional) ganti ke status_code=401 kalau mau "Unauthorized"
-    raise HTTPException(status_code=403, detail="API key tidak valid")
+def get_api_key(request: Request, response: Response, api_key: str = Security(api_key_header)):
+    if api_key not in API_KEYS:
+        # (opsional) ganti ke status_code=401 kalau mau "Unauthorized"
+        raise HTTPException(status_code=403, detail="API key tidak valid")
+    _enforce_rate_limit(request, response, api_key)
+    return api_key
 
 # =========================
 # App (proteksi GLOBAL)
@@ -47,6 +88,7 @@ app = FastAPI(
     openapi_tags=TAGS_METADATA,
     dependencies=[Depends(get_api_key)],  # <<— semua endpoint wajib API key
 )
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
 
 # =========================
 # Utils
@@ -60,11 +102,7 @@ def _extract_xy(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
             gdf2.set_crs(epsg=4326, inplace=True)
         else:
             gdf2 = gdf2.to_crs(epsg=4326)
-        pts = gdf2["geometry"].apply(
-            lambda geom: geom if geom.geom_type == "Point" else geom.representative_point()
-        )
-        gdf2["x"] = pts.apply(lambda p: float(p.x))
-        gdf2["y"] = pts.apply(lambda p: float(p.y))
+        gdf2["x"], gdf2["y"] = points_xy(gdf2["geometry"].to_numpy())
         return gdf2
     raise ValueError("Data tidak memiliki kolom x/y maupun geometry")
 
@@ -191,3 +229,8 @@ def custom_openapi():
     return app.openapi_schema
 
 app.openapi = custom_openapi
+
+# Preload (gunicorn.conf.py): data di atas sudah dimuat saat import di master; bekukan objeknya
+# supaya GC di worker tidak menyalin halaman copy-on-write.
+if os.getenv("PRELOAD_DATA") == "1":
+    gc.freeze()
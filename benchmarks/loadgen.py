@@ -0,0 +1,469 @@
+"""
+Load generator & soak test HTTP (asyncio + httpx) untuk api/main.py dan laravel/predict/app.py.
+
+Berbeda dengan run.py (in-process, satu request per waktu), skrip ini menyalakan server
+sungguhan di subprocess (uvicorn, atau gunicorn multi-worker) dengan layer sintetis, lalu
+memutar campuran query realistis (koordinat berkelompok di sekitar kota, filter nama,
+query poligon/batch, predict-nearby, itinerary) dari banyak klien konkuren.
+
+Setiap level konkurensi dijalankan selama --duration detik (closed loop: tiap klien langsung
+mengirim request berikutnya begitu respons diterima). Laporan JSON memuat throughput, p50/p95/p99,
+error rate & status per level, ringkasan titik saturasi, dan (opsional) timeline soak test.
+
+    python benchmarks/loadgen.py --app api --size 100000 --concurrency 1 8 32 64 128 --duration 15
+    python benchmarks/loadgen.py --app predict --server gunicorn --workers 4 --out load.json
+    python benchmarks/loadgen.py --app api --url http://127.0.0.1:8000 --soak 600 --soak-concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+SAMPLE_ROAD_GRAPH = os.path.join(REPO, "api", "data", "sample_road_graph.json")   # grid sintetis, eksplisit
+sys.path.insert(0, HERE)
+
+import synth  # noqa: E402
+from run import _git_sha, _percentile  # noqa: E402
+
+# (method, path, kwargs httpx) untuk satu request
+RequestSpec = Tuple[str, str, Dict[str, Any]]
+Scenario = Tuple[str, float, Callable[[random.Random, Dict[str, Any]], RequestSpec]]
+
+APPS: Dict[str, Dict[str, Any]] = {
+    "api": {
+        "dir": os.path.join(REPO, "api"),
+        "target": "main:app",
+        "layer": "wisata",
+        "headers": {},
+        "env": {"ROAD_GRAPH_PATH": SAMPLE_ROAD_GRAPH},
+    },
+    "predict": {
+        "dir": os.path.join(REPO, "laravel", "predict"),
+        "target": "app:app",
+        "layer": "poi",
+        "headers": {"X-API-Key": "berapaya"},
+        # rate limiter dimatikan: satu API key untuk semua klien akan langsung kena 429
+        "env": {"EXCEL_PATH": os.path.join(REPO, "laravel", "predict", "estimasi_wisata.xlsx"), "RATE_LIMIT_RPS": "0"},
+    },
+}
+
+
+# =========================
+# Campuran query
+# =========================
+def _square(lat: float, lon: float, half_deg: float) -> Dict[str, Any]:
+    ring = [[lon - half_deg, lat - half_deg], [lon + half_deg, lat - half_deg],
+            [lon + half_deg, lat + half_deg], [lon - half_deg, lat + half_deg], [lon - half_deg, lat - half_deg]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def _api_mix() -> List[Scenario]:
+    def nearest(r, ctx):
+        lat, lon = synth._random_point(r)
+        return "GET", "/wisata/nearest", {"params": {"lat": lat, "lon": lon, "k": r.choice([3, 5, 10])}}
+
+    def nearest_radius(r, ctx):
+        lat, lon = synth._random_point(r)
+        return "GET", "/wisata/nearest", {"params": {"lat": lat, "lon": lon, "k": 10, "radius_km": r.choice([2, 5, 10, 25])}}
+
+    def nearest_name(r, ctx):
+        lat, lon = synth._random_point(r)
+        return "GET", "/wisata/nearest", {"params": {"lat": lat, "lon": lon, "k": 3, "name": r.choice(ctx["names"])}}
+
+    def objects_name(r, ctx):
+        return "GET", "/wisata/objects", {"params": {"name": r.choice(ctx["names"]), "limit": 50}}
+
+    def objects_page(r, ctx):
+        return "GET", "/wisata/objects", {"params": {"limit": 100, "offset": r.randrange(0, max(ctx["rows"] - 100, 1))}}
+
+    def within(r, ctx):
+        lat, lon = synth._random_point(r)
+        body = {"geometry": _square(lat, lon, r.choice([0.02, 0.05, 0.1])), "mode": r.choice(["items", "count"]), "limit": 200}
+        return "POST", "/wisata/within", {"json": body}
+
+    return [
+        ("nearest", 0.40, nearest),
+        ("nearest_radius", 0.15, nearest_radius),
+        ("nearest_name", 0.10, nearest_name),
+        ("objects_name", 0.10, objects_name),
+        ("objects_page", 0.10, objects_page),
+        ("within", 0.15, within),
+    ]
+
+
+def _predict_mix() -> List[Scenario]:
+    def predict_nearby(r, ctx):
+        lat, lon = synth._random_point(r)
+        body = {"destinasi": r.choice(ctx["destinasi"]), "lat": lat, "lon": lon, "radius_km": r.choice([5, 10, 20])}
+        return "POST", "/predict-nearby", {"json": body}
+
+    def itinerary(r, ctx):
+        lat, lon = synth._random_point(r)
+        body = {"lat": lat, "lon": lon, "budget": r.choice([200_000, 500_000, 1_000_000]), "time_limit_hours": r.choice([4, 8, 12])}
+        return "POST", "/itinerary", {"json": body}
+
+    def metadata(r, ctx):
+        return "GET", "/metadata", {}
+
+    return [
+        ("predict_nearby", 0.80, predict_nearby),
+        ("itinerary", 0.10, itinerary),
+        ("metadata", 0.10, metadata),
+    ]
+
+
+MIXES = {"api": _api_mix, "predict": _predict_mix}
+
+
+async def _bootstrap(app: str, client: httpx.AsyncClient) -> Dict[str, Any]:
+    """Ambil nilai nyata dari server (nama objek / destinasi) supaya filter di campuran query valid."""
+    if app == "api":
+        names = (await client.get("/wisata/names")).json()
+        rows = (await client.get("/readyz")).json().get("rows", 1)
+        rng = random.Random(0)
+        return {"names": rng.sample(names, min(len(names), 500)) or ["-"], "rows": int(rows)}
+    meta = (await client.get("/metadata")).json()
+    return {"destinasi": meta["destinasi_list"]}
+
+
+# =========================
+# Server lokal
+# =========================
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app: str, layer: str, server: str, workers: int, port: int, log_path: str) -> subprocess.Popen:
+    cfg = APPS[app]
+    env = {**os.environ, **cfg["env"], "GEOJSON_PATH": layer}
+    if server == "gunicorn":
+        env.update({"BIND": f"127.0.0.1:{port}", "WEB_CONCURRENCY": str(workers)})
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", cfg["target"]]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", cfg["target"], "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--no-access-log"]
+    log = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen(cmd, cwd=cfg["dir"], env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def _wait_ready(client: httpx.AsyncClient, proc: Optional[subprocess.Popen], timeout: float) -> float:
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"Server berhenti saat startup (exit {proc.returncode})")
+        try:
+            if (await client.get("/readyz")).status_code == 200:
+                return time.perf_counter() - t0
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server tidak siap dalam {timeout:.0f} detik")
+
+
+def _proc_mem_kb(pid: int) -> int:
+    for path, key in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(key):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+def _tree_mem_mb(pid: Optional[int]) -> Optional[float]:
+    """Memori total proses server + anak-anaknya (worker gunicorn); hanya Linux (/proc).
+
+    Memakai PSS (halaman yang dibagi antar proses dihitung proporsional) bila tersedia, jadi
+    hasil preload + copy-on-write terlihat benar; jatuh ke VmRSS bila smaps_rollup tidak ada.
+    """
+    if pid is None or not os.path.exists(f"/proc/{pid}"):
+        return None
+    total_kb, stack, seen = 0, [pid], set()
+    while stack:
+        p = stack.pop()
+        if p in seen:
+            continue
+        seen.add(p)
+        try:
+            total_kb += _proc_mem_kb(p)
+            for task in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    stack.extend(int(c) for c in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return round(total_kb / 1024, 1)
+
+
+# =========================
+# Load loop
+# =========================
+def _is_error(code: int) -> bool:
+    # 4xx (mis. 404 radius kosong, 429 rate limit) adalah jawaban sah server; dihitung terpisah di http_4xx
+    return code < 0 or code >= 500
+
+
+class Recorder:
+    """Sampel (skenario, latensi ms, status) satu jendela pengukuran; status -1 = error transport."""
+
+    def __init__(self) -> None:
+        self.samples: List[Tuple[str, float, int]] = []
+        self.exceptions: Dict[str, int] = {}
+
+    def add(self, scenario: str, ms: float, status: int) -> None:
+        self.samples.append((scenario, ms, status))
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        lat = sorted(s[1] for s in self.samples)
+        n = len(lat)
+        errors = sum(1 for s in self.samples if _is_error(s[2]))
+        http_4xx = sum(1 for s in self.samples if 400 <= s[2] < 500)
+        status: Dict[str, int] = {}
+        per: Dict[str, List[Tuple[float, int]]] = {}
+        for name, ms, code in self.samples:
+            status[str(code)] = status.get(str(code), 0) + 1
+            per.setdefault(name, []).append((ms, code))
+        by_scenario = {}
+        for name, rows in sorted(per.items()):
+            ms_sorted = sorted(r[0] for r in rows)
+            by_scenario[name] = {
+                "requests": len(rows),
+                "errors": sum(1 for r in rows if _is_error(r[1])),
+                "http_4xx": sum(1 for r in rows if 400 <= r[1] < 500),
+                "p50": round(_percentile(ms_sorted, 50), 3),
+                "p99": round(_percentile(ms_sorted, 99), 3),
+            }
+        return {
+            "requests": n,
+            "throughput_rps": round(n / elapsed, 2) if elapsed > 0 else None,
+            "errors": errors,
+            "error_rate": round(errors / n, 5) if n else None,
+            "http_4xx": http_4xx,
+            "status": status,
+            "exceptions": dict(self.exceptions),
+            "latency_ms": {
+                "mean": round(sum(lat) / n, 3) if n else None,
+                "p50": round(_percentile(lat, 50), 3),
+                "p95": round(_percentile(lat, 95), 3),
+                "p99": round(_percentile(lat, 99), 3),
+                "p999": round(_percentile(lat, 99.9), 3),
+                "max": round(lat[-1], 3) if n else None,
+            },
+            "by_scenario": by_scenario,
+        }
+
+
+async def _client_loop(client: httpx.AsyncClient, mix: List[Scenario], ctx: Dict[str, Any],
+                       rng: random.Random, stop_at: float, rec: Callable[[], Recorder]) -> None:
+    names = [m[0] for m in mix]
+    weights = [m[1] for m in mix]
+    builders = {m[0]: m[2] for m in mix}
+    while time.perf_counter() < stop_at:
+        name = rng.choices(names, weights)[0]
+        method, path, kw = builders[name](rng, ctx)
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, path, **kw)
+            await resp.aread()
+            code = resp.status_code
+        except httpx.HTTPError as e:
+            code = -1
+            r = rec()
+            r.exceptions[type(e).__name__] = r.exceptions.get(type(e).__name__, 0) + 1
+        rec().add(name, (time.perf_counter() - t0) * 1000.0, code)
+
+
+async def run_level(base_url: str, headers: Dict[str, str], mix: List[Scenario], ctx: Dict[str, Any],
+                    concurrency: int, duration: float, warmup: float, seed: int,
+                    timeout: float, server_pid: Optional[int]) -> Dict[str, Any]:
+    """Satu level konkurensi: warm-up (tidak dicatat) lalu jendela pengukuran `duration` detik."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=timeout) as client:
+        current = [Recorder()]
+        t_start = time.perf_counter()
+        stop_at = t_start + warmup + duration
+        tasks = [
+            asyncio.create_task(_client_loop(client, mix, ctx, random.Random(seed * 1_000 + i), stop_at, lambda: current[0]))
+            for i in range(concurrency)
+        ]
+        await asyncio.sleep(warmup)
+        current[0] = Recorder()
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - t0
+        cpu = time.process_time() - cpu0
+    row = {"concurrency": concurrency, "duration_s": round(elapsed, 3), **current[0].summary(elapsed)}
+    # client_cpu mendekati 1.0 => generator sendiri yang jenuh, bukan server
+    row["client_cpu"] = round(cpu / elapsed, 3) if elapsed > 0 else None
+    row["server_mem_mb"] = _tree_mem_mb(server_pid)
+    return row
+
+
+async def run_soak(base_url: str, headers: Dict[str, str], mix: List[Scenario], ctx: Dict[str, Any],
+                   concurrency: int, duration: float, interval: float, seed: int,
+                   timeout: float, server_pid: Optional[int]) -> Dict[str, Any]:
+    """Beban konstan lama; throughput, p99, error & RSS server dicatat per interval (deteksi leak/degradasi)."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeline: List[Dict[str, Any]] = []
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=timeout) as client:
+        current = [Recorder()]
+        t_start = time.perf_counter()
+        stop_at = t_start + duration
+        tasks = [
+            asyncio.create_task(_client_loop(client, mix, ctx, random.Random(seed * 7_919 + i), stop_at, lambda: current[0]))
+            for i in range(concurrency)
+        ]
+        window_t0 = t_start
+        while time.perf_counter() < stop_at:
+            await asyncio.sleep(min(interval, max(stop_at - time.perf_counter(), 0.0)))
+            now = time.perf_counter()
+            rec, current[0] = current[0], Recorder()
+            s = rec.summary(now - window_t0)
+            timeline.append({
+                "t_s": round(now - t_start, 1),
+                "throughput_rps": s["throughput_rps"],
+                "p99_ms": s["latency_ms"]["p99"],
+                "errors": s["errors"],
+                "server_mem_mb": _tree_mem_mb(server_pid),
+            })
+            window_t0 = now
+        await asyncio.gather(*tasks)
+    mem = [w["server_mem_mb"] for w in timeline if w["server_mem_mb"] is not None]
+    return {
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "interval_s": interval,
+        "errors": sum(w["errors"] for w in timeline),
+        "mem_growth_mb": round(mem[-1] - mem[0], 1) if len(mem) >= 2 else None,
+        "timeline": timeline,
+    }
+
+
+def saturation(levels: List[Dict[str, Any]], slo_p99_ms: float) -> Dict[str, Any]:
+    """Throughput maksimum, level terkecil yang mencapai >=90% darinya (knee), & level tertinggi dalam SLO p99."""
+    ok = [lv for lv in levels if lv["throughput_rps"]]
+    if not ok:
+        return {}
+    best = max(ok, key=lambda lv: lv["throughput_rps"])
+    knee = next(lv for lv in ok if lv["throughput_rps"] >= 0.9 * best["throughput_rps"])
+    within = [lv for lv in ok if lv["latency_ms"]["p99"] <= slo_p99_ms and (lv["error_rate"] or 0) < 0.01]
+    best_slo = max(within, key=lambda lv: lv["throughput_rps"]) if within else None
+    return {
+        "max_throughput_rps": best["throughput_rps"],
+        "at_concurrency": best["concurrency"],
+        "knee_concurrency": knee["concurrency"],
+        "slo_p99_ms": slo_p99_ms,
+        "max_rps_within_slo": best_slo["throughput_rps"] if best_slo else None,
+        "concurrency_within_slo": best_slo["concurrency"] if best_slo else None,
+    }
+
+
+async def _main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    cfg = APPS[args.app]
+    proc, server_pid = None, None
+    base_url = args.url
+    log_path = os.path.join(args.data_dir, f"loadgen_{args.app}_server.log")
+    if base_url is None:
+        layer = synth.ensure_layer(cfg["layer"], args.size, args.data_dir)
+        port = _free_port()
+        proc = _start_server(args.app, layer, args.server, args.workers, port, log_path)
+        server_pid = proc.pid
+        base_url = f"http://127.0.0.1:{port}"
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+            "git_sha": _git_sha(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "app": args.app,
+            "url": base_url,
+            "server": None if args.url else args.server,
+            "workers": args.workers if (args.url is None and args.server == "gunicorn") else None,
+            "size": None if args.url else args.size,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+        },
+        "levels": [],
+    }
+    try:
+        async with httpx.AsyncClient(base_url=base_url, headers=cfg["headers"], timeout=args.timeout) as client:
+            ready_s = await _wait_ready(client, proc, args.startup_timeout)
+            ctx = await _bootstrap(args.app, client)
+        report["meta"]["ready_s"] = round(ready_s, 3)
+        report["meta"]["server_mem_mb_idle"] = _tree_mem_mb(server_pid)
+        mix = MIXES[args.app]()
+        report["meta"]["mix"] = {name: weight for name, weight, _ in mix}
+
+        for c in args.concurrency:
+            row = await run_level(base_url, cfg["headers"], mix, ctx, c, args.duration, args.warmup,
+                                  args.seed, args.timeout, server_pid)
+            report["levels"].append(row)
+            print(json.dumps({k: row[k] for k in ("concurrency", "throughput_rps", "error_rate", "latency_ms", "client_cpu")}),
+                  file=sys.stderr)
+        report["saturation"] = saturation(report["levels"], args.slo_p99_ms)
+
+        if args.soak:
+            soak_c = args.soak_concurrency or report["saturation"].get("knee_concurrency") or max(args.concurrency)
+            report["soak"] = await run_soak(base_url, cfg["headers"], mix, ctx, soak_c, args.soak,
+                                            args.soak_interval, args.seed, args.timeout, server_pid)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description="Load test HTTP (asyncio + httpx) dengan sweep konkurensi.")
+    ap.add_argument("--app", choices=sorted(APPS), default="api")
+    ap.add_argument("--url", default=None, help="Uji server yang sudah berjalan (tanpa menyalakan server lokal)")
+    ap.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Jumlah worker gunicorn")
+    ap.add_argument("--size", type=int, default=100_000, help="Jumlah fitur layer sintetis")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64, 128])
+    ap.add_argument("--duration", type=float, default=15.0, help="Detik pengukuran per level")
+    ap.add_argument("--warmup", type=float, default=3.0, help="Detik warm-up per level (tidak dicatat)")
+    ap.add_argument("--timeout", type=float, default=30.0, help="Timeout per request (detik)")
+    ap.add_argument("--startup-timeout", type=float, default=600.0)
+    ap.add_argument("--slo-p99-ms", type=float, default=250.0)
+    ap.add_argument("--soak", type=float, default=0.0, help="Durasi soak test (detik); 0 = tidak")
+    ap.add_argument("--soak-concurrency", type=int, default=None, help="Default: knee dari sweep")
+    ap.add_argument("--soak-interval", type=float, default=10.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--data-dir", default=os.path.join(HERE, ".data"), help="Lokasi cache layer sintetis & log server")
+    ap.add_argument("--out", default=None, help="File JSON hasil (default: stdout)")
+    args = ap.parse_args(argv)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    report = asyncio.run(_main_async(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
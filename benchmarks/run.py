@@ -0,0 +1,281 @@
+"""
+Benchmark in-process untuk endpoint nearest/objects/recommend/predict-nearby.
+
+Setiap ukuran layer sintetis (default 1k, 100k, 1M fitur) dimuat ke app FastAPI
+masing-masing, lalu setiap skenario dijalankan dua kali: lewat ASGI TestClient
+(termasuk validasi & serialisasi) dan dengan memanggil fungsi endpoint langsung.
+Hasil (throughput, p50/p95/p99, peak RSS) ditulis sebagai JSON agar bisa
+dibandingkan antar versi.
+
+    python benchmarks/run.py --sizes 1000 100000 --requests 200 --out bench.json
+"""
+import argparse
+import gc
+import importlib.util
+import inspect
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+SAMPLE_ROAD_GRAPH = os.path.join(REPO, "api", "data", "sample_road_graph.json")   # grid sintetis, eksplisit
+sys.path.insert(0, HERE)
+
+import synth  # noqa: E402
+
+API_KEY = "bench-key"
+PREDICT_KEY = "berapaya"
+EXCEL_PATH = os.path.join(REPO, "laravel", "predict", "estimasi_wisata.xlsx")
+
+
+# =========================
+# Utilitas
+# =========================
+def _percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return float("nan")
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_sha() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO, text=True).strip()
+    except Exception:
+        return None
+
+
+def _load_module(name: str, path: str, env: Dict[str, str]):
+    """Import file app sebagai modul baru (nama unik per ukuran layer)."""
+    os.environ.update(env)
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _call_endpoint(fn: Callable, **kwargs):
+    """Panggil fungsi endpoint langsung; parameter Query(...) yang tidak diisi memakai default-nya
+    dan parameter `request` diisi Request kosong (tanpa query string tambahan)."""
+    for pname, param in inspect.signature(fn).parameters.items():
+        if pname == "request" and pname not in kwargs:
+            from starlette.requests import Request
+            kwargs[pname] = Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": []})
+            continue
+        if pname in kwargs or param.default is inspect.Parameter.empty:
+            continue
+        default = param.default
+        kwargs[pname] = getattr(default, "default", default)
+    return fn(**kwargs)
+
+
+def _wait_ready(client, path: str, headers: Optional[Dict[str, str]] = None, timeout: float = 600.0) -> float:
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        if client.get(path, headers=headers or {}).status_code == 200:
+            return time.perf_counter() - t0
+        time.sleep(0.05)
+    raise RuntimeError(f"App tidak siap dalam {timeout:.0f} detik ({path})")
+
+
+def _measure(name: str, mode: str, fn: Callable[[int], Any], n_requests: int, warmup: int = 3) -> Dict[str, Any]:
+    for i in range(warmup):
+        fn(i)
+    lat_ms: List[float] = []
+    errors = 0
+    t_start = time.perf_counter()
+    for i in range(n_requests):
+        t0 = time.perf_counter()
+        try:
+            res = fn(i)
+            if getattr(res, "status_code", 200) >= 400:
+                errors += 1
+        except Exception:
+            errors += 1
+        lat_ms.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - t_start
+    lat_ms.sort()
+    return {
+        "scenario": name,
+        "mode": mode,
+        "requests": n_requests,
+        "errors": errors,
+        "throughput_rps": round(n_requests / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "mean": round(sum(lat_ms) / len(lat_ms), 3),
+            "p50": round(_percentile(lat_ms, 50), 3),
+            "p95": round(_percentile(lat_ms, 95), 3),
+            "p99": round(_percentile(lat_ms, 99), 3),
+            "max": round(lat_ms[-1], 3),
+        },
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _random_coords(n: int, seed: int) -> List[tuple]:
+    rng = random.Random(seed)
+    return [synth._random_point(rng) for _ in range(n)]
+
+
+# =========================
+# Suite per app
+# =========================
+def bench_api(size: int, layer: str, n_requests: int) -> List[Dict[str, Any]]:
+    """api/main.py: /wisata/nearest & /wisata/objects."""
+    from fastapi.testclient import TestClient
+
+    t0 = time.perf_counter()
+    mod = _load_module(f"bench_api_{size}", os.path.join(REPO, "api", "main.py"),
+                       {"GEOJSON_PATH": layer, "ROAD_GRAPH_PATH": SAMPLE_ROAD_GRAPH})
+    coords = _random_coords(n_requests + 8, seed=size)
+    rng = random.Random(size)
+    offsets = [rng.randrange(0, max(size - 100, 1)) for _ in range(n_requests + 8)]
+    results = []
+    with TestClient(mod.app) as client:
+        ready_s = _wait_ready(client, "/readyz")
+        results.append({"scenario": "api.startup", "mode": "load", "seconds": round(time.perf_counter() - t0, 3),
+                        "ready_wait_s": round(ready_s, 3), "peak_rss_mb": round(_peak_rss_mb(), 1)})
+
+        def http_nearest(i):
+            lat, lon = coords[i]
+            return client.get("/wisata/nearest", params={"lat": lat, "lon": lon, "k": 5})
+
+        def http_objects(i):
+            return client.get("/wisata/objects", params={"limit": 100, "offset": offsets[i]})
+
+        def direct_nearest(i):
+            lat, lon = coords[i]
+            return _call_endpoint(mod.nearest_objects, lat=lat, lon=lon, k=5)
+
+        def direct_objects(i):
+            return _call_endpoint(mod.list_objects, limit=100, offset=offsets[i])
+
+        results.append(_measure("api.nearest", "http", http_nearest, n_requests))
+        results.append(_measure("api.nearest", "direct", direct_nearest, n_requests))
+        results.append(_measure("api.objects", "http", http_objects, n_requests))
+        results.append(_measure("api.objects", "direct", direct_objects, n_requests))
+    sys.modules.pop(mod.__name__, None)
+    return results
+
+
+def bench_backend(size: int, layer: str, n_requests: int) -> List[Dict[str, Any]]:
+    """backend/api/main.py: /recommend (data dimuat saat import)."""
+    from fastapi.testclient import TestClient
+
+    t0 = time.perf_counter()
+    mod = _load_module(f"bench_backend_{size}", os.path.join(REPO, "backend", "api", "main.py"),
+                       {"GEOJSON_PATH": layer, "API_KEY": API_KEY, "RATE_LIMIT_RPS": "0"})
+    results = [{"scenario": "backend.startup", "mode": "load", "seconds": round(time.perf_counter() - t0, 3),
+                "peak_rss_mb": round(_peak_rss_mb(), 1)}]
+    coords = _random_coords(n_requests + 8, seed=size + 1)
+    headers = {"X-API-Key": API_KEY}
+    with TestClient(mod.app) as client:
+        def http_recommend(i):
+            lat, lon = coords[i]
+            return client.get("/recommend", params={"lat": lat, "lon": lon, "k": 5}, headers=headers)
+
+        def direct_recommend(i):
+            lat, lon = coords[i]
+            return _call_endpoint(mod.recommend, lat=lat, lon=lon, k=5)
+
+        results.append(_measure("backend.recommend", "http", http_recommend, n_requests))
+        results.append(_measure("backend.recommend", "direct", direct_recommend, n_requests))
+    sys.modules.pop(mod.__name__, None)
+    return results
+
+
+def bench_predict(size: int, layer: str, n_requests: int) -> List[Dict[str, Any]]:
+    """laravel/predict/app.py: /predict-nearby."""
+    from fastapi.testclient import TestClient
+
+    t0 = time.perf_counter()
+    mod = _load_module(f"bench_predict_{size}", os.path.join(REPO, "laravel", "predict", "app.py"), {"RATE_LIMIT_RPS": "0"})
+    mod.EXCEL_PATH = EXCEL_PATH
+    mod.GEOJSON_PATH = layer
+    coords = _random_coords(n_requests + 8, seed=size + 2)
+    headers = {"X-API-Key": PREDICT_KEY}
+    results = []
+    with TestClient(mod.app) as client:
+        _wait_ready(client, "/readyz", headers=headers)
+        results.append({"scenario": "predict.startup", "mode": "load", "seconds": round(time.perf_counter() - t0, 3),
+                        "peak_rss_mb": round(_peak_rss_mb(), 1)})
+        destinasi = sorted(map(str, mod.DF["Destinasi"].unique()))
+
+        def payload(i):
+            lat, lon = coords[i]
+            return {"destinasi": destinasi[i % len(destinasi)], "lat": lat, "lon": lon, "radius_km": 10}
+
+        def http_predict(i):
+            return client.post("/predict-nearby", json=payload(i), headers=headers)
+
+        def direct_predict(i):
+            return _call_endpoint(mod.predict_nearby, req=mod.PredictRequest(**payload(i)), response=mod.Response(),
+                                  api_key=PREDICT_KEY)
+
+        results.append(_measure("predict.predict_nearby", "http", http_predict, n_requests))
+        results.append(_measure("predict.predict_nearby", "direct", direct_predict, n_requests))
+    sys.modules.pop(mod.__name__, None)
+    return results
+
+
+SUITES = {"api": bench_api, "backend": bench_backend, "predict": bench_predict}
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description="Benchmark endpoint nearest/objects/recommend/predict-nearby.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    ap.add_argument("--requests", type=int, default=200, help="Jumlah request terukur per skenario")
+    ap.add_argument("--suites", nargs="+", choices=sorted(SUITES), default=sorted(SUITES))
+    ap.add_argument("--data-dir", default=os.path.join(HERE, ".data"), help="Lokasi cache layer sintetis")
+    ap.add_argument("--out", default=None, help="File JSON hasil (default: stdout)")
+    args = ap.parse_args(argv)
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+            "git_sha": _git_sha(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests_per_scenario": args.requests,
+        },
+        "results": [],
+    }
+    for size in args.sizes:
+        for suite in args.suites:
+            kind = "poi" if suite == "predict" else "wisata"
+            layer = synth.ensure_layer(kind, size, args.data_dir)
+            for row in SUITES[suite](size, layer, args.requests):
+                row["size"] = size
+                report["results"].append(row)
+                print(json.dumps(row), file=sys.stderr)
+            gc.collect()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Generator layer GeoJSON sintetis untuk benchmark & load test.
+
+Skema mengikuti mapsjatebg.geojson (layer wisata Jateng/DIY) dan
+wisata_diy.geojson (layer POI untuk /predict-nearby). Titik dibuat
+berkelompok di sekitar kota-kota besar supaya distribusinya mirip data asli.
+
+    python benchmarks/synth.py --kind wisata --n 100000 --out /tmp/wisata_100k.geojson
+"""
+import argparse
+import json
+import os
+import random
+from typing import Iterator, List, Tuple
+
+# (lat, lon) pusat klaster: Semarang, Yogyakarta, Solo, Magelang, Purwokerto, Pekalongan, Wonosobo
+CITY_CENTERS: List[Tuple[float, float]] = [
+    (-6.9932, 110.4203), (-7.7956, 110.3695), (-7.5666, 110.8167), (-7.4797, 110.2177),
+    (-7.4214, 109.2344), (-6.8886, 109.6753), (-7.3605, 109.9018),
+]
+BBOX = (108.8, -8.2, 111.7, -6.4)  # minx, miny, maxx, maxy
+
+JENIS = ["Museum", "Candi", "Pantai", "Taman", "Kuliner", "Religi", "Air Terjun", "Goa", "Desa Wisata", "Belanja"]
+TOURISM = ["attraction", "museum", "viewpoint", "park", "beach", "hotel", "yes"]
+KATEGORI = ["Candi", "Pantai", "Museum", "Taman", "Landmark", "Geowisata", "Kuliner", "Panorama"]
+KABUPATEN = ["Sleman", "Bantul", "Kulon Progo", "Gunungkidul", "Kota Yogyakarta", "Semarang", "Magelang", "Klaten"]
+
+
+def _random_point(rng: random.Random) -> Tuple[float, float]:
+    """80% berkelompok di sekitar kota, sisanya tersebar merata di bbox."""
+    if rng.random() < 0.8:
+        lat, lon = rng.choice(CITY_CENTERS)
+        lat, lon = rng.gauss(lat, 0.12), rng.gauss(lon, 0.12)
+    else:
+        lat, lon = rng.uniform(BBOX[1], BBOX[3]), rng.uniform(BBOX[0], BBOX[2])
+    return round(min(max(lat, BBOX[1]), BBOX[3]), 6), round(min(max(lon, BBOX[0]), BBOX[2]), 6)
+
+
+def _dms(lat: float, lon: float) -> str:
+    def part(v: float) -> str:
+        v = abs(v)
+        d, m = int(v), int((v % 1) * 60)
+        return f"{d} {m:02d} {((v * 3600) % 60):04.1f}"
+    return f"{'S' if lat < 0 else 'N'}{part(lat)} E{part(lon)}"
+
+
+def iter_wisata_features(n: int, seed: int = 42) -> Iterator[dict]:
+    """Fitur dengan skema mapsjatebg.geojson."""
+    rng = random.Random(seed)
+    for i in range(n):
+        lat, lon = _random_point(rng)
+        jenis = rng.choice(JENIS)
+        yield {
+            "type": "Feature",
+            "properties": {
+                "objectid": float(i + 1),
+                "no_": float(i + 1),
+                "nama_objek": f"{jenis} Sintetis {i + 1}",
+                "jenis_obje": jenis,
+                "jenis_ob_1": jenis,
+                "y": lat,
+                "x": lon,
+                "koordinat": _dms(lat, lon),
+                "alamat": f"Jl. Sintetis No. {rng.randint(1, 300)}",
+                "deskripsi": f"Objek wisata {jenis.lower()} sintetis untuk benchmark.",
+            },
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        }
+
+
+def iter_poi_features(n: int, seed: int = 7) -> Iterator[dict]:
+    """Fitur dengan skema wisata_diy.geojson (dipakai /predict-nearby)."""
+    rng = random.Random(seed)
+    for i in range(n):
+        lat, lon = _random_point(rng)
+        kategori = rng.choice(KATEGORI)
+        yield {
+            "type": "Feature",
+            "properties": {
+                "NAMOBJ": f"{kategori} Sintetis {i + 1}",
+                "tourism": rng.choice(TOURISM),
+                "KATEGORI": kategori,
+                "KABUPATEN": rng.choice(KABUPATEN),
+                "TIKET_MASUK_RP": rng.choice([0, 5000, 10000, 15000, 25000, 50000]),
+                "JAM_BUKA": "08:00-17:00",
+                "RATING": round(rng.uniform(3.5, 5.0), 1),
+                "SOURCE": "synthetic",
+                "UPDATED_AT": "2025-01-01",
+            },
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        }
+
+
+def write_geojson(path: str, features: Iterator[dict], name: str) -> str:
+    """Tulis FeatureCollection secara streaming (tidak menampung semua fitur di memori)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n"type": "FeatureCollection",\n')
+        f.write(f'"name": "{name}",\n')
+        f.write('"crs": { "type": "name", "properties": { "name": "urn:ogc:def:crs:OGC:1.3:CRS84" } },\n')
+        f.write('"features": [\n')
+        for i, feat in enumerate(features):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(feat, ensure_ascii=False))
+        f.write("\n]\n}\n")
+    return path
+
+
+def ensure_layer(kind: str, n: int, out_dir: str) -> str:
+    """Path layer sintetis (dibuat sekali lalu dipakai ulang)."""
+    path = os.path.join(out_dir, f"{kind}_{n}.geojson")
+    if not os.path.exists(path):
+        feats = iter_wisata_features(n) if kind == "wisata" else iter_poi_features(n)
+        write_geojson(path + ".tmp", feats, kind)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Buat layer GeoJSON sintetis.")
+    ap.add_argument("--kind", choices=["wisata", "poi"], default="wisata")
+    ap.add_argument("--n", type=int, default=1000)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+    feats = iter_wisata_features(args.n) if args.kind == "wisata" else iter_poi_features(args.n)
+    print(write_geojson(args.out, feats, args.kind))
@@ -1,28 +1,135 @@
-from fastapi import FastAPI, HTTPException, Depends, Security
+from __future__ import annotations
+
+import time
+_MODULE_T0 = time.perf_counter()
+
+import abc
+import gc
+import os
+import re
+import math
+import json
+import hashlib
+import sys
+import asyncio
+import logging
+import importlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+# Paket bersama wisata_common/ ada di root repo (image Docker menaruhnya di PYTHONPATH)
+_REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if os.path.isdir(os.path.join(_REPO_DIR, "wisata_common")) and _REPO_DIR not in sys.path:
+    sys.path.append(_REPO_DIR)
+
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Security
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.security.api_key import APIKeyHeader, APIKey
 from pydantic import BaseModel, Field
-from typing import List, Literal, Optional
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Tuple
+
+from wisata_common.metrics import MetricsMiddleware, MetricsRegistry
+from wisata_common.profiling import ProfiledRoute, ProfilingMiddleware
+from wisata_common.ratelimit import enforce_rate_limit, make_rate_limiter
+from wisata_common.singleflight import SingleFlight
+
+# pandas/geopandas/sklearn & sel geohash (numpy+pyproj) di-import di thread warm-up (lihat _import_heavy),
+# supaya app & /health langsung hidup tanpa menunggu library berat.
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import geopandas as gpd
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.ensemble import RandomForestRegressor
+    from wisata_common import geocell
 
-import pandas as pd
-import geopandas as gpd
-from geopy.distance import geodesic
-from sklearn.preprocessing import LabelEncoder
-from sklearn.ensemble import RandomForestRegressor
+HEAVY_MODULES = ["numpy", "pandas", "geopandas", "wisata_common.geocell", "sklearn.preprocessing", "sklearn.ensemble"]
+IMPORT_TIMINGS_MS: Dict[str, float] = {}
+
+
+def _import_heavy() -> None:
+    """Import library berat sekali & catat durasi per modul."""
+    global np, pd, gpd, geocell, LabelEncoder, RandomForestRegressor
+    if "pandas" in IMPORT_TIMINGS_MS:
+        return
+    mods = {}
+    for name in HEAVY_MODULES:
+        t0 = time.perf_counter()
+        mods[name] = importlib.import_module(name)
+        IMPORT_TIMINGS_MS[name] = round((time.perf_counter() - t0) * 1000.0, 3)
+    np, pd, gpd = mods["numpy"], mods["pandas"], mods["geopandas"]
+    geocell = mods["wisata_common.geocell"]   # sel geohash + jarak geodesik WGS84 (hasil = geopy.geodesic)
+    LabelEncoder = mods["sklearn.preprocessing"].LabelEncoder
+    RandomForestRegressor = mods["sklearn.ensemble"].RandomForestRegressor
 
 # =========================
 # Konfigurasi & Path Data
 # =========================
-EXCEL_PATH = "estimasi_wisata.xlsx"      # <<-- disesuaikan
-GEOJSON_PATH = "wisata_diy.geojson"      # <<-- disesuaikan
+EXCEL_PATH = os.getenv("EXCEL_PATH", "estimasi_wisata.xlsx")      # <<-- disesuaikan
+GEOJSON_PATH = os.getenv("GEOJSON_PATH", "wisata_diy.geojson")    # <<-- disesuaikan
+# Cache kolumnar hasil konversi Excel (Parquet; pickle jika pyarrow tidak terpasang)
+EXCEL_CACHE_DIR = os.getenv("EXCEL_CACHE_DIR", ".cache/excel")
+EXCEL_TEXT_COLS = ["Kategori", "Destinasi", "Aktivitas Utama"]
+EXCEL_NUMERIC_COLS = ["Estimasi Biaya Min (Rp)", "Estimasi Biaya Max (Rp)"]
 
 API_KEY = "berapaya"  # ganti sesuai kebutuhan
 API_KEY_NAME = "X-API-Key"
+# Key tambahan (dipisah koma); tiap key punya bucket rate limit sendiri
+API_KEYS = {API_KEY, *(k.strip() for k in os.getenv("API_KEYS", "").split(",") if k.strip())}
+
+# Rate limit token bucket per API key: RATE_LIMIT_RPS token/detik, kapasitas RATE_LIMIT_BURST; 0 = nonaktif.
+# Override per key: RATE_LIMIT_KEYS="keyA=5/10,keyB=200/400" (rps/burst). Bobot per route lihat RATE_LIMIT_COSTS.
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "100"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "200"))
+RATE_LIMIT_KEYS = os.getenv("RATE_LIMIT_KEYS", "")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")   # bucket dibagi antar worker/instance (butuh paket redis)
+# Jumlah proses worker (gunicorn.conf.py mengisinya; uvicorn --workers juga membaca WEB_CONCURRENCY).
+# Tanpa Redis tiap worker punya bucket sendiri, jadi kuota dibagi rata agar total tetap RATE_LIMIT_*.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY") or "1"))
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))      # 0..1, 0 = tidak ada sampling acak
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")                  # header X-Profile / X-Admin-Token; wajib untuk /admin/profiles
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", "20"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_ADMIN_TOKEN)
+
+# Itinerary: perkiraan waktu tempuh dari jarak lurus (faktor jalan berkelok) & default per POI
+ITINERARY_DETOUR_FACTOR = float(os.getenv("ITINERARY_DETOUR_FACTOR", "1.3"))
+ITINERARY_DEFAULT_VISIT_H = float(os.getenv("ITINERARY_DEFAULT_VISIT_H", "1.5"))
+ITINERARY_DEFAULT_RATING = float(os.getenv("ITINERARY_DEFAULT_RATING", "4.0"))
+ITINERARY_MAX_CANDIDATES = int(os.getenv("ITINERARY_MAX_CANDIDATES", "300"))   # batas ukuran matriks jarak (n+1)^2
+NEARBY_FALLBACK_K = 30   # jumlah tempat terdekat global bila radius kosong
+CELL_PRECISION = int(os.getenv("CELL_PRECISION", "5"))   # presisi sel geohash untuk ring pencarian (5 = ~4.9 x 4.9 km)
+
+# Model biaya: "compact" = hutan kecil diratakan ke array numpy, "rf" = RandomForest 250 pohon (lama)
+COST_MODEL = os.getenv("COST_MODEL", "compact")
+COST_MODEL_TREES = int(os.getenv("COST_MODEL_TREES", "32"))
+COST_MODEL_MAX_DEPTH = int(os.getenv("COST_MODEL_MAX_DEPTH", "6"))
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup tidak memblokir: warm-up (import, Excel, training, GeoJSON) berjalan sebagai task."""
+    global LIVE_AFTER_MS
+    LIVE_AFTER_MS = round((time.perf_counter() - _MODULE_T0) * 1000.0, 3)
+    task = None if READY else asyncio.create_task(_warmup_async())
+    try:
+        yield
+    finally:
+        if task is not None and not task.done():
+            task.cancel()
+
+
 app = FastAPI(title="Berapa Ya - Wisata DIY",
               description="Prototype prediksi biaya & pencarian tempat wisata di DIY",
-              version="1.2.0")
+              version="1.2.0",
+              lifespan=lifespan)
 
 # CORS (opsional)
 app.add_middleware(
@@ -32,21 +139,85 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Kompres gzip hanya untuk respons di atas ambang (respons kecil tidak sebanding biayanya)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# =========================
+# Metrics (format teks Prometheus)
+# =========================
+METRICS = MetricsRegistry()
+METRICS.describe("berapaya_stage_duration_seconds", "histogram", "Durasi tahap internal per endpoint.")
+METRICS.describe("berapaya_startup_stage_seconds", "gauge", "Durasi tahap startup (Excel, training, GeoJSON).")
+
+
+@contextmanager
+def _stage(endpoint: str, stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe("berapaya_stage_duration_seconds", {"endpoint": endpoint, "stage": stage}, time.perf_counter() - t0)
+
+
+app.add_middleware(MetricsMiddleware, metrics=METRICS, prefix="berapaya")
+
+
+# =========================
+# Profiling (opt-in, sampling; lihat wisata_common.profiling)
+# =========================
+PROFILES: deque = deque(maxlen=PROFILE_RING_SIZE)
+
+
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, profiles=PROFILES, admin_token=PROFILE_ADMIN_TOKEN,
+                       sample_rate=PROFILE_SAMPLE_RATE, interval_ms=PROFILE_INTERVAL_MS)
+    app.router.route_class = ProfiledRoute  # route di bawah ini dibungkus profiled()
+
+# =========================
+# Rate limiting (token bucket per API key; lihat wisata_common.ratelimit)
+# =========================
+# Biaya token per template route; endpoint berat (itinerary = solver + matriks jarak) lebih mahal.
+# Probe & scrape (health/readyz/metrics) gratis supaya orkestrator tidak pernah kena 429.
+RATE_LIMIT_COSTS: Dict[str, float] = {
+    "/health": 0.0,
+    "/readyz": 0.0,
+    "/metrics": 0.0,
+    "/metadata": 1.0,
+    "/predict-nearby": 1.0,
+    "/itinerary": 5.0,
+}
+RATE_LIMIT_DEFAULT_COST = 1.0
+
+
+RATE_LIMITER = make_rate_limiter(RATE_LIMIT_RPS, RATE_LIMIT_BURST, RATE_LIMIT_KEYS, RATE_LIMIT_REDIS_URL,
+                                 workers=WEB_CONCURRENCY, redis_prefix="berapaya:rl:")
+METRICS.describe("berapaya_rate_limited_total", "counter", "Request yang ditolak rate limiter (429) per route.")
+
+
+def _enforce_rate_limit(request: Request, response: Response, api_key: str) -> None:
+    enforce_rate_limit(RATE_LIMITER, request, response, api_key, RATE_LIMIT_COSTS, RATE_LIMIT_DEFAULT_COST,
+                       on_limited=lambda route: METRICS.inc("berapaya_rate_limited_total", {"route": route}))
+
 
 # =========================
 # Security Dependency
 # =========================
-async def get_api_key(api_key_header: str = Security(api_key_header)):
-    if api_key_header == API_KEY:
-        return api_key_header
-    else:
+async def get_api_key(request: Request, response: Response, api_key_header: str = Security(api_key_header)):
+    if api_key_header not in API_KEYS:
         raise HTTPException(status_code=403, detail="Could not validate API KEY")
+    _enforce_rate_limit(request, response, api_key_header)
+    return api_key_header
 
 # =========================
 # Utilitas
 # =========================
-def compute_distance_km(latlon_a, latlon_b) -> float:
-    return geodesic(latlon_a, latlon_b).km
+def top_k(dist: "np.ndarray", k: int) -> "np.ndarray":
+    """Indeks k jarak terkecil terurut (argpartition O(n) + sort k elemen)."""
+    k = min(k, len(dist))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    part = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+    return part[np.argsort(dist[part], kind="stable")]
 
 
 def filter_only_wisata(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
@@ -72,13 +243,110 @@ def filter_only_wisata(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     return g[mask] if mask.any() else g
 
 
+def haversine_matrix_km(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Matriks jarak great-circle (km) antar semua titik, sekali jalan (vectorized)."""
+    la, lo = np.radians(lat), np.radians(lon)
+    dlat = la[:, None] - la[None, :]
+    dlon = lo[:, None] - lo[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(la)[:, None] * np.cos(la)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * 6371.0088 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def plan_itinerary(hours: np.ndarray, visit_h: np.ndarray, cost: np.ndarray, value: np.ndarray,
+                   budget: float, time_limit_h: float, closed: bool, max_stops: Optional[int],
+                   deadline: float) -> Tuple[List[int], bool]:
+    """Orienteering heuristik: greedy insertion (nilai / porsi waktu+budget yang terpakai) + 2-opt,
+    diulang sampai tidak ada perbaikan atau `deadline` (perf_counter) lewat.
+
+    Node 0 = titik awal (visit 0, cost 0). Mengembalikan (urutan node tanpa titik awal, deadline_hit).
+    """
+    n = len(visit_h)
+    route = [0, 0] if closed else [0]
+    chosen = np.zeros(n, dtype=bool)
+    chosen[0] = True
+    used_c = 0.0
+
+    def route_hours(r: List[int]) -> float:
+        ra = np.asarray(r)
+        return float(hours[ra[:-1], ra[1:]].sum() + visit_h[ra].sum())
+
+    def two_opt(r: List[int]) -> List[int]:
+        # posisi 0 tetap (titik awal); pada rute tertutup posisi terakhir juga tetap
+        last = len(r) - 1 if closed else len(r)
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for i in range(1, last - 1):
+                j = np.arange(i + 1, last)
+                a, b = r[i - 1], r[i]
+                cj = np.asarray(r)[j]
+                nxt = np.asarray(r + [-1])[j + 1]
+                after = np.where(nxt >= 0, hours[b, np.maximum(nxt, 0)], 0.0)
+                before = np.where(nxt >= 0, hours[cj, np.maximum(nxt, 0)], 0.0)
+                delta = hours[a, cj] + after - hours[a, b] - before
+                k = int(np.argmin(delta))
+                if delta[k] < -1e-9:
+                    jj = int(j[k])
+                    r = r[:i] + r[i:jj + 1][::-1] + r[jj + 1:]
+                    improved = True
+        return r
+
+    used_t = route_hours(route)
+    deadline_hit = False
+    while True:
+        grew = False
+        while max_stops is None or len(route) - (2 if closed else 1) < max_stops:
+            if time.perf_counter() > deadline:
+                deadline_hit = True
+                break
+            cand = np.flatnonzero(~chosen & (cost + used_c <= budget))
+            if cand.size == 0:
+                break
+            r = np.asarray(route)
+            # tambahan waktu tempuh jika kandidat disisipkan di antara tiap pasangan berurutan
+            delta = hours[r[:-1]][:, cand] + hours[cand][:, r[1:]].T - hours[r[:-1], r[1:]][:, None]
+            if not closed:
+                delta = np.vstack([delta, hours[r[-1], cand][None, :]])  # sisip di ujung rute terbuka
+            pos = delta.argmin(axis=0)
+            extra = delta[pos, np.arange(cand.size)] + visit_h[cand]
+            feasible = used_t + extra <= time_limit_h
+            if not feasible.any():
+                break
+            score = value[cand] / (extra / time_limit_h + cost[cand] / max(budget, 1.0) + 1e-9)
+            score[~feasible] = -np.inf
+            j = int(np.argmax(score))
+            c = int(cand[j])
+            route.insert(int(pos[j]) + 1, c)
+            chosen[c] = True
+            used_c += float(cost[c])
+            used_t += float(extra[j])
+            grew = True
+        if deadline_hit or not grew or len(route) < 4:
+            break
+        shorter = two_opt(route)
+        if route_hours(shorter) >= used_t - 1e-9:
+            break
+        route, used_t = shorter, route_hours(shorter)  # waktu yang dihemat dipakai untuk sisipan berikutnya
+    if time.perf_counter() > deadline:
+        deadline_hit = True
+    return (route[1:-1] if closed else route[1:]), deadline_hit
+
+
 # =========================
 # Model & Data Global (di-load saat startup)
 # =========================
 DF: Optional[pd.DataFrame] = None
 GDF_POI: Optional[gpd.GeoDataFrame] = None
-MODEL: Optional[RandomForestRegressor] = None
-LABEL_ENCODERS: Optional[dict] = None
+MODEL: Optional["CostModel"] = None
+COST_TABLE: Dict[str, Tuple[float, float, float]] = {}   # destinasi -> (prediksi, min, max)
+READY = False
+WARMUP_ERROR: Optional[str] = None
+LIVE_AFTER_MS: Optional[float] = None
+ALL_PARTS = ("excel", "model", "geo", "itinerary")
+READY_PARTS: set = set()
+STARTUP_WORKERS = int(os.getenv("STARTUP_WORKERS", "3"))
+STARTUP_STAGES = ["import_heavy", "read_excel", "train_model", "load_geojson", "poi_cells", "itinerary_candidates"]
+STARTUP_PROGRESS: Dict[str, Dict[str, object]] = {}
 
 
 # =========================
@@ -106,6 +374,8 @@ class PlaceOut(BaseModel):
 class PredictResponse(BaseModel):
     destinasi: str
     predicted_cost: float
+    predicted_cost_min: float
+    predicted_cost_max: float
     budget: int
     budget_ok: bool
     radius_km: float
@@ -115,43 +385,252 @@ class PredictResponse(BaseModel):
     note: Optional[str] = None
 
 
+class ItineraryRequest(BaseModel):
+    lat: float = Field(-7.7956, description="Latitude titik awal")
+    lon: float = Field(110.3695, description="Longitude titik awal")
+    budget: int = Field(500_000, ge=0, description="Total budget (Rupiah) untuk semua destinasi")
+    time_limit_hours: float = Field(8.0, gt=0, le=24, description="Batas waktu total (perjalanan + kunjungan), jam")
+    return_to_start: bool = Field(True, description="Rute kembali ke titik awal")
+    speed_kmh: float = Field(30.0, gt=0, le=120, description="Kecepatan rata-rata kendaraan")
+    kategori: Optional[List[str]] = Field(None, description="Hanya kategori yang mengandung salah satu kata ini")
+    max_stops: Optional[int] = Field(None, ge=1, le=50)
+    geom_method: Literal["Centroid", "Representative Point"] = Field(
+        "Representative Point", description="Metode titik perwakilan geometri"
+    )
+    deadline_ms: int = Field(250, ge=10, le=2000, description="Batas waktu komputasi; hasil terbaik sejauh ini dikembalikan")
+
+
+class ItineraryStop(BaseModel):
+    order: int
+    name: str
+    kategori: Optional[str] = None
+    lat: float
+    lon: float
+    cost: float
+    rating: float
+    visit_hours: float
+    travel_km_from_prev: float
+    arrive_after_hours: float
+
+
+class ItineraryResponse(BaseModel):
+    stops: List[ItineraryStop]
+    total_cost: float
+    total_value: float
+    total_travel_km: float
+    total_travel_hours: float
+    total_visit_hours: float
+    total_hours: float
+    return_leg_km: Optional[float] = None
+    budget: int
+    time_limit_hours: float
+    candidates: int
+    solve_ms: float
+    deadline_hit: bool
+    google_maps_directions: Optional[str] = None
+
+
 # =========================
 # Startup: load Excel & GeoJSON
 # =========================
-@app.on_event("startup")
-def on_startup():
-    global DF, GDF_POI, MODEL, LABEL_ENCODERS
+def _file_digest(path: str) -> str:
+    """sha256 isi file (16 hex pertama) sebagai kunci cache."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def _excel_cache_stem(path: str, digest: str) -> str:
+    return os.path.join(EXCEL_CACHE_DIR, f"{os.path.basename(path)}.{digest}")
+
+
+def _excel_cache_load(path: str, digest: str) -> Optional[pd.DataFrame]:
+    stem = _excel_cache_stem(path, digest)
+    for ext, reader in ((".parquet", pd.read_parquet), (".pkl", pd.read_pickle)):
+        if os.path.exists(stem + ext):
+            try:
+                return reader(stem + ext)
+            except Exception:
+                logging.getLogger("uvicorn.error").warning("Cache Excel %s rusak, konversi ulang", stem + ext)
+    return None
+
+
+def _excel_cache_store(path: str, digest: str, df: pd.DataFrame) -> None:
+    """Tulis atomik (tmp + os.replace) & hapus versi lama file yang sama. Gagal tulis tidak fatal."""
+    stem = _excel_cache_stem(path, digest)
+    prefix = f"{os.path.basename(path)}."
+    tmp = f"{stem}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+        try:
+            df.to_parquet(tmp, index=False)
+            final = stem + ".parquet"
+        except Exception:  # pyarrow tidak ada / kolom campuran tidak bisa dikonversi
+            df.to_pickle(tmp)
+            final = stem + ".pkl"
+        os.replace(tmp, final)
+        for name in os.listdir(EXCEL_CACHE_DIR):
+            if name.startswith(prefix) and not name.startswith(prefix + digest):
+                os.remove(os.path.join(EXCEL_CACHE_DIR, name))
+    except OSError as e:
+        logging.getLogger("uvicorn.error").warning("Cache Excel tidak bisa ditulis: %s", e)
+
+
+def read_excel() -> pd.DataFrame:
+    """Excel -> DataFrame bertipe lewat cache kolumnar berkunci hash file.
+    Validasi kolom & konversi tipe hanya saat cache dibuat; isi Excel berubah => hash baru => konversi ulang."""
+    digest = _file_digest(EXCEL_PATH)
+    cached = _excel_cache_load(EXCEL_PATH, digest)
+    if cached is not None:
+        return cached
 
-    # ---- Load Excel (estimasi_wisata.xlsx)
     df = pd.read_excel(EXCEL_PATH)
     df.columns = df.columns.str.strip()
 
-    required_cols = [
-        "Kategori", "Destinasi", "Aktivitas Utama",
-        "Estimasi Biaya Min (Rp)", "Estimasi Biaya Max (Rp)"
-    ]
+    required_cols = EXCEL_TEXT_COLS + EXCEL_NUMERIC_COLS
     missing = [c for c in required_cols if c not in df.columns]
     if missing:
         raise RuntimeError(f"Kolom tidak lengkap di Excel: {missing}. Kolom ada: {list(df.columns)}")
+    for col in EXCEL_TEXT_COLS:
+        df[col] = df[col].astype(str)
+    for col in EXCEL_NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    _excel_cache_store(EXCEL_PATH, digest, df)
+    return df
+
+
+class CostModel(abc.ABC):
+    """Antarmuka model biaya: fit(X, y) lalu predict_interval(X) -> (prediksi, min, max) per baris."""
+    name = "base"
+
+    @abc.abstractmethod
+    def fit(self, X, y) -> "CostModel":
+        ...
+
+    @abc.abstractmethod
+    def predict_interval(self, X) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        ...
+
+    def predict(self, X) -> "np.ndarray":
+        return self.predict_interval(X)[0]
+
+    def info(self) -> Dict[str, object]:
+        return {"name": self.name}
+
 
-    # Encode label & train model (prototype)
+class ForestCostModel(CostModel):
+    """RandomForest sklearn apa adanya; interval = min/max prediksi antar-pohon."""
+    name = "rf"
+
+    def __init__(self, n_estimators: int = 250):
+        self.rf = RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=-1)
+
+    def fit(self, X, y) -> "ForestCostModel":
+        self.rf.fit(np.asarray(X, dtype=float), np.asarray(y, dtype=float))
+        return self
+
+    def predict_interval(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        per_tree = np.stack([est.predict(X) for est in self.rf.estimators_], axis=1)
+        return per_tree.mean(axis=1), per_tree.min(axis=1), per_tree.max(axis=1)
+
+    def info(self) -> Dict[str, object]:
+        return {"name": self.name, "trees": len(self.rf.estimators_)}
+
+
+class FlatForestCostModel(CostModel):
+    """Hutan kecil (pohon dangkal) yang setelah fit diratakan ke array kontigu
+    feature/threshold/left/right/value untuk semua pohon; objek sklearn dibuang.
+
+    Daun menunjuk ke dirinya sendiri, jadi evaluasi = `depth` langkah indexing vektor
+    untuk semua (baris, pohon) sekaligus tanpa percabangan Python.
+    """
+    name = "compact"
+
+    def __init__(self, n_estimators: int = 32, max_depth: int = 6):
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+
+    def fit(self, X, y) -> "FlatForestCostModel":
+        rf = RandomForestRegressor(
+            n_estimators=self.n_estimators, max_depth=self.max_depth, random_state=42, n_jobs=1
+        )
+        rf.fit(np.asarray(X, dtype=float), np.asarray(y, dtype=float))
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        for est in rf.estimators_:
+            t = est.tree_
+            ids = np.arange(t.node_count)
+            leaf = t.children_left < 0
+            feature.append(np.where(leaf, 0, t.feature))
+            threshold.append(np.where(leaf, np.inf, t.threshold))
+            left.append(np.where(leaf, ids, t.children_left) + offset)
+            right.append(np.where(leaf, ids, t.children_right) + offset)
+            value.append(t.value[:, 0, 0])
+            roots.append(offset)
+            offset += t.node_count
+        self.feature = np.concatenate(feature).astype(np.int32)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.int32)
+        self.right = np.concatenate(right).astype(np.int32)
+        self.value = np.concatenate(value)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = max(est.tree_.max_depth for est in rf.estimators_)
+        return self
+
+    def predict_interval(self, X):
+        # sklearn membandingkan fitur float32 dengan threshold float64; samakan agar hasil identik
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        v = self.value[node]
+        return v.mean(axis=1), v.min(axis=1), v.max(axis=1)
+
+    def info(self) -> Dict[str, object]:
+        nbytes = sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value, self.roots))
+        return {"name": self.name, "trees": len(self.roots), "nodes": len(self.value), "depth": self.depth, "bytes": nbytes}
+
+
+def make_cost_model() -> CostModel:
+    if COST_MODEL == "rf":
+        return ForestCostModel()
+    if COST_MODEL == "compact":
+        return FlatForestCostModel(COST_MODEL_TREES, COST_MODEL_MAX_DEPTH)
+    raise RuntimeError(f"COST_MODEL tidak dikenal: {COST_MODEL!r} (pilih 'compact' atau 'rf')")
+
+
+def train_model(df: pd.DataFrame):
+    """Encode label & train model biaya (prototype). Target = mean(Min, Max).
+
+    Fitur prediksi sepenuhnya berasal dari baris Excel destinasi, jadi prediksi + interval
+    tiap destinasi dihitung sekali di sini; request cukup lookup COST_TABLE.
+    """
     df_enc = df.copy()
-    label_encoders = {}
     for col in ["Kategori", "Destinasi", "Aktivitas Utama"]:
-        le = LabelEncoder()
-        df_enc[col] = le.fit_transform(df_enc[col].astype(str))
-        label_encoders[col] = le
+        df_enc[col] = LabelEncoder().fit_transform(df_enc[col].astype(str))
 
     X = df_enc[[
         "Kategori", "Destinasi", "Aktivitas Utama",
         "Estimasi Biaya Min (Rp)", "Estimasi Biaya Max (Rp)"
-    ]]
-    y = (df_enc["Estimasi Biaya Min (Rp)"] + df_enc["Estimasi Biaya Max (Rp)"]) / 2.0
+    ]].to_numpy(float)
+    y = ((df_enc["Estimasi Biaya Min (Rp)"] + df_enc["Estimasi Biaya Max (Rp)"]) / 2.0).to_numpy(float)
+
+    model = make_cost_model().fit(X, y)
+    mean, lo, hi = model.predict_interval(X)
+    cost_table: Dict[str, Tuple[float, float, float]] = {}
+    for name, m, a, b in zip(df["Destinasi"].astype(str), mean, lo, hi):
+        cost_table.setdefault(name, (float(m), float(a), float(b)))   # baris pertama menang, seperti iloc[0]
+    return model, cost_table
 
-    model = RandomForestRegressor(n_estimators=250, random_state=42, n_jobs=-1)
-    model.fit(X, y)
 
-    # ---- Load GeoJSON (wisata_diy.geojson) & siapkan CRS
+def load_poi() -> gpd.GeoDataFrame:
+    """Load GeoJSON (wisata_diy.geojson), siapkan CRS & precompute titik."""
     gdf = gpd.read_file(GEOJSON_PATH)
     try:
         if gdf.crs is None:
@@ -179,12 +658,93 @@ def on_startup():
     gdf_poi["centroid_lon"] = gdf_poi["centroid_point"].x
     gdf_poi["repr_lat"] = gdf_poi["repr_point"].y
     gdf_poi["repr_lon"] = gdf_poi["repr_point"].x
+    return gdf_poi
+
+
+async def _run_stage(pool: ThreadPoolExecutor, stage: str, fn, *args):
+    """Jalankan satu tahap startup di thread pool; progres & durasi terlihat di /readyz dan /metrics."""
+    STARTUP_PROGRESS[stage] = {"status": "running"}
+    t0 = time.perf_counter()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BaseException:
+        STARTUP_PROGRESS[stage] = {"status": "failed", "seconds": round(time.perf_counter() - t0, 3)}
+        raise
+    dt = time.perf_counter() - t0
+    STARTUP_PROGRESS[stage] = {"status": "done", "seconds": round(dt, 3)}
+    METRICS.set("berapaya_startup_stage_seconds", {"stage": stage}, dt)
+    return result
+
+
+async def load_all_async():
+    """Excel->training dan GeoJSON berjalan paralel; tiap bagian langsung tersedia begitu selesai
+    (mis. endpoint geo bisa melayani sebelum model selesai training)."""
+    global DF, GDF_POI, MODEL, COST_TABLE, READY
+
+    t_total = time.perf_counter()
+    STARTUP_PROGRESS.update({stage: {"status": "pending"} for stage in STARTUP_STAGES})
+    pool = ThreadPoolExecutor(max_workers=STARTUP_WORKERS, thread_name_prefix="warmup")
+    try:
+        await _run_stage(pool, "import_heavy", _import_heavy)
+
+        async def excel_and_model():
+            global DF, MODEL, COST_TABLE
+            DF = await _run_stage(pool, "read_excel", read_excel)
+            READY_PARTS.add("excel")
+            MODEL, COST_TABLE = await _run_stage(pool, "train_model", train_model, DF)
+            READY_PARTS.add("model")
+
+        async def geo():
+            global GDF_POI
+            GDF_POI = await _run_stage(pool, "load_geojson", load_poi)
+            await _run_stage(pool, "poi_cells", build_poi_cells)
+            READY_PARTS.add("geo")
+
+        await asyncio.gather(excel_and_model(), geo())
+        # tabel kandidat itinerary butuh Excel, model & GeoJSON; dibangun di sini agar request pertama tidak membayarnya
+        await _run_stage(pool, "itinerary_candidates", build_itinerary_candidates)
+        READY_PARTS.add("itinerary")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    METRICS.set("berapaya_startup_stage_seconds", {"stage": "total"}, time.perf_counter() - t_total)
+    READY = True
+
+
+def load_all():
+    """Versi sinkron (mis. untuk preload di luar event loop)."""
+    asyncio.run(load_all_async())
+
+
+async def _warmup_async() -> None:
+    global WARMUP_ERROR
+    try:
+        await load_all_async()
+    except Exception as e:
+        WARMUP_ERROR = f"{type(e).__name__}: {e}"
+        logging.getLogger("uvicorn.error").exception("Warm-up gagal")
+
+
+def _require_ready(*parts: str) -> None:
+    """503 jika bagian yang dibutuhkan (excel/model/geo) belum dimuat; tanpa argumen = semua."""
+    needed = set(parts) or set(ALL_PARTS)
+    if not needed <= READY_PARTS:
+        detail = {
+            "status": "failed" if WARMUP_ERROR else "starting",
+            "error": WARMUP_ERROR,
+            "ready_parts": sorted(READY_PARTS),
+            "progress": STARTUP_PROGRESS,
+        }
+        raise HTTPException(status_code=503, detail=detail)
+
+
+# =========================
+# Single-flight (lihat wisata_common.singleflight)
+# =========================
+def _json_body(obj) -> bytes:
+    return json.dumps(jsonable_encoder(obj), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
 
-    # Simpan ke global
-    DF = df
-    GDF_POI = gdf_poi
-    MODEL = model
-    LABEL_ENCODERS = label_encoders
+PREDICT_FLIGHTS = SingleFlight("predict_nearby", METRICS, "berapaya_singleflight_total")
 
 
 # =========================
@@ -192,12 +752,62 @@ def on_startup():
 # =========================
 @app.get("/health")
 def health(api_key: APIKey = Depends(get_api_key)):
+    """Liveness: proses hidup (tidak menunggu warm-up)."""
+    if WARMUP_ERROR:
+        raise HTTPException(status_code=503, detail=WARMUP_ERROR)
     return {"status": "ok"}
 
 
+@app.get("/readyz")
+def readyz(
+    part: Optional[Literal["excel", "model", "geo", "itinerary"]] = Query(None, description="Cek kesiapan satu bagian saja"),
+    api_key: APIKey = Depends(get_api_key),
+):
+    """Readiness: semua bagian (atau satu bagian) sudah dimuat; 503 berisi progres per tahap."""
+    if part:
+        _require_ready(part)
+    else:
+        _require_ready()
+    return {"status": "ok", "ready_parts": sorted(READY_PARTS), "progress": STARTUP_PROGRESS}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(api_key: APIKey = Depends(get_api_key)):
+    """Metrics format Prometheus (request per route, latensi, durasi tahap predict_nearby & startup)."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+def _require_admin(request: Request) -> None:
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling tidak aktif")
+    # Profil memuat query string (koordinat pengguna): tanpa token, endpoint admin selalu ditolak
+    # walau profiling aktif lewat PROFILE_SAMPLE_RATE.
+    if not PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoint admin butuh PROFILE_ADMIN_TOKEN")
+    if request.headers.get("x-admin-token") != PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token tidak valid")
+
+
+@app.get("/admin/profiles")
+def list_profiles(request: Request, api_key: APIKey = Depends(get_api_key)):
+    """Daftar profil terakhir di ring buffer (tanpa isi stack)."""
+    _require_admin(request)
+    return [{k: v for k, v in p.items() if k != "folded"} for p in reversed(PROFILES)]
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+def download_profile(profile_id: str, request: Request, api_key: APIKey = Depends(get_api_key)):
+    """Unduh satu profil sebagai folded stacks (flamegraph.pl / speedscope)."""
+    _require_admin(request)
+    for p in PROFILES:
+        if p["id"] == profile_id:
+            return PlainTextResponse(p["folded"], headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'})
+    raise HTTPException(status_code=404, detail="Profil tidak ditemukan")
+
+
 @app.get("/metadata")
 def metadata(api_key: APIKey = Depends(get_api_key)):
-    assert DF is not None
+    _require_ready("excel")
     return {
         "destinasi_list": sorted(list(map(str, DF["Destinasi"].unique()))),
         "kategori_list": sorted(list(map(str, DF["Kategori"].unique()))),
@@ -209,75 +819,74 @@ def metadata(api_key: APIKey = Depends(get_api_key)):
             "lon": 110.3695,
             "radius_km": 10,
             "geom_method": "Representative Point"
-        }
+        },
+        "cost_model": MODEL.info() if MODEL is not None else None,
+        "startup": {"live_after_ms": LIVE_AFTER_MS, "import_ms": dict(IMPORT_TIMINGS_MS)},
     }
 
 
 @app.post("/predict-nearby", response_model=PredictResponse)
-def predict_nearby(req: PredictRequest, api_key: APIKey = Depends(get_api_key)):
-    if DF is None or GDF_POI is None or MODEL is None or LABEL_ENCODERS is None:
-        raise HTTPException(status_code=503, detail="Model/data belum siap")
-
-    # Validasi destinasi ada di data
-    df_match = DF[DF["Destinasi"].astype(str) == req.destinasi]
-    if df_match.empty:
-        raise HTTPException(status_code=400, detail=f"Destinasi '{req.destinasi}' tidak ditemukan di Excel")
+def predict_nearby(req: PredictRequest, response: Response, api_key: APIKey = Depends(get_api_key)):
+    _require_ready("model", "geo")
+    # request identik yang datang bersamaan berbagi satu perhitungan & body JSON-nya;
+    # identitas data ikut di key agar hasil sebelum/sesudah reload tidak tercampur
+    key = (id(GDF_POI), id(COST_TABLE), req.destinasi, req.budget, float(req.lat), float(req.lon),
+           float(req.radius_km), req.geom_method)
+    body = PREDICT_FLIGHTS.do(key, lambda: _json_body(_predict_nearby_impl(req)))
+    # Response mentah tidak mewarisi header yang di-set dependency (X-RateLimit-*) pada `response`, salin manual
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
 
-    row_sel = df_match.iloc[0]
 
-    # Siapkan fitur prediksi
-    X_pred = pd.DataFrame([{
-        "Kategori": LABEL_ENCODERS["Kategori"].transform([row_sel["Kategori"]])[0],
-        "Destinasi": LABEL_ENCODERS["Destinasi"].transform([row_sel["Destinasi"]])[0],
-        "Aktivitas Utama": LABEL_ENCODERS["Aktivitas Utama"].transform([row_sel["Aktivitas Utama"]])[0],
-        "Estimasi Biaya Min (Rp)": float(row_sel["Estimasi Biaya Min (Rp)"]),
-        "Estimasi Biaya Max (Rp)": float(row_sel["Estimasi Biaya Max (Rp)"])
-    }])
-
-    predicted_cost = float(MODEL.predict(X_pred)[0])
+def _predict_nearby_impl(req: PredictRequest) -> PredictResponse:
+    # Prediksi per destinasi sudah dihitung saat training (lookup, bukan inferensi per request)
+    with _stage("predict_nearby", "predict"):
+        cost = COST_TABLE.get(req.destinasi)
+    if cost is None:
+        raise HTTPException(status_code=400, detail=f"Destinasi '{req.destinasi}' tidak ditemukan di Excel")
+    predicted_cost, cost_min, cost_max = cost
     budget_ok = bool(req.budget >= predicted_cost)
 
-    # Pilih titik geometri
-    if req.geom_method == "Centroid":
-        lat_col, lon_col = "centroid_lat", "centroid_lon"
-    else:
-        lat_col, lon_col = "repr_lat", "repr_lon"
-
-    # Hitung jarak
-    gdf_tmp = GDF_POI[["NAMOBJ", lat_col, lon_col]].copy()
-    gdf_tmp.rename(columns={lat_col: "lat", lon_col: "lon"}, inplace=True)
-
-    # Compute distances
-    gdf_tmp["distance_km"] = gdf_tmp.apply(
-        lambda r: compute_distance_km((req.lat, req.lon), (r["lat"], r["lon"])), axis=1
-    )
-
-    # Filter radius
-    nearby = gdf_tmp[gdf_tmp["distance_km"] <= req.radius_km].sort_values("distance_km")
-    note = None
-    if nearby.empty:
-        note = f"Tidak ada tempat wisata dalam radius {req.radius_km} km. Mengembalikan yang terdekat secara global."
-        nearby = gdf_tmp.sort_values("distance_km").head(30)
+    # Ring sel geohash sampai radius tercakup -> jarak geodesik vektor hanya untuk kandidat -> satu seleksi top-k
+    with _stage("predict_nearby", "distance"):
+        names, lats, lons = _poi_arrays(req.geom_method)
+        cells = _poi_cells(req.geom_method)
+        cand, dist = geocell.ring_nearest(cells, lats, lons, req.lat, req.lon, math.inf, req.radius_km)
+        inside = dist <= req.radius_km
 
-    # Tempat terdekat (global atau dalam radius)
-    nearest_row = nearby.iloc[0]
+    with _stage("predict_nearby", "sort_select"):
+        note = None
+        if inside.any():
+            idx, d = cand[inside], dist[inside]
+            k = len(idx)
+        else:
+            note = f"Tidak ada tempat wisata dalam radius {req.radius_km} km. Mengembalikan yang terdekat secara global."
+            # tanpa batas radius: ring diperlebar sampai NEARBY_FALLBACK_K terdekat pasti tercakup
+            idx, d = geocell.ring_nearest(cells, lats, lons, req.lat, req.lon, NEARBY_FALLBACK_K)
+            k = NEARBY_FALLBACK_K
+        order = top_k(d, k)
+        idx, d = idx[order], d[order]
+    if len(idx) == 0:
+        raise HTTPException(status_code=404, detail="Tidak ada titik tempat wisata yang valid di GeoJSON")
 
-    def map_place_row(r: pd.Series) -> PlaceOut:
-        url = f"https://www.google.com/maps/dir/{req.lat},{req.lon}/{float(r['lat'])},{float(r['lon'])}"
+    def map_place(i: int, dist_km: float) -> PlaceOut:
+        plat, plon = float(lats[i]), float(lons[i])
         return PlaceOut(
-            name=str(r["NAMOBJ"]),
-            lat=float(r["lat"]),
-            lon=float(r["lon"]),
-            distance_km=float(round(r["distance_km"], 4)),
-            google_maps_directions=url,
+            name=str(names[i]),
+            lat=plat,
+            lon=plon,
+            distance_km=round(float(dist_km), 4),
+            google_maps_directions=f"https://www.google.com/maps/dir/{req.lat},{req.lon}/{plat},{plon}",
         )
 
-    places_out = [map_place_row(r) for _, r in nearby.iterrows()]
-    nearest_out = map_place_row(nearest_row)
+    with _stage("predict_nearby", "serialize"):
+        places_out = [map_place(i, di) for i, di in zip(idx.tolist(), d.tolist())]
+        nearest_out = places_out[0]
 
     return PredictResponse(
         destinasi=req.destinasi,
         predicted_cost=round(predicted_cost, 2),
+        predicted_cost_min=round(cost_min, 2),
+        predicted_cost_max=round(cost_max, 2),
         budget=req.budget,
         budget_ok=budget_ok,
         radius_km=req.radius_km,
@@ -288,13 +897,219 @@ def predict_nearby(req: PredictRequest, api_key: APIKey = Depends(get_api_key)):
     )
 
 
+POI_ARRAYS: Dict[tuple, tuple] = {}
+
+
+def _poi_arrays(geom_method: str) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """(nama, lat, lon) GDF_POI sebagai array numpy, sekali per GeoJSON & metode titik."""
+    key = (id(GDF_POI), geom_method)
+    cached = POI_ARRAYS.get(key)
+    if cached is None:
+        lat_col, lon_col = ("centroid_lat", "centroid_lon") if geom_method == "Centroid" else ("repr_lat", "repr_lon")
+        cached = (
+            GDF_POI["NAMOBJ"].astype(str).to_numpy(),
+            GDF_POI[lat_col].to_numpy(float),
+            GDF_POI[lon_col].to_numpy(float),
+        )
+        POI_ARRAYS[key] = cached
+    return cached
+
+
+POI_CELLS: Dict[tuple, Dict[str, object]] = {}
+
+
+def _poi_cells(geom_method: str) -> Dict[str, object]:
+    """Index sel geohash titik GDF_POI (geocell.build_cell_index), sekali per GeoJSON & metode titik."""
+    key = (id(GDF_POI), geom_method)
+    cached = POI_CELLS.get(key)
+    if cached is None:
+        _, lats, lons = _poi_arrays(geom_method)
+        cached = POI_CELLS[key] = geocell.build_cell_index(lats, lons, CELL_PRECISION)
+    return cached
+
+
+def build_poi_cells() -> None:
+    for geom_method in ("Representative Point", "Centroid"):
+        _poi_cells(geom_method)
+
+
+# =========================
+# Itinerary (orienteering di bawah budget & batas waktu)
+# =========================
+ITINERARY_CANDIDATES: Dict[tuple, tuple] = {}
+
+
+def _itinerary_candidates(geom_method: str) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """Tabel kandidat (nama, kategori, lat, lon, cost, rating, visit_h) gabungan GeoJSON + Excel,
+    beserta index sel geohash-nya (geocell.build_cell_index) untuk prefilter jangkauan.
+
+    Biaya = prediksi model untuk destinasi yang ada di Excel, selain itu tiket masuk + median parkir.
+    Dibangun sekali per kombinasi data/model/metode titik.
+    """
+    key = (id(DF), id(GDF_POI), id(MODEL), geom_method)
+    cached = ITINERARY_CANDIDATES.get(key)
+    if cached is not None:
+        return cached
+
+    lat_col, lon_col = ("centroid_lat", "centroid_lon") if geom_method == "Centroid" else ("repr_lat", "repr_lon")
+    poi = GDF_POI
+    cands = pd.DataFrame({
+        "name": poi["NAMOBJ"].astype(str).to_numpy(),
+        "kategori": poi["KATEGORI"].astype(str).to_numpy() if "KATEGORI" in poi.columns else None,
+        "lat": poi[lat_col].to_numpy(float),
+        "lon": poi[lon_col].to_numpy(float),
+        "ticket": pd.to_numeric(poi["TIKET_MASUK_RP"], errors="coerce").to_numpy() if "TIKET_MASUK_RP" in poi.columns else np.nan,
+        "rating": pd.to_numeric(poi["RATING"], errors="coerce").to_numpy() if "RATING" in poi.columns else np.nan,
+    })
+
+    df = DF.drop_duplicates("Destinasi")
+    extra = df[~df["Destinasi"].astype(str).isin(set(cands["name"]))]
+    if {"Longitude", "Latitude"} <= set(extra.columns) and not extra.empty:
+        cands = pd.concat([cands, pd.DataFrame({
+            "name": extra["Destinasi"].astype(str).to_numpy(),
+            "kategori": extra["Kategori"].astype(str).to_numpy(),
+            "lat": pd.to_numeric(extra["Latitude"], errors="coerce").to_numpy(),
+            "lon": pd.to_numeric(extra["Longitude"], errors="coerce").to_numpy(),
+            "ticket": pd.to_numeric(extra["Tiket Masuk (Rp)"], errors="coerce").to_numpy() if "Tiket Masuk (Rp)" in extra.columns else np.nan,
+            "rating": np.nan,
+        })], ignore_index=True)
+
+    by_name = df.set_index(df["Destinasi"].astype(str))
+    predicted = pd.Series({name: c[0] for name, c in COST_TABLE.items()}, dtype=float)
+    parking = float(pd.to_numeric(df["Parkir (Rp)"], errors="coerce").median()) if "Parkir (Rp)" in df.columns else 0.0
+    fallback_cost = cands["ticket"].fillna(0.0) + (parking if parking == parking else 0.0)
+    cands["cost"] = cands["name"].map(predicted).fillna(fallback_cost).astype(float)
+    if "Rating" in by_name.columns:
+        cands["rating"] = cands["rating"].fillna(cands["name"].map(pd.to_numeric(by_name["Rating"], errors="coerce")))
+    cands["rating"] = cands["rating"].fillna(ITINERARY_DEFAULT_RATING).astype(float)
+    dur_col = "Rata-rata Durasi Kunjungan (jam)"
+    visit = cands["name"].map(pd.to_numeric(by_name[dur_col], errors="coerce")) if dur_col in by_name.columns else np.nan
+    cands["visit_h"] = pd.Series(visit, index=cands.index).fillna(ITINERARY_DEFAULT_VISIT_H).astype(float)
+    cands = cands.dropna(subset=["lat", "lon"]).reset_index(drop=True)
+    cells = geocell.build_cell_index(cands["lat"].to_numpy(float), cands["lon"].to_numpy(float), CELL_PRECISION)
+
+    if len(ITINERARY_CANDIDATES) > 8:
+        ITINERARY_CANDIDATES.clear()
+    ITINERARY_CANDIDATES[key] = (cands, cells)
+    return cands, cells
+
+
+def build_itinerary_candidates() -> None:
+    for geom_method in ("Representative Point", "Centroid"):
+        _itinerary_candidates(geom_method)
+
+
+@app.post("/itinerary", response_model=ItineraryResponse)
+def itinerary(req: ItineraryRequest, api_key: APIKey = Depends(get_api_key)):
+    """Pilih & urutkan destinasi dengan nilai (rating) maksimal dalam budget & batas waktu."""
+    _require_ready("itinerary")
+    t0 = time.perf_counter()
+    deadline = t0 + req.deadline_ms / 1000.0
+
+    with _stage("itinerary", "candidates"):
+        cands, cells = _itinerary_candidates(req.geom_method)
+        # Hanya destinasi yang bisa didatangi (dan kembali, bila return_to_start) dalam batas waktu:
+        # jarak garis lurus * faktor detour tidak boleh melebihi jangkauan. Ring sel = tanpa scan penuh.
+        reach_km = req.time_limit_hours * req.speed_kmh / ((2.0 if req.return_to_start else 1.0) * ITINERARY_DETOUR_FACTOR)
+        idx, dist = geocell.ring_nearest(cells, cands["lat"].to_numpy(float), cands["lon"].to_numpy(float),
+                                 req.lat, req.lon, math.inf, reach_km)
+        ok = dist <= reach_km * 1.01   # sedikit kelonggaran: geodesik vs haversine matriks
+        idx, dist = idx[ok], dist[ok]
+        ok = cands["cost"].to_numpy(float)[idx] <= req.budget   # biaya satu destinasi saja sudah lewat budget
+        idx, dist = idx[ok], dist[ok]
+        if req.kategori:
+            pattern = "|".join(map(re.escape, req.kategori))
+            ok = cands["kategori"].iloc[idx].astype(str).str.contains(pattern, case=False, na=False).to_numpy()
+            idx, dist = idx[ok], dist[ok]
+        if len(idx) > ITINERARY_MAX_CANDIDATES:
+            # matriks (n+1)^2 dibatasi: simpan kandidat dengan nilai per jarak terbaik
+            score = cands["rating"].to_numpy(float)[idx] / np.maximum(dist, 0.5)
+            idx = idx[np.argpartition(-score, ITINERARY_MAX_CANDIDATES - 1)[:ITINERARY_MAX_CANDIDATES]]
+        cands = cands.iloc[np.sort(idx)]
+    if cands.empty:
+        raise HTTPException(status_code=404, detail="Tidak ada kandidat destinasi untuk kriteria ini.")
+
+    with _stage("itinerary", "matrix"):
+        lat = np.concatenate([[req.lat], cands["lat"].to_numpy()])
+        lon = np.concatenate([[req.lon], cands["lon"].to_numpy()])
+        road_km = haversine_matrix_km(lat, lon) * ITINERARY_DETOUR_FACTOR  # perkiraan jarak jalan
+        hours = road_km / req.speed_kmh
+        visit_h = np.concatenate([[0.0], cands["visit_h"].to_numpy()])
+        cost = np.concatenate([[0.0], cands["cost"].to_numpy()])
+        value = np.concatenate([[0.0], cands["rating"].to_numpy()])
+
+    with _stage("itinerary", "solve"):
+        order, deadline_hit = plan_itinerary(hours, visit_h, cost, value, float(req.budget), req.time_limit_hours,
+                                             req.return_to_start, req.max_stops, deadline)
+
+    with _stage("itinerary", "serialize"):
+        stops: List[ItineraryStop] = []
+        prev, clock, travel_km, travel_h = 0, 0.0, 0.0, 0.0
+        for i, node in enumerate(order, start=1):
+            row = cands.iloc[node - 1]
+            clock += hours[prev, node]
+            travel_km += road_km[prev, node]
+            travel_h += hours[prev, node]
+            stops.append(ItineraryStop(
+                order=i,
+                name=str(row["name"]),
+                kategori=None if pd.isna(row["kategori"]) else str(row["kategori"]),
+                lat=float(row["lat"]),
+                lon=float(row["lon"]),
+                cost=round(float(row["cost"]), 2),
+                rating=float(row["rating"]),
+                visit_hours=float(row["visit_h"]),
+                travel_km_from_prev=round(float(road_km[prev, node]), 3),
+                arrive_after_hours=round(float(clock), 3),
+            ))
+            clock += visit_h[node]
+            prev = node
+        return_km = None
+        if req.return_to_start and order:
+            return_km = round(float(road_km[prev, 0]), 3)
+            travel_km += road_km[prev, 0]
+            travel_h += hours[prev, 0]
+        visit_total = float(sum(st.visit_hours for st in stops))
+        points = [(req.lat, req.lon)] + [(st.lat, st.lon) for st in stops] + ([(req.lat, req.lon)] if return_km is not None else [])
+        gmaps = "https://www.google.com/maps/dir/" + "/".join(f"{a},{b}" for a, b in points) if stops else None
+
+    return ItineraryResponse(
+        stops=stops,
+        total_cost=round(float(sum(st.cost for st in stops)), 2),
+        total_value=round(float(sum(st.rating for st in stops)), 3),
+        total_travel_km=round(float(travel_km), 3),
+        total_travel_hours=round(float(travel_h), 3),
+        total_visit_hours=round(visit_total, 3),
+        total_hours=round(float(travel_h) + visit_total, 3),
+        return_leg_km=return_km,
+        budget=req.budget,
+        time_limit_hours=req.time_limit_hours,
+        candidates=int(len(cands)),
+        solve_ms=round((time.perf_counter() - t0) * 1000.0, 3),
+        deadline_hit=deadline_hit,
+        google_maps_directions=gmaps,
+    )
+
+
+IMPORT_TIMINGS_MS["app"] = round((time.perf_counter() - _MODULE_T0) * 1000.0, 3)
+
+# Preload (gunicorn.conf.py): Excel, model & GeoJSON dimuat sekali di master sebelum fork; lifespan
+# worker melihat READY dan tidak warm-up ulang. Array titik & index sel ikut dibangun (tahap poi_cells)
+# supaya dibagi antar worker, lalu gc.freeze() agar GC di worker tidak menyentuh (dan menyalin) halaman
+# objek hasil load.
+if os.getenv("PRELOAD_DATA") == "1" and not READY:
+    load_all()
+    gc.freeze()
+
+
 # =========================
 # Cara Menjalankan:
 # =========================
 # 1) Install dependensi:
-#    pip install fastapi uvicorn pandas geopandas geopy scikit-learn shapely pyproj fiona openpyxl
+#    pip install fastapi uvicorn pandas geopandas scikit-learn shapely pyproj fiona openpyxl
 # 2) Jalankan server:
-#    uvicorn app:app --reload --port 8000
+#    uvicorn app:app --reload --port 8000          (development)
+#    gunicorn -c gunicorn.conf.py app:app          (produksi: multi-worker + preload, lihat gunicorn.conf.py)
 # 3) Setiap request HARUS sertakan header:
 #    X-API-Key: berapaya
 # 4) Buka dokumentasi interaktif di:
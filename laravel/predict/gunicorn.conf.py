@@ -0,0 +1,22 @@
+"""Profil produksi: gunicorn sebagai manajer proses + UvicornWorker.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Setelan (worker = jumlah CPU, preload_app, timeout, ...) ada di wisata_common/gunicorn_base.py.
+Dengan preload, Excel, model biaya & GeoJSON dimuat SEKALI di master sebelum fork lalu dibagi ke worker (copy-on-write).
+
+Rate limit: tanpa RATE_LIMIT_REDIS_URL bucket token ada di memori tiap worker, jadi N worker berarti
+kuota efektif N x. Jumlah worker diteruskan ke app lewat WEB_CONCURRENCY; app membagi RATE_LIMIT_RPS,
+RATE_LIMIT_BURST (dan override RATE_LIMIT_KEYS) dengan angka itu dan menulis peringatan saat start.
+Pembagian ini hanya perkiraan karena request tidak tersebar rata antar worker. Untuk kuota yang
+presisi, set RATE_LIMIT_REDIS_URL.
+"""
+import os
+import sys
+
+# Paket bersama wisata_common/ ada di root repo (image Docker menaruhnya di PYTHONPATH)
+_REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if os.path.isdir(os.path.join(_REPO_DIR, "wisata_common")) and _REPO_DIR not in sys.path:
+    sys.path.append(_REPO_DIR)
+
+from wisata_common.gunicorn_base import *  # noqa: E402,F401,F403  bind, workers, worker_class, preload_app, ...
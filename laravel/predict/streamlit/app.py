@@ -1,8 +1,15 @@
+import abc
+import os
+import hashlib
+import logging
+import threading
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 import folium
-from streamlit_folium import st_folium
+from streamlit_folium import st_folium, generate_leaflet_string
 from geopy.distance import geodesic
 from sklearn.preprocessing import LabelEncoder
 from sklearn.ensemble import RandomForestRegressor
@@ -25,14 +32,77 @@ st.set_page_config(page_title="Prediksi Estimasi Biaya Rumah Sakit", layout="wid
 # =========================
 EXCEL_PATH = "Estimasi Biaya.xlsx"
 GEOJSON_PATH = "rumah_sakit.geojson"
+EXCEL_CACHE_DIR = os.getenv("EXCEL_CACHE_DIR", ".cache/excel")
+EXCEL_TEXT_COLS = ["Kategori", "Penyakit", "Tindakan Medis Utama"]
+EXCEL_NUMERIC_COLS = ["Estimasi Min (Rp)", "Estimasi Max (Rp)"]
+# "compact" = hutan kecil diratakan ke array numpy, "rf" = RandomForest 250 pohon
+COST_MODEL = os.getenv("COST_MODEL", "compact")
 
 # =========================
 # Helper & Cache
 # =========================
+def _file_digest(path: str) -> str:
+    """sha256 isi file (16 hex pertama); dipakai sebagai kunci cache."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+@st.cache_data(ttl=5, show_spinner=False)
+def excel_version(path: str) -> str:
+    # dicek ulang paling sering tiap 5 detik; Excel diganti => versi baru => load_excel cache-miss
+    return _file_digest(path)
+
+def _excel_cache_load(stem: str):
+    for ext, reader in ((".parquet", pd.read_parquet), (".pkl", pd.read_pickle)):
+        if os.path.exists(stem + ext):
+            try:
+                return reader(stem + ext)
+            except Exception:
+                logging.warning("Cache Excel %s rusak, konversi ulang", stem + ext)
+    return None
+
+def _excel_cache_store(path: str, version: str, df: pd.DataFrame) -> None:
+    """Parquet (pickle jika pyarrow tidak ada), tulis atomik & buang versi lama. Gagal tulis tidak fatal."""
+    prefix = f"{os.path.basename(path)}."
+    stem = os.path.join(EXCEL_CACHE_DIR, prefix + version)
+    tmp = f"{stem}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+        try:
+            df.to_parquet(tmp, index=False)
+            final = stem + ".parquet"
+        except Exception:
+            df.to_pickle(tmp)
+            final = stem + ".pkl"
+        os.replace(tmp, final)
+        for name in os.listdir(EXCEL_CACHE_DIR):
+            if name.startswith(prefix) and not name.startswith(prefix + version):
+                os.remove(os.path.join(EXCEL_CACHE_DIR, name))
+    except OSError as e:
+        logging.warning("Cache Excel tidak bisa ditulis: %s", e)
+
 @st.cache_data(show_spinner=False)
-def load_excel(path: str) -> pd.DataFrame:
+def load_excel(path: str, version: str) -> pd.DataFrame:
+    """Excel -> DataFrame bertipe lewat cache kolumnar berkunci hash file.
+    Validasi kolom & konversi tipe hanya saat cache dibuat (ValueError jika kolom kurang)."""
+    stem = os.path.join(EXCEL_CACHE_DIR, f"{os.path.basename(path)}.{version}")
+    cached = _excel_cache_load(stem)
+    if cached is not None:
+        return cached
+
     df = pd.read_excel(path)
     df.columns = df.columns.str.strip()
+    missing = [c for c in EXCEL_TEXT_COLS + EXCEL_NUMERIC_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Kolom tidak lengkap di Excel: {missing}\nKolom tersedia: {list(df.columns)}")
+    for col in EXCEL_TEXT_COLS:
+        df[col] = df[col].astype(str)
+    for col in EXCEL_NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    _excel_cache_store(path, version, df)
     return df
 
 @st.cache_data(show_spinner=False)
@@ -49,22 +119,100 @@ def load_geojson(path: str) -> gpd.GeoDataFrame:
         pass
     return gdf
 
+class CostModel(abc.ABC):
+    """Antarmuka model biaya: fit(X, y) lalu predict_interval(X) -> (prediksi, min, max) per baris."""
+    name = "base"
+
+    @abc.abstractmethod
+    def fit(self, X, y) -> "CostModel":
+        ...
+
+    @abc.abstractmethod
+    def predict_interval(self, X):
+        ...
+
+    def predict(self, X):
+        return self.predict_interval(X)[0]
+
+class ForestCostModel(CostModel):
+    """RandomForest sklearn; interval = min/max prediksi antar-pohon."""
+    name = "rf"
+
+    def __init__(self, n_estimators: int = 250):
+        self.rf = RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=-1)
+
+    def fit(self, X, y):
+        self.rf.fit(np.asarray(X, dtype=float), np.asarray(y, dtype=float))
+        return self
+
+    def predict_interval(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        per_tree = np.stack([est.predict(X) for est in self.rf.estimators_], axis=1)
+        return per_tree.mean(axis=1), per_tree.min(axis=1), per_tree.max(axis=1)
+
+class FlatForestCostModel(CostModel):
+    """Hutan kecil yang diratakan ke array feature/threshold/left/right/value (daun menunjuk ke
+    dirinya sendiri); evaluasi = `depth` langkah indexing numpy untuk semua pohon sekaligus."""
+    name = "compact"
+
+    def __init__(self, n_estimators: int = 32, max_depth: int = 6):
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+
+    def fit(self, X, y):
+        rf = RandomForestRegressor(n_estimators=self.n_estimators, max_depth=self.max_depth, random_state=42, n_jobs=1)
+        rf.fit(np.asarray(X, dtype=float), np.asarray(y, dtype=float))
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        for est in rf.estimators_:
+            t = est.tree_
+            ids = np.arange(t.node_count)
+            leaf = t.children_left < 0
+            feature.append(np.where(leaf, 0, t.feature))
+            threshold.append(np.where(leaf, np.inf, t.threshold))
+            left.append(np.where(leaf, ids, t.children_left) + offset)
+            right.append(np.where(leaf, ids, t.children_right) + offset)
+            value.append(t.value[:, 0, 0])
+            roots.append(offset)
+            offset += t.node_count
+        self.feature = np.concatenate(feature).astype(np.int32)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.int32)
+        self.right = np.concatenate(right).astype(np.int32)
+        self.value = np.concatenate(value)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = max(est.tree_.max_depth for est in rf.estimators_)
+        return self
+
+    def predict_interval(self, X):
+        # sklearn membandingkan fitur float32 dengan threshold float64
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        v = self.value[node]
+        return v.mean(axis=1), v.min(axis=1), v.max(axis=1)
+
 @st.cache_resource(show_spinner=False)
-def train_model(data: pd.DataFrame):
-    """Train RandomForest untuk estimasi biaya. Target = mean(Min, Max)."""
+def train_model(data: pd.DataFrame, kind: str = "compact"):
+    """Train model biaya (target = mean(Min, Max)) & hitung (prediksi, min, max) per penyakit sekali;
+    rerun cukup lookup tabel."""
     df_enc = data.copy()
-    label_encoders = {}
     for col in ["Kategori", "Penyakit", "Tindakan Medis Utama"]:
-        le = LabelEncoder()
-        df_enc[col] = le.fit_transform(df_enc[col].astype(str))
-        label_encoders[col] = le
+        df_enc[col] = LabelEncoder().fit_transform(df_enc[col].astype(str))
 
-    X = df_enc[["Kategori", "Penyakit", "Tindakan Medis Utama", "Estimasi Min (Rp)", "Estimasi Max (Rp)"]]
-    y = (df_enc["Estimasi Min (Rp)"] + df_enc["Estimasi Max (Rp)"]) / 2.0
+    X = df_enc[["Kategori", "Penyakit", "Tindakan Medis Utama", "Estimasi Min (Rp)", "Estimasi Max (Rp)"]].to_numpy(float)
+    y = ((df_enc["Estimasi Min (Rp)"] + df_enc["Estimasi Max (Rp)"]) / 2.0).to_numpy(float)
 
-    model = RandomForestRegressor(n_estimators=250, random_state=42, n_jobs=-1)
+    model = ForestCostModel() if kind == "rf" else FlatForestCostModel()
     model.fit(X, y)
-    return model, label_encoders
+    mean, lo, hi = model.predict_interval(X)
+    cost_table = {}
+    for name, m, a, b in zip(data["Penyakit"].astype(str), mean, lo, hi):
+        cost_table.setdefault(name, (float(m), float(a), float(b)))
+    return model, cost_table
 
 def compute_point(geom, method: str):
     """Ambil titik perwakilan untuk geometri (centroid / representative_point)."""
@@ -96,6 +244,26 @@ def filter_only_hospitals(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     # kalau hasil kosong, pakai semua (lebih baik tampil daripada kosong)
     return filtered if not filtered.empty else gdf2
 
+@st.cache_resource(show_spinner=False)
+def base_map(_gdf: gpd.GeoDataFrame, path: str) -> folium.Map:
+    """Peta dasar dibangun sekali per dataset; marker & rute dikirim terpisah via feature_group_to_add."""
+    try:
+        minx, miny, maxx, maxy = _gdf.total_bounds
+        center = [(miny + maxy) / 2, (minx + maxx) / 2]
+    except Exception:
+        center = [-6.2, 106.8]
+    m = folium.Map(location=center, zoom_start=12, control_scale=True)
+    # st_folium memodifikasi struktur Map pada render pertamanya; lakukan sekali di sini
+    # supaya HTML peta dasar identik di setiap rerun (komponen tidak di-remount).
+    m.get_root().render()
+    generate_leaflet_string(m)
+    return m
+
+@st.cache_resource(show_spinner=False)
+def map_render_lock() -> threading.Lock:
+    # objek Map dibagi antar-sesi; render folium tidak thread-safe
+    return threading.Lock()
+
 def add_direction_popup(lat_from, lon_from, lat_to, lon_to, label="Arah (Google Maps)"):
     url = f"https://www.google.com/maps/dir/{lat_from},{lon_from}/{lat_to},{lon_to}"
     return folium.Popup(f'<a href="{url}" target="_blank">{label}</a>', max_width=250)
@@ -104,19 +272,13 @@ def add_direction_popup(lat_from, lon_from, lat_to, lon_to, label="Arah (Google
 # Load Data
 # =========================
 try:
-    df = load_excel(EXCEL_PATH)
+    df = load_excel(EXCEL_PATH, excel_version(EXCEL_PATH))
     gdf = load_geojson(GEOJSON_PATH)
-except FileNotFoundError as e:
+except (FileNotFoundError, ValueError) as e:
+    # ValueError = kolom wajib Excel tidak lengkap (divalidasi di load_excel)
     st.error(f"❌ {e}")
     st.stop()
 
-# Validasi kolom Excel
-required_cols = ["Kategori", "Penyakit", "Tindakan Medis Utama", "Estimasi Min (Rp)", "Estimasi Max (Rp)"]
-missing = [c for c in required_cols if c not in df.columns]
-if missing:
-    st.error(f"❌ Kolom tidak lengkap di Excel: {missing}\nKolom tersedia: {list(df.columns)}")
-    st.stop()
-
 # Validasi kolom untuk nama RS
 if "NAMOBJ" not in gdf.columns:
     st.error(f"❌ GeoJSON tidak punya kolom 'NAMOBJ'. Kolom tersedia: {list(gdf.columns)}")
@@ -129,7 +291,7 @@ if gdf_hosp.empty:
     gdf_hosp = gdf.copy()
 
 # Train model (cache)
-model, label_encoders = train_model(df)
+model, cost_table = train_model(df, COST_MODEL)
 
 # =========================
 # Sidebar - Input
@@ -178,15 +340,7 @@ else:
 # =========================
 # Prediksi Biaya (ML)
 # =========================
-row_sel = df[df["Penyakit"] == penyakit].iloc[0]
-X_pred = pd.DataFrame([{
-    "Kategori": label_encoders["Kategori"].transform([row_sel["Kategori"]])[0],
-    "Penyakit": label_encoders["Penyakit"].transform([row_sel["Penyakit"]])[0],
-    "Tindakan Medis Utama": label_encoders["Tindakan Medis Utama"].transform([row_sel["Tindakan Medis Utama"]])[0],
-    "Estimasi Min (Rp)": row_sel["Estimasi Min (Rp)"],
-    "Estimasi Max (Rp)": row_sel["Estimasi Max (Rp)"]
-}])
-predicted_cost = float(model.predict(X_pred)[0])
+predicted_cost, cost_min, cost_max = cost_table[str(penyakit)]
 
 # =========================
 # Hitung Jarak & Filter Radius
@@ -216,6 +370,7 @@ col1, col2 = st.columns(2)
 with col1:
     st.write(f"🦠 **Penyakit**: {penyakit}")
     st.write(f"💰 **Estimasi Biaya (ML)**: Rp {predicted_cost:,.0f}")
+    st.caption(f"Rentang prediksi antar-pohon: Rp {cost_min:,.0f} – Rp {cost_max:,.0f}")
     st.write(f"💵 **Budget Anda**: Rp {budget:,.0f}")
     if budget >= predicted_cost:
         st.success("✅ Budget mencukupi")
@@ -240,14 +395,15 @@ if not nearby.empty:
 # =========================
 # Peta Interaktif
 # =========================
-m = folium.Map(location=[lat, lon], zoom_start=12, control_scale=True)
+# Hanya lapisan dinamis yang dibangun ulang tiap rerun
+fg = folium.FeatureGroup(name="Rumah Sakit")
 
 # Marker lokasi user
 folium.Marker(
     [lat, lon],
     popup="Lokasi Anda",
     icon=folium.Icon(color="red")
-).add_to(m)
+).add_to(fg)
 
 # Marker semua RS dalam radius (atau semua jika kosong)
 plot_df = nearby if not nearby.empty else gdf_hosp2.sort_values("distance_km").head(30)
@@ -263,16 +419,18 @@ for _, r in plot_df.iterrows():
         [gm_lat, gm_lon],
         popup=popup,
         icon=folium.Icon(color="blue", icon="plus-sign")
-    ).add_to(m)
+    ).add_to(fg)
 
 # Garis rute sederhana ke RS terdekat
 folium.PolyLine(
     [(lat, lon), (float(nearest_row["lat"]), float(nearest_row["lon"]))],
     color="green", weight=4, dash_array="6,6", opacity=0.8
-).add_to(m)
+).add_to(fg)
 
 # Render map
-st_folium(m, width=900, height=560)
+with map_render_lock():
+    st_folium(base_map(gdf_hosp, GEOJSON_PATH), key="peta_rs", center=(lat, lon), zoom=12,
+              feature_group_to_add=fg, width=900, height=560)
 
 # =========================
 # Catatan
@@ -1,7 +1,9 @@
+import threading
+
 import streamlit as st
 import geopandas as gpd
 import folium
-from streamlit_folium import st_folium
+from streamlit_folium import st_folium, generate_leaflet_string
 from streamlit_javascript import st_javascript
 from geopy.distance import geodesic
 from shapely.geometry import Point
@@ -9,14 +11,19 @@ from shapely.geometry import Point
 # Judul aplikasi
 st.title("Peta Data Pariwisata")
 
-# Load data GeoJSON
+# Load data GeoJSON (sekali per proses, dibagi antar-rerun; jangan dimutasi)
 geojson_path = "mapsjatebg.geojson"
-gdf = gpd.read_file(geojson_path)
 
-# Buat geometry dari kolom x dan y jika ada
-if "x" in gdf.columns and "y" in gdf.columns:
-    gdf["geometry"] = gdf.apply(lambda row: Point(row["x"], row["y"]), axis=1)
-    gdf = gpd.GeoDataFrame(gdf, geometry="geometry", crs="EPSG:4326")
+@st.cache_resource(show_spinner=False)
+def load_geojson(path):
+    gdf = gpd.read_file(path)
+    # Buat geometry dari kolom x dan y jika ada
+    if "x" in gdf.columns and "y" in gdf.columns:
+        gdf["geometry"] = gdf.apply(lambda row: Point(row["x"], row["y"]), axis=1)
+        gdf = gpd.GeoDataFrame(gdf, geometry="geometry", crs="EPSG:4326")
+    return gdf
+
+gdf = load_geojson(geojson_path)
 
 # Sidebar untuk filter nama objek
 st.sidebar.header("Filter Data")
@@ -65,15 +72,49 @@ else:
     start_coords = [-7.4, 110.3]
     user_lat, user_lon = start_coords
 
-# Buat peta dasar
-m = folium.Map(location=start_coords, zoom_start=13, tiles="CartoDB positron")
+# Peta dasar + layer GeoJSON dibangun sekali per pilihan filter lalu di-cache;
+# tiap rerun hanya lapisan dinamis (marker & jalur) yang dikirim ke peta.
+@st.cache_resource(show_spinner=False, max_entries=16)
+def base_map(_gdf, selected_name):
+    data = _gdf if selected_name == "Semua" else _gdf[_gdf["nama_objek"] == selected_name]
+    m = folium.Map(location=[-7.4, 110.3], zoom_start=13, tiles="CartoDB positron")
+
+    # Pilih hanya kolom non-geometry untuk tooltip
+    tooltip_fields = [col for col in _gdf.columns if col != "geometry"]
+
+    # Tambahkan layer GeoJSON dengan tooltip
+    folium.GeoJson(
+        data,
+        name="Pariwisata",
+        tooltip=folium.GeoJsonTooltip(
+            fields=tooltip_fields,
+            aliases=tooltip_fields,
+            localize=True
+        )
+    ).add_to(m)
+
+    # Tambahkan kontrol layer
+    folium.LayerControl().add_to(m)
+
+    # st_folium memodifikasi struktur Map pada render pertamanya; lakukan sekali di sini
+    # supaya HTML peta dasar identik di setiap rerun (komponen tidak di-remount).
+    m.get_root().render()
+    generate_leaflet_string(m)
+    return m
+
+@st.cache_resource(show_spinner=False)
+def map_render_lock():
+    # objek Map dibagi antar-sesi; render folium tidak thread-safe
+    return threading.Lock()
+
+fg = folium.FeatureGroup(name="Rekomendasi")
 
 # Tandai lokasi pengguna
 folium.Marker(
     location=[user_lat, user_lon],
     popup="Lokasi Anda",
     icon=folium.Icon(color="red", icon="user")
-).add_to(m)
+).add_to(fg)
 
 # Hitung jarak ke semua objek wisata
 if "x" in gdf_filtered.columns and "y" in gdf_filtered.columns:
@@ -99,7 +140,7 @@ if "x" in gdf_filtered.columns and "y" in gdf_filtered.columns:
             location=[row["y"], row["x"]],
             popup=f"{row['nama_objek']} ({row['distance']:.2f} km)",
             icon=folium.Icon(color="green", icon="star")
-        ).add_to(m)
+        ).add_to(fg)
 
         # Jalur garis lurus dari lokasi user ke objek wisata
         folium.PolyLine(
@@ -108,25 +149,10 @@ if "x" in gdf_filtered.columns and "y" in gdf_filtered.columns:
             weight=2,
             opacity=0.7,
             dash_array="5, 10"
-        ).add_to(m)
-
-# Pilih hanya kolom non-geometry untuk tooltip
-tooltip_fields = [col for col in gdf.columns if col != "geometry"]
-
-# Tambahkan layer GeoJSON dengan tooltip
-folium.GeoJson(
-    gdf_filtered,
-    name="Pariwisata",
-    tooltip=folium.GeoJsonTooltip(
-        fields=tooltip_fields,
-        aliases=tooltip_fields,
-        localize=True
-    )
-).add_to(m)
-
-# Tambahkan kontrol layer
-folium.LayerControl().add_to(m)
+        ).add_to(fg)
 
 # Tampilkan peta di Streamlit
 st.subheader("Peta Interaktif")
-st_folium(m, width=800, height=500)
\ No newline at end of file
+with map_render_lock():
+    st_folium(base_map(gdf, selected_name), key="peta_pariwisata", center=start_coords, zoom=13,
+              feature_group_to_add=fg, width=800, height=500)
\ No newline at end of file
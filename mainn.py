@@ -1,14 +1,18 @@
 import os
-import math
-from typing import Optional, List, Dict, Any
+import hashlib
+import threading
+from typing import Optional, List, Dict, Any, Tuple
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point
-from geopy.distance import geodesic
+from pyproj import Geod
 import folium
-from streamlit_folium import st_folium
+from streamlit_folium import st_folium, generate_leaflet_string
+
+from wisata_common.geometry import points_xy
 
 # ===== Optional geolocation (pakai salah satu yang tersedia) =====
 def _try_import_js_loc():
@@ -92,22 +96,7 @@ def _extract_xy(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
         except Exception:
             pass
 
-        def to_point(geom):
-            if geom is None or geom.is_empty:
-                return None
-            if geom.geom_type == "Point":
-                return geom
-            try:
-                return geom.representative_point()
-            except Exception:
-                try:
-                    return geom.centroid
-                except Exception:
-                    return None
-
-        pts = gdf2["geometry"].apply(to_point)
-        gdf2["x"] = pts.apply(lambda p: float(p.x) if p else math.nan)
-        gdf2["y"] = pts.apply(lambda p: float(p.y) if p else math.nan)
+        gdf2["x"], gdf2["y"] = points_xy(gdf2["geometry"].to_numpy())
         return gdf2
 
     raise ValueError("Data tidak memiliki kolom x/y maupun geometry untuk diekstrak.")
@@ -121,35 +110,111 @@ def _choose_name_column(gdf: gpd.GeoDataFrame) -> Optional[str]:
             return cand
     return None
 
-def _compute_point(geom, method: str):
-    if geom is None or (hasattr(geom, "is_empty") and geom.is_empty):
-        return None
-    if geom.geom_type == "Point":
-        return geom
-    if method == "Centroid":
-        return geom.centroid
-    return geom.representative_point()
-
-def _geodesic_km(a_lat: float, a_lon: float, b_lat: float, b_lon: float) -> float:
-    return geodesic((a_lat, a_lon), (b_lat, b_lon)).kilometers
+_GEOD = Geod(ellps="WGS84")
+
+def _geodesic_km_many(lat: float, lon: float, ys: np.ndarray, xs: np.ndarray) -> np.ndarray:
+    """Jarak geodesic WGS84 (km) dari satu titik ke banyak titik sekaligus; hasil sama dengan geopy.geodesic."""
+    out = np.full(len(xs), np.nan)
+    ok = ~(np.isnan(xs) | np.isnan(ys))
+    if ok.any():
+        _, _, dist_m = _GEOD.inv(np.full(int(ok.sum()), lon), np.full(int(ok.sum()), lat), xs[ok], ys[ok])
+        out[ok] = dist_m / 1000.0
+    return out
+
+def _file_version(path: str) -> str:
+    """Versi dataset = sha256 isi file (16 hex), supaya cache ikut berganti saat file diganti."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+def _readonly(a: np.ndarray) -> np.ndarray:
+    a.setflags(write=False)
+    return a
 
 # =========================
 # Cache loading
 # =========================
-@st.cache_data(show_spinner=False)
-def load_geojson(path: str) -> gpd.GeoDataFrame:
+# Semua cache di bawah memakai st.cache_resource: objek dibagi antar-rerun tanpa disalin,
+# jadi wajib diperlakukan read-only (array dikunci via _readonly).
+@st.cache_data(show_spinner=False, ttl=5)
+def dataset_version(path: str) -> str:
     if not os.path.exists(path):
         raise FileNotFoundError(f"GeoJSON tidak ditemukan: {path}")
+    return _file_version(path)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_geojson(path: str, version: str) -> gpd.GeoDataFrame:
     gdf = gpd.read_file(path)
     gdf.columns = gdf.columns.str.strip()
     gdf2 = _extract_xy(gdf)
     return gdf2
 
+@st.cache_resource(show_spinner=False, max_entries=8)
+def point_arrays(_gdf: gpd.GeoDataFrame, version: str, geom_method: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(x, y) semua baris sesuai metode titik; dihitung sekali per (versi dataset, metode)."""
+    if "geometry" in _gdf.columns:
+        x, y = points_xy(_gdf["geometry"].to_numpy(), geom_method)
+    else:
+        x = pd.to_numeric(_gdf["x"], errors="coerce").to_numpy(dtype=float)
+        y = pd.to_numeric(_gdf["y"], errors="coerce").to_numpy(dtype=float)
+    return _readonly(x), _readonly(y)
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def distance_order(_gdf: gpd.GeoDataFrame, version: str, geom_method: str, lat: float, lon: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Jarak (km) ke semua baris + urutan posisi terdekat (tanpa baris NaN), per (lat, lon, metode)."""
+    x, y = point_arrays(_gdf, version, geom_method)
+    dist = _geodesic_km_many(lat, lon, y, x)
+    order = np.argsort(dist, kind="stable")
+    order = order[~np.isnan(dist[order])]
+    return _readonly(dist), _readonly(order)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def name_positions(_gdf: gpd.GeoDataFrame, version: str, name_col: Optional[str]) -> Dict[str, np.ndarray]:
+    """Index nama (lowercase) -> posisi baris, supaya filter nama tidak memindai seluruh data."""
+    if not name_col:
+        return {}
+    names = _safe_str(_gdf[name_col]).str.lower().to_numpy()
+    idx: Dict[str, List[int]] = {}
+    for pos, nm in enumerate(names):
+        idx.setdefault(nm, []).append(pos)
+    return {nm: _readonly(np.asarray(p, dtype=np.int64)) for nm, p in idx.items()}
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def base_map(_gdf: gpd.GeoDataFrame, version: str, with_geo_layer: bool) -> folium.Map:
+    """Peta dasar (tile + overlay GeoJSON opsional) dibangun sekali per versi dataset.
+
+    Marker/polyline per-interaksi TIDAK dimasukkan ke sini, tapi dikirim lewat feature_group_to_add,
+    sehingga komponen peta di browser tidak di-remount setiap rerun.
+    """
+    minx, miny, maxx, maxy = _gdf.total_bounds if len(_gdf) else (110.3, -7.4, 110.3, -7.4)
+    m = folium.Map(location=[(miny + maxy) / 2, (minx + maxx) / 2], zoom_start=12,
+                   control_scale=True, tiles="CartoDB positron")
+    if with_geo_layer:
+        tooltip_fields = [c for c in _gdf.columns if c != "geometry"]
+        folium.GeoJson(
+            _gdf, name="Layer GeoJSON",
+            tooltip=folium.GeoJsonTooltip(fields=tooltip_fields, aliases=tooltip_fields, localize=True)
+        ).add_to(m)
+        folium.LayerControl().add_to(m)
+    # st_folium memodifikasi struktur Map pada render pertamanya; lakukan sekali di sini
+    # supaya HTML peta dasar identik di setiap rerun (komponen tidak di-remount).
+    m.get_root().render()
+    generate_leaflet_string(m)
+    return m
+
+@st.cache_resource(show_spinner=False)
+def map_render_lock() -> threading.Lock:
+    # objek Map dibagi antar-sesi; render folium tidak thread-safe
+    return threading.Lock()
+
 # =========================
 # Load data
 # =========================
 try:
-    gdf_raw = load_geojson(GEOJSON_PATH)
+    data_version = dataset_version(GEOJSON_PATH)
+    gdf_raw = load_geojson(GEOJSON_PATH, data_version)
 except Exception as e:
     st.error(f"❌ Gagal memuat data: {e}")
     st.stop()
@@ -197,38 +262,38 @@ lat = st.sidebar.number_input("Latitude", value=float(lat), format="%.6f")
 lon = st.sidebar.number_input("Longitude", value=float(lon), format="%.6f")
 
 # =========================
-# Filtering data
+# Filtering data & jarak (dari cache; k/radius/nama hanya memotong array)
 # =========================
-gdf = gdf_raw.copy()
-if selected_name and selected_name != "Semua" and name_col:
-    gdf = gdf[_safe_str(gdf[name_col]).str.lower() == selected_name.lower()]
+dist_all, order_all = distance_order(gdf_raw, data_version, geom_method, float(lat), float(lon))
 
-if gdf.empty:
-    st.warning("Data kosong setelah filter. Tampilkan semua data.")
-    gdf = gdf_raw.copy()
-
-# Siapkan titik representatif bila perlu, dan pastikan x/y mengikuti pilihan metode
-if "geometry" in gdf.columns:
-    pts = gdf["geometry"].apply(lambda g: _compute_point(g, geom_method))
-    gdf["x"] = pts.apply(lambda p: float(p.x) if p is not None else math.nan)
-    gdf["y"] = pts.apply(lambda p: float(p.y) if p is not None else math.nan)
+order = order_all
+if selected_name and selected_name != "Semua" and name_col:
+    pos = name_positions(gdf_raw, data_version, name_col).get(selected_name.lower())
+    if pos is None or len(pos) == 0:
+        st.warning("Data kosong setelah filter. Tampilkan semua data.")
+    else:
+        pos = pos[~np.isnan(dist_all[pos])]
+        order = pos[np.argsort(dist_all[pos], kind="stable")]
 
-# Drop baris tanpa koordinat
-gdf = gdf.dropna(subset=["x", "y"])
+if len(order) == 0:
+    st.error("Tidak ada objek dengan koordinat valid.")
+    st.stop()
 
-# =========================
-# Hitung jarak & tentukan hasil
-# =========================
-gdf = gdf.copy()
-gdf["distance_km"] = gdf.apply(lambda r: _geodesic_km(float(lat), float(lon), float(r["y"]), float(r["x"])), axis=1)
+def _rows(positions: np.ndarray) -> gpd.GeoDataFrame:
+    """Materialisasi baris terpilih saja (kecil) lengkap dengan x/y sesuai metode & distance_km."""
+    x_all, y_all = point_arrays(gdf_raw, data_version, geom_method)
+    out = gdf_raw.iloc[positions].copy()
+    out["x"] = x_all[positions]
+    out["y"] = y_all[positions]
+    out["distance_km"] = dist_all[positions]
+    return out
 
-gdf_sorted = gdf.sort_values("distance_km")
+sel = order
 if use_radius and radius_km is not None:
-    gdf_sorted = gdf_sorted[gdf_sorted["distance_km"] <= float(radius_km)]
-
-topk = gdf_sorted.head(int(k))
-nearest = topk.iloc[0] if not topk.empty else gdf.sort_values("distance_km").iloc[0]
+    sel = order[: int(np.searchsorted(dist_all[order], float(radius_km), side="right"))]
 
+topk = _rows(sel[: int(k)])
+nearest = topk.iloc[0] if not topk.empty else _rows(order[:1]).iloc[0]
 # =========================
 # Header & Ringkasan
 # =========================
@@ -253,7 +318,7 @@ with colB:
 # =========================
 st.subheader("📋 Hasil (Terdekat)")
 hide_cols = {"geometry"}
-show_cols = [c for c in gdf.columns if c not in hide_cols]
+show_cols = [c for c in topk.columns if c not in hide_cols]
 if not topk.empty:
     st.dataframe(
         topk[show_cols]
@@ -267,17 +332,18 @@ else:
 # Peta Folium
 # =========================
 st.subheader("🧭 Peta Interaktif")
-m = folium.Map(location=[lat, lon], zoom_start=12, control_scale=True, tiles="CartoDB positron")
+# Lapisan dinamis: hanya ini yang berubah antar-rerun
+fg = folium.FeatureGroup(name="Hasil")
 
 # Marker lokasi pengguna
 folium.Marker(
     [lat, lon],
     popup="Lokasi Anda",
     icon=folium.Icon(color="red", icon="user")
-).add_to(m)
+).add_to(fg)
 
 # Marker hasil (pakai topk kalau ada, else ambil 1 terdekat global agar tetap informatif)
-plot_df = topk if not topk.empty else gdf.sort_values("distance_km").head(1)
+plot_df = topk if not topk.empty else _rows(order[:1])
 nmcol = name_col if name_col else None
 
 for _, r in plot_df.iterrows():
@@ -291,22 +357,18 @@ for _, r in plot_df.iterrows():
         [gm_lat, gm_lon],
         popup=folium.Popup(popup_html, max_width=280),
         icon=folium.Icon(color="green", icon="star")
-    ).add_to(m)
+    ).add_to(fg)
 
     # Polyline rute lurus
     folium.PolyLine(
         locations=[(lat, lon), (gm_lat, gm_lon)],
         color="blue", weight=3, opacity=0.8, dash_array="6,6"
-    ).add_to(m)
+    ).add_to(fg)
 
-# (Opsional) tampilkan seluruh layer GeoJSON sebagai overlay dengan tooltip
+# (Opsional) tampilkan seluruh layer GeoJSON sebagai overlay dengan tooltip (bagian dari peta dasar ter-cache)
 show_geo_layer = st.checkbox("Tampilkan layer GeoJSON (tooltip semua kolom non-geometry)", value=False)
-if show_geo_layer:
-    tooltip_fields = [c for c in gdf_raw.columns if c != "geometry"]
-    folium.GeoJson(
-        gdf_raw, name="Layer GeoJSON",
-        tooltip=folium.GeoJsonTooltip(fields=tooltip_fields, aliases=tooltip_fields, localize=True)
-    ).add_to(m)
-    folium.LayerControl().add_to(m)
-
-st_folium(m, width=950, height=560)
+m = base_map(gdf_raw, data_version, show_geo_layer)
+
+with map_render_lock():
+    st_folium(m, key="peta_wisata", center=(lat, lon), zoom=12,
+              feature_group_to_add=fg, width=950, height=560)
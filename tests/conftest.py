@@ -0,0 +1,138 @@
+"""
+Fixture bersama untuk test app FastAPI (api/, laravel/predict/, backend/api/).
+
+Tiap app membaca konfigurasi dari environment saat di-import, jadi setiap fixture memuat file app
+sebagai modul baru (nama unik) dengan environment-nya sendiri, sama seperti benchmarks/run.py.
+Data memakai layer sintetis kecil dari benchmarks/synth.py supaya hasil deterministik.
+"""
+import importlib.util
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO, "benchmarks"))
+if REPO not in sys.path:
+    sys.path.append(REPO)   # wisata_common/
+
+import synth  # noqa: E402
+
+API_MAIN = os.path.join(REPO, "api", "main.py")
+PREDICT_APP = os.path.join(REPO, "laravel", "predict", "app.py")
+BACKEND_MAIN = os.path.join(REPO, "backend", "api", "main.py")
+EXCEL_PATH = os.path.join(REPO, "laravel", "predict", "estimasi_wisata.xlsx")
+SAMPLE_ROAD_GRAPH = os.path.join(REPO, "api", "data", "sample_road_graph.json")
+PREDICT_KEY = "berapaya"
+
+_counter = 0
+
+
+def load_app(path: str, env: Dict[str, str]):
+    """Import file app sebagai modul baru dengan environment `env` (dikembalikan setelah import).
+
+    Folder app sengaja tidak ditambahkan ke sys.path: app harus bisa menemukan modul saudaranya sendiri.
+    """
+    global _counter
+    _counter += 1
+    name = f"_test_{os.path.basename(os.path.dirname(path))}_{_counter}"
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in env.items():
+            if value is None:
+                mp.delenv(key, raising=False)
+            else:
+                mp.setenv(key, value)
+        spec = importlib.util.spec_from_file_location(name, path)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+        spec.loader.exec_module(mod)
+    return mod
+
+
+def wait_ready(client, path: str = "/readyz", headers: Optional[Dict[str, str]] = None, timeout: float = 120.0):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        r = client.get(path, headers=headers or {})
+        if r.status_code == 200:
+            return r
+        if '"failed"' in r.text:
+            raise RuntimeError(f"Tahap startup gagal: {r.text}")
+        time.sleep(0.02)
+    raise RuntimeError(f"App tidak siap dalam {timeout:.0f} detik ({path})")
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("layers"))
+
+
+@pytest.fixture(scope="session")
+def wisata_layer(data_dir):
+    return synth.ensure_layer("wisata", 400, data_dir)
+
+
+@pytest.fixture(scope="session")
+def poi_layer(data_dir):
+    return synth.ensure_layer("poi", 400, data_dir)
+
+
+def _api_env(layer: str, tmp: str, **extra) -> Dict[str, str]:
+    env = {
+        "GEOJSON_PATH": layer,
+        "ROAD_GRAPH_PATH": None,
+        "KNN_CACHE_DIR": os.path.join(tmp, "knn"),
+        "PRELOAD_DATA": None,
+        "PROFILE_SAMPLE_RATE": None,
+        "PROFILE_ADMIN_TOKEN": None,
+    }
+    env.update(extra)
+    return env
+
+
+@pytest.fixture(scope="module")
+def api_module(wisata_layer, tmp_path_factory):
+    """api/main.py dengan konfigurasi default (tanpa graf jalan)."""
+    return load_app(API_MAIN, _api_env(wisata_layer, str(tmp_path_factory.mktemp("api"))))
+
+
+@pytest.fixture(scope="module")
+def api_client(api_module):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api_module.app) as client:
+        wait_ready(client)
+        yield client
+
+
+@pytest.fixture
+def make_api(wisata_layer, tmp_path):
+    """Pabrik api/main.py dengan environment tambahan (mis. ROAD_GRAPH_PATH)."""
+    def make(**extra):
+        return load_app(API_MAIN, _api_env(wisata_layer, str(tmp_path), **extra))
+    return make
+
+
+def _predict_env(tmp: str, **extra) -> Dict[str, str]:
+    env = {
+        "EXCEL_PATH": EXCEL_PATH,
+        "EXCEL_CACHE_DIR": os.path.join(tmp, "excel"),
+        "RATE_LIMIT_RPS": "0",
+        "RATE_LIMIT_KEYS": None,
+        "RATE_LIMIT_REDIS_URL": None,
+        "WEB_CONCURRENCY": None,
+        "PRELOAD_DATA": None,
+        "PROFILE_SAMPLE_RATE": None,
+        "PROFILE_ADMIN_TOKEN": None,
+    }
+    env.update(extra)
+    return env
+
+
+@pytest.fixture
+def make_predict(poi_layer, tmp_path):
+    """Pabrik laravel/predict/app.py; layer POI sintetis, rate limit nonaktif kecuali di-override."""
+    def make(**extra):
+        return load_app(PREDICT_APP, _predict_env(str(tmp_path), GEOJSON_PATH=poi_layer, **extra))
+    return make
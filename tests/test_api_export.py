@@ -0,0 +1,95 @@
+"""/wisata/export, cache body terkompres & header Vary pada api/main.py."""
+import csv
+import io
+import json
+
+import pytest
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+def _vary(r):
+    values = r.headers.get_list("vary")
+    assert len(values) == 1, values
+    tokens = [t.strip().lower() for t in values[0].split(",")]
+    assert tokens.count("accept-encoding") == 1, values
+    return tokens
+
+
+def test_export_formats_roundtrip(api_module, api_client):
+    n = len(api_module.GDF_REPR)
+    r = api_client.get("/wisata/export", params={"format": "ndjson"}, headers=IDENTITY)
+    assert r.status_code == 200 and r.headers["content-type"].startswith("application/x-ndjson")
+    assert "content-encoding" not in r.headers and r.headers["X-Total-Count"] == str(n)
+    recs = [json.loads(line) for line in r.text.splitlines()]
+    assert len(recs) == n and {"index", "latitude", "longitude", "properties"} <= set(recs[0])
+
+    r = api_client.get("/wisata/export", params={"format": "geojsonseq"}, headers=IDENTITY)
+    feats = [json.loads(t) for t in r.text.split("\x1e") if t.strip()]
+    assert len(feats) == n and all(f["type"] == "Feature" for f in feats)
+
+    r = api_client.get("/wisata/export", params={"format": "csv"}, headers=IDENTITY)
+    rows = list(csv.reader(io.StringIO(r.text)))
+    assert rows[0][0] == "index" and rows[0][-2:] == ["latitude", "longitude"] and len(rows) == n + 1
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_export_compressed_body_is_cached(api_module, api_client, encoding):
+    if encoding == "br" and api_module.brotli is None:
+        pytest.skip("brotli tidak terpasang")
+    plain = api_client.get("/wisata/export", params={"format": "ndjson", "method": "centroid"}, headers=IDENTITY).content
+    key = (api_module.DATA_VERSION, "export:ndjson:centroid", encoding)
+    api_module.BODY_CACHE.pop(key, None)
+    first = api_client.get("/wisata/export", params={"format": "ndjson", "method": "centroid"},
+                           headers={"Accept-Encoding": encoding})
+    assert first.headers["content-encoding"] == encoding
+    assert first.content == plain   # httpx mendekode gzip/br
+    assert key in api_module.BODY_CACHE
+    second = api_client.get("/wisata/export", params={"format": "ndjson", "method": "centroid"},
+                            headers={"Accept-Encoding": encoding})
+    assert second.content == plain and "content-length" in second.headers   # dilayani dari cache, bukan streaming
+    _vary(first)
+    _vary(second)
+
+
+def test_body_cache_drops_stale_versions(api_module, monkeypatch):
+    monkeypatch.setattr(api_module, "BODY_CACHE", type(api_module.BODY_CACHE)())
+    monkeypatch.setattr(api_module, "DATA_VERSION", "v1")
+    api_module._body_cache_put("a", "identity", b"1")
+    api_module._body_cache_put("b", "gzip", b"2")
+    monkeypatch.setattr(api_module, "DATA_VERSION", "v2")
+    assert api_module._body_cache_get("a", "identity") is None
+    api_module._body_cache_put("a", "identity", b"3")
+    assert list(api_module.BODY_CACHE) == [("v2", "a", "identity")]
+
+
+def test_cached_json_response_negotiates_encoding(api_client):
+    plain = api_client.get("/wisata/names", headers=IDENTITY)
+    gz = api_client.get("/wisata/names", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers and gz.headers["content-encoding"] == "gzip"
+    assert plain.json() == gz.json()
+    assert plain.headers["etag"] == gz.headers["etag"]
+    _vary(plain)
+    _vary(gz)
+
+
+@pytest.mark.parametrize("path,params", [("/wisata", {}), ("/wisata/nearest", {"lat": -7.8, "lon": 110.37, "k": 50}),
+                                         ("/healthz", {})])
+@pytest.mark.parametrize("accept", ["identity", "gzip", None])
+def test_vary_exactly_once(api_client, path, params, accept):
+    headers = {"Origin": "http://contoh.id"}
+    if accept:
+        headers["Accept-Encoding"] = accept
+    r = api_client.get(path, params=params, headers=headers)
+    assert r.status_code == 200
+    tokens = _vary(r)
+    if "access-control-allow-origin" in r.headers and r.headers["access-control-allow-origin"] != "*":
+        assert "origin" in tokens   # Vary dari CORS digabung, bukan ditimpa
+
+
+def test_compression_middleware_uncompressed_large_body(api_module, api_client):
+    r = api_client.get("/wisata/nearest", params={"lat": -7.8, "lon": 110.37, "k": 50}, headers=IDENTITY)
+    assert len(r.content) >= api_module.COMPRESS_MIN_BYTES and "content-encoding" not in r.headers
+    gz = api_client.get("/wisata/nearest", params={"lat": -7.8, "lon": 110.37, "k": 50}, headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["content-encoding"] == "gzip" and gz.json() == r.json()
+    assert int(gz.headers["content-length"]) < len(r.content)
@@ -0,0 +1,62 @@
+"""Filter atribut (bitmap) & facet /wisata/nearest dibanding hitungan brute force pandas."""
+import numpy as np
+import pytest
+from pyproj import Geod
+
+GEOD = Geod(ellps="WGS84")
+USER = {"lat": -7.8, "lon": 110.37}
+
+
+def _brute(gdf, jenis=None, radius_km=None):
+    df = gdf[gdf["y"].notna()].copy()
+    if jenis:
+        df = df[df["jenis_obje"].astype(str).str.lower().isin([j.lower() for j in jenis])]
+    _, _, m = GEOD.inv(np.full(len(df), USER["lon"]), np.full(len(df), USER["lat"]), df["x"].to_numpy(), df["y"].to_numpy())
+    df["distance_km"] = np.asarray(m) / 1000.0
+    if radius_km is not None:
+        df = df[df["distance_km"] <= radius_km]
+    return df.sort_values("distance_km", kind="stable")
+
+
+def test_facets_endpoint_matches_value_counts(api_module, api_client):
+    facets = api_client.get("/wisata/facets").json()
+    assert "jenis_obje" in facets
+    expected = api_module.GDF_BASE["jenis_obje"].astype(str).str.strip().value_counts().to_dict()
+    assert facets["jenis_obje"] == expected
+    assert list(facets["jenis_obje"].values()) == sorted(expected.values(), reverse=True)
+
+
+@pytest.mark.parametrize("jenis,radius_km", [(None, None), (["Candi"], None), (["candi", "MUSEUM"], None),
+                                             (["Pantai", "Museum"], 25.0), (None, 15.0)])
+def test_nearest_filters_and_facets_match_brute_force(api_module, api_client, jenis, radius_km):
+    gdf = api_module.GDF_REPR
+    if jenis and not gdf["jenis_obje"].str.lower().isin([j.lower() for j in jenis]).any():
+        pytest.skip("jenis tidak ada di layer sintetis")
+    params = [("lat", USER["lat"]), ("lon", USER["lon"]), ("k", 10), ("facets", "jenis_obje")]
+    params += [("filter.jenis_obje", j) for j in jenis or []]
+    if radius_km is not None:
+        params.append(("radius_km", radius_km))
+    r = api_client.get("/wisata/nearest", params=params)
+    assert r.status_code == 200, r.text
+    body = r.json()
+
+    expected = _brute(gdf, jenis, radius_km)
+    assert [it["index"] for it in body["items"]] == expected.index[:10].tolist()
+    np.testing.assert_allclose([it["distance_km"] for it in body["items"]], expected["distance_km"][:10], atol=1e-6)
+    assert body["facets"]["jenis_obje"] == expected["jenis_obje"].value_counts().to_dict()
+
+
+def test_filter_columns_are_and_combined(api_module, api_client):
+    gdf = api_module.GDF_REPR
+    jenis = gdf["jenis_obje"].iloc[0]
+    r = api_client.get("/wisata/nearest", params={**USER, "k": 100, "filter.jenis_obje": jenis, "filter.jenis_ob_1": "tidak-ada"})
+    assert r.status_code == 404
+    r = api_client.get("/wisata/nearest", params={**USER, "k": 100, "filter.jenis_obje": jenis, "filter.jenis_ob_1": jenis})
+    assert {it["jenis_obje"] for it in r.json()["items"]} == {jenis}
+
+
+def test_unknown_filter_or_facet_column_is_400(api_client):
+    assert api_client.get("/wisata/nearest", params={**USER, "filter.tidak_ada": "x"}).status_code == 400
+    assert api_client.get("/wisata/nearest", params={**USER, "facets": "tidak_ada"}).status_code == 400
+    # query param tanpa prefix filter. (cache-buster dsb.) diabaikan
+    assert api_client.get("/wisata/nearest", params={**USER, "utm_source": "x"}).status_code == 200
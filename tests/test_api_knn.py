@@ -0,0 +1,73 @@
+"""Graf kNN (CSR) api/main.py: kebenaran vs brute force & pemuatan ulang dari cache disk (mmap)."""
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from pyproj import Geod
+
+from conftest import wait_ready
+
+GEOD = Geod(ellps="WGS84")
+
+
+def _brute_knn(x, y, k):
+    out = {}
+    valid = np.flatnonzero(~np.isnan(x))
+    for i in valid:
+        others = valid[valid != i]
+        _, _, m = GEOD.inv(np.full(len(others), x[i]), np.full(len(others), y[i]), x[others], y[others])
+        d = np.asarray(m) / 1000.0
+        order = np.lexsort((others, d))[:k]
+        out[i] = (others[order], d[order])
+    return out
+
+
+def test_build_knn_matches_brute_force(api_module, api_client):   # api_client: library berat sudah dimuat
+    rng = np.random.default_rng(3)
+    x = rng.uniform(110.0, 110.8, 300)
+    y = rng.uniform(-8.1, -7.5, 300)
+    x[[5, 77]] = np.nan   # tanpa koordinat: tidak punya (dan bukan) tetangga
+    y[[5, 77]] = np.nan
+    indptr, indices, dist = api_module._build_knn(x, y, 6)
+    assert indptr.shape == (301,) and indptr[-1] == len(indices) == len(dist)
+    assert indptr[6] - indptr[5] == 0 and 5 not in indices and 77 not in indices
+    for i, (nb, d) in _brute_knn(x, y, 6).items():
+        np.testing.assert_allclose(dist[indptr[i]:indptr[i + 1]], d, atol=1e-9)
+        assert indices[indptr[i]:indptr[i + 1]].tolist() == nb.tolist()
+
+
+def test_neighbors_endpoint_and_disk_cache(make_api, monkeypatch):
+    mod = make_api(KNN_K="5")
+    with TestClient(mod.app) as client:
+        wait_ready(client)
+        index = int(mod.GDF_REPR.index[10])
+        r = client.get(f"/wisata/{index}/neighbors", params={"k": 5})
+        assert r.status_code == 200, r.text
+        first = r.json()
+        assert first["count"] == 5 and index not in [it["index"] for it in first["items"]]
+        dists = [it["distance_km"] for it in first["items"]]
+        assert dists == sorted(dists)
+        assert client.get(f"/wisata/{index}/neighbors", params={"k": 6}).status_code == 400
+        assert client.get("/wisata/999999/neighbors").status_code == 404
+    key = mod.KNN_GRAPHS["representative"]["key"]
+    assert os.path.isfile(os.path.join(mod.KNN_CACHE_DIR, key, "indptr.npy"))
+
+    # Proses baru dengan data & KNN_CACHE_DIR sama: graf dibaca dari disk (mmap), tidak dibangun ulang
+    mod2 = make_api(KNN_K="5")
+    assert mod2.KNN_CACHE_DIR == mod.KNN_CACHE_DIR
+    monkeypatch.setattr(mod2, "_build_knn", lambda *a: pytest.fail("graf kNN dibangun ulang"))
+    with TestClient(mod2.app) as client:
+        wait_ready(client)
+        assert client.get(f"/wisata/{index}/neighbors", params={"k": 5}).json() == first
+        assert client.get(f"/wisata/{index}/neighbors", params={"k": 2}).json()["items"] == first["items"][:2]
+    graph = mod2.KNN_GRAPHS["representative"]
+    assert graph["key"] == key and all(isinstance(graph[n], np.memmap) for n in ("indptr", "indices", "distance_km"))
+    assert mod2.METRICS.get("pariwisata_cache_requests_total", {"cache": "knn", "result": "hit"}) == 1
+
+
+def test_knn_disabled_is_503(make_api):
+    mod = make_api(KNN_K="0")
+    with TestClient(mod.app) as client:
+        wait_ready(client)
+        assert client.get(f"/wisata/{int(mod.GDF_REPR.index[0])}/neighbors").status_code == 503
@@ -0,0 +1,50 @@
+"""Paginasi cursor /wisata/objects pada api/main.py."""
+import base64
+import json
+
+
+def _walk(client, limit, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        q = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/wisata/objects", params=q)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        items += body["items"]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items, pages, body["count"]
+
+
+def test_cursor_walk_matches_offset(api_module, api_client):
+    n = len(api_module.GDF_REPR)
+    items, pages, count = _walk(api_client, 37)
+    assert count == n and pages == -(-n // 37)
+    assert [it["index"] for it in items] == api_module.GDF_REPR.index.tolist()
+    by_offset = api_client.get("/wisata/objects", params={"limit": 37, "offset": 74}).json()["items"]
+    assert by_offset == items[74:111]
+
+
+def test_cursor_with_name_filter(api_client):
+    name = api_client.get("/wisata/names").json()[0]
+    items, pages, count = _walk(api_client, 1, name=name)
+    assert count == len(items) >= 1 and pages == count
+    assert all(it["nama_objek"] == name for it in items)
+
+
+def test_stale_cursor_is_409(api_module, api_client, monkeypatch):
+    cursor = api_client.get("/wisata/objects", params={"limit": 10}).json()["next_cursor"]
+    monkeypatch.setattr(api_module, "DATA_VERSION", api_module.DATA_VERSION + "-baru")   # dataset dimuat ulang
+    r = api_client.get("/wisata/objects", params={"limit": 10, "cursor": cursor})
+    assert r.status_code == 409
+
+
+def test_bad_cursor_is_400(api_client):
+    assert api_client.get("/wisata/objects", params={"cursor": "bukan-cursor"}).status_code == 400
+    forged = base64.urlsafe_b64encode(json.dumps({"a": 1}).encode()).decode().rstrip("=")
+    assert api_client.get("/wisata/objects", params={"cursor": forged}).status_code == 400
+    # cursor dari paginasi tanpa filter tidak boleh dipakai untuk filter nama (dan sebaliknya)
+    cursor = api_client.get("/wisata/objects", params={"limit": 10}).json()["next_cursor"]
+    name = api_client.get("/wisata/names").json()[0]
+    assert api_client.get("/wisata/objects", params={"cursor": cursor, "name": name}).status_code == 400
@@ -0,0 +1,64 @@
+"""/wisata/reachable (isochrone) pada api/main.py."""
+import pytest
+from conftest import SAMPLE_ROAD_GRAPH
+
+
+def test_reachable_without_road_graph(api_module, api_client):
+    # Konfigurasi default: ROAD_GRAPH_PATH kosong -> lingkaran kecepatan efektif, bukan 500
+    assert api_module.ROAD_GRAPH is None
+    r = api_client.get("/wisata/reachable", params={"lat": -7.7956, "lon": 110.3695, "minutes": 30})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["mode"] == "speed_profile"
+    assert body["polygon"]["type"] in ("Polygon", "MultiPolygon")
+    max_km = api_module.REACH_SPEED_KMH * 30 / 60.0
+    assert body["count"] > 0
+    assert all(it["distance_km"] <= max_km + 2.0 for it in body["items"])   # + setengah diagonal sel grid asal
+    dists = [it["distance_km"] for it in body["items"]]
+    assert dists == sorted(dists)
+
+
+def test_reachable_with_road_graph(make_api):
+    from fastapi.testclient import TestClient
+    from conftest import wait_ready
+
+    mod = make_api(ROAD_GRAPH_PATH=SAMPLE_ROAD_GRAPH)
+    with TestClient(mod.app) as client:
+        wait_ready(client)
+        assert mod.ROAD_GRAPH is not None
+        r = client.get("/wisata/reachable", params={"lat": -7.7956, "lon": 110.3695, "minutes": 30})
+        assert r.status_code == 200, r.text
+        assert r.json()["mode"] == "road_graph"
+
+
+def test_isochrone_cache_keys(make_api, monkeypatch):
+    from fastapi.testclient import TestClient
+    from conftest import wait_ready
+
+    mod = make_api(ROAD_GRAPH_PATH=SAMPLE_ROAD_GRAPH, ISO_GRID_DEG="0.01", ISO_CACHE_SIZE="3")
+    with TestClient(mod.app) as client:
+        wait_ready(client)
+
+        def get(lat, lon, minutes):
+            r = client.get("/wisata/reachable", params={"lat": lat, "lon": lon, "minutes": minutes, "include_polygon": False})
+            assert r.status_code == 200, r.text
+            return r.json()
+
+        first = get(-7.7956, 110.3695, 20)
+        assert not first["cached"] and first["mode"] == "road_graph"
+        assert first["origin_cell"] == pytest.approx([110.37, -7.80])
+        same_cell = get(-7.7990, 110.3660, 20)   # titik lain di sel grid yang sama -> poligon dipakai ulang
+        assert same_cell["cached"] and same_cell["origin_cell"] == first["origin_cell"]
+        assert same_cell["count"] == first["count"]
+        assert not get(-7.7956, 110.3695, 25)["cached"]     # menit beda
+        assert not get(-7.8156, 110.3695, 20)["cached"]     # sel beda
+        assert len(mod.ISO_CACHE) == 3
+
+        # mode (graf jalan vs lingkaran kecepatan) ikut jadi key: tanpa graf, sel yang sama dihitung ulang
+        monkeypatch.setattr(mod, "ROAD_GRAPH", None)
+        other = get(-7.7956, 110.3695, 20)
+        assert not other["cached"] and other["mode"] == "speed_profile"
+        assert len(mod.ISO_CACHE) == 3                       # LRU: entri tertua dibuang
+        monkeypatch.undo()
+        assert get(-7.8156, 110.3695, 20)["cached"]
+        assert not get(-7.7956, 110.3695, 20)["cached"]     # sudah terdepak dari LRU
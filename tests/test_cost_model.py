@@ -0,0 +1,84 @@
+"""Antarmuka CostModel (ABC) & implementasinya di laravel/predict/app.py."""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+
+@pytest.fixture
+def cost_module(make_predict):
+    mod = make_predict()
+    mod._import_heavy()
+    return mod
+
+
+@pytest.fixture
+def xy():
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 20, size=(300, 3)).astype(float)
+    y = 1000 * X[:, 0] + 50 * X[:, 1] ** 2 + rng.normal(0, 100, 300)
+    return X, y
+
+
+def test_abstract_base_cannot_be_instantiated(cost_module):
+    with pytest.raises(TypeError):
+        cost_module.CostModel()
+
+    class OnlyFit(cost_module.CostModel):
+        def fit(self, X, y):
+            return self
+
+    with pytest.raises(TypeError):
+        OnlyFit()
+
+
+def test_subclass_gets_predict_and_info(cost_module):
+    class Constant(cost_module.CostModel):
+        name = "konstan"
+
+        def fit(self, X, y):
+            self.c = float(np.mean(y))
+            return self
+
+        def predict_interval(self, X):
+            v = np.full(len(X), self.c)
+            return v, v - 1, v + 1
+
+    m = Constant().fit([[0], [1]], [2.0, 4.0])
+    assert m.predict([[5], [6]]).tolist() == [3.0, 3.0]
+    assert m.info() == {"name": "konstan"}
+
+
+@pytest.mark.parametrize("name,cls", [("compact", "FlatForestCostModel"), ("rf", "ForestCostModel")])
+def test_make_cost_model(cost_module, monkeypatch, name, cls):
+    monkeypatch.setattr(cost_module, "COST_MODEL", name)
+    model = cost_module.make_cost_model()
+    assert type(model).__name__ == cls and isinstance(model, cost_module.CostModel)
+    assert model.name == name
+
+
+def test_make_cost_model_rejects_unknown(cost_module, monkeypatch):
+    monkeypatch.setattr(cost_module, "COST_MODEL", "xgboost")
+    with pytest.raises(RuntimeError, match="COST_MODEL"):
+        cost_module.make_cost_model()
+
+
+def test_flat_forest_matches_sklearn(cost_module, xy):
+    X, y = xy
+    flat = cost_module.FlatForestCostModel(n_estimators=8, max_depth=4).fit(X, y)
+    rf = RandomForestRegressor(n_estimators=8, max_depth=4, random_state=42, n_jobs=1).fit(X, y)
+    per_tree = np.stack([est.predict(X.astype(np.float32)) for est in rf.estimators_], axis=1)
+    pred, lo, hi = flat.predict_interval(X)
+    np.testing.assert_allclose(pred, per_tree.mean(axis=1))
+    np.testing.assert_allclose(lo, per_tree.min(axis=1))
+    np.testing.assert_allclose(hi, per_tree.max(axis=1))
+    np.testing.assert_allclose(pred, rf.predict(X))
+    info = flat.info()
+    assert info["trees"] == 8 and info["depth"] <= 4 and info["bytes"] > 0
+
+
+def test_forest_interval_brackets_prediction(cost_module, xy):
+    X, y = xy
+    model = cost_module.ForestCostModel(n_estimators=10).fit(X, y)
+    pred, lo, hi = model.predict_interval(X[:20])
+    assert np.all(lo <= pred) and np.all(pred <= hi)
+    assert model.info() == {"name": "rf", "trees": 10}
@@ -0,0 +1,93 @@
+"""wisata_common.geocell: kode geohash, index sel & ring nearest vs brute force."""
+import math
+
+import numpy as np
+import pytest
+
+from wisata_common import geocell
+
+
+def _encode_point(lat, lon, precision):
+    ix, iy = geocell.cell_xy(lat, lon, precision)
+    return geocell.encode(int(geocell.interleave(ix, iy, precision)), precision)
+
+
+def test_encode_matches_reference_geohash():
+    assert _encode_point(57.64911, 10.40744, 9) == "u4pruydqq"
+    assert _encode_point(-7.7956, 110.3695, 5) == "qqw7x"
+    code = geocell.decode("u4pruydqq")
+    assert geocell.encode(code, 9) == "u4pruydqq"
+    with pytest.raises(ValueError):
+        geocell.decode("u4a")   # 'a' bukan karakter geohash
+
+
+def test_bounds_contain_point():
+    ix, iy = (int(v) for v in geocell.cell_xy(-7.7956, 110.3695, 6))
+    west, south, east, north = geocell.bounds(ix, iy, 6)
+    assert west <= 110.3695 < east and south <= -7.7956 < north
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    lats = np.concatenate([rng.normal(-7.8, 0.15, 1500), rng.uniform(-8.2, -6.4, 500)])
+    lons = np.concatenate([rng.normal(110.37, 0.15, 1500), rng.uniform(108.8, 111.7, 500)])
+    lats[::97] = np.nan   # titik tanpa koordinat dilewati index
+    return lats, lons
+
+
+def test_cell_rows_prefix_lookup(points):
+    lats, lons = points
+    cells = geocell.build_cell_index(lats, lons, 5)
+    valid = np.flatnonzero(np.isfinite(lats))
+    ix, iy = geocell.cell_xy(lats[valid], lons[valid], 4)
+    codes4 = geocell.interleave(ix, iy, 4)
+    code = int(codes4[0])
+    rows = np.sort(geocell.cell_rows(cells, np.array([code], dtype=np.int64), 4))
+    np.testing.assert_array_equal(rows, valid[codes4 == code])
+
+
+@pytest.mark.parametrize("precision", [4, 5, 6])
+@pytest.mark.parametrize("k,radius_km", [(1, None), (10, None), (50, 20.0), (math.inf, 15.0)])
+def test_ring_nearest_matches_brute_force(points, precision, k, radius_km):
+    lats, lons = points
+    cells = geocell.build_cell_index(lats, lons, precision)
+    valid = np.flatnonzero(np.isfinite(lats))
+    rng = np.random.default_rng(precision)
+    for lat, lon in [(-7.7956, 110.3695), (-6.9932, 110.4203), (-9.0, 112.5)] + list(zip(rng.uniform(-8.2, -6.4, 5), rng.uniform(108.8, 111.7, 5))):
+        brute = geocell.geodesic_km(lat, lon, lats[valid], lons[valid])
+        order = np.lexsort((valid, brute))
+        if radius_km is not None:
+            order = order[brute[order] <= radius_km]
+        expected = valid[order[: k if k != math.inf else None]]
+
+        rows, dist = geocell.ring_nearest(cells, lats, lons, lat, lon, k, radius_km)
+        if radius_km is not None:
+            rows, dist = rows[dist <= radius_km], dist[dist <= radius_km]
+        got = rows[np.lexsort((rows, dist))][: k if k != math.inf else None]
+        np.testing.assert_array_equal(got, expected)
+
+
+def test_ring_nearest_respects_allowed(points):
+    lats, lons = points
+    cells = geocell.build_cell_index(lats, lons, 5)
+    allowed = np.zeros(len(lats), dtype=bool)
+    allowed[1::3] = True
+    rows, dist = geocell.ring_nearest(cells, lats, lons, -7.8, 110.37, 5, allowed=allowed)
+    assert allowed[rows].all()
+    valid = np.flatnonzero(np.isfinite(lats) & allowed)
+    brute = geocell.geodesic_km(-7.8, 110.37, lats[valid], lons[valid])
+    np.testing.assert_array_equal(np.sort(rows[np.argsort(dist, kind="stable")][:5]), np.sort(valid[np.argsort(brute, kind="stable")][:5]))
+
+
+def test_api_cells_endpoint(api_module, api_client):
+    assert api_client.get("/wisata/cells/qqw7a").status_code == 400
+    assert api_client.get("/wisata/cells/qqw7xqqw7x").status_code == 400
+    r = api_client.get("/wisata/cells/qqw7")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["parent"] == "qqw" and body["count"] > 0 and len(body["neighbors"]) == 8
+    west, south, east, north = body["bbox"]
+    for it in body["items"]:
+        assert west <= it["longitude"] < east and south <= it["latitude"] < north
+    assert api_client.get("/wisata/cells/qqw7", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
@@ -0,0 +1,48 @@
+"""wisata_common.geometry.points_xy dibanding jalur per-baris shapely."""
+import numpy as np
+import pytest
+from shapely.geometry import LineString, MultiPolygon, Point, Polygon, box
+
+from wisata_common.geometry import points_xy
+
+GEOMS = [
+    Point(110.37, -7.8),
+    box(110.0, -7.9, 110.2, -7.7),
+    Polygon([(0, 0), (4, 0), (4, 1), (1, 1), (1, 4), (0, 4)]),   # L: centroid != point_on_surface
+    LineString([(0, 0), (2, 2)]),
+    MultiPolygon([box(0, 0, 1, 1), box(3, 3, 4, 4)]),
+    None,
+    Polygon(),
+]
+
+
+def _per_row(geoms, centroid):
+    out = []
+    for g in geoms:
+        if g is None or g.is_empty:
+            out.append((np.nan, np.nan))
+        else:
+            p = g if g.geom_type == "Point" else (g.centroid if centroid else g.representative_point())
+            out.append((p.x, p.y))
+    return np.array(out)
+
+
+@pytest.mark.parametrize("method,centroid", [("representative", False), ("centroid", True),
+                                             ("Representative Point", False), ("Centroid", True)])
+def test_matches_per_row(method, centroid):
+    x, y = points_xy(np.array(GEOMS, dtype=object), method)
+    np.testing.assert_allclose(np.column_stack([x, y]), _per_row(GEOMS, centroid), equal_nan=True)
+
+
+def test_all_missing_and_empty_input():
+    x, y = points_xy(np.array([None, None], dtype=object))
+    assert np.isnan(x).all() and np.isnan(y).all()
+    x, y = points_xy(np.array([], dtype=object))
+    assert x.shape == y.shape == (0,)
+
+
+def test_invalid_geometry_falls_back_per_row():
+    bowtie = Polygon([(0, 0), (2, 2), (2, 0), (0, 2)])   # self-intersection
+    x, y = points_xy(np.array([bowtie, Point(1, 5)], dtype=object))
+    assert np.isfinite(x).all() and np.isfinite(y).all()
+    assert (x[1], y[1]) == (1.0, 5.0)
@@ -0,0 +1,44 @@
+"""gunicorn.conf.py ketiga app memakai setelan bersama wisata_common.gunicorn_base."""
+import os
+import runpy
+import sys
+
+import pytest
+
+from conftest import REPO
+
+CONFS = ["api/gunicorn.conf.py", "backend/api/gunicorn.conf.py", "laravel/predict/gunicorn.conf.py"]
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    # Modul base menulis os.environ saat di-import; monkeypatch memulihkannya setelah test
+    for var in ("PRELOAD_DATA", "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "WEB_CONCURRENCY", "BIND"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.delitem(sys.modules, "wisata_common.gunicorn_base", raising=False)
+    return monkeypatch
+
+
+@pytest.mark.parametrize("conf", CONFS)
+def test_conf_uses_shared_settings(clean_env, conf):
+    clean_env.setenv("WEB_CONCURRENCY", "3")
+    ns = runpy.run_path(os.path.join(REPO, conf))
+    assert ns["worker_class"] == "uvicorn_worker.UvicornWorker"
+    assert (ns["workers"], ns["preload_app"], ns["bind"]) == (3, True, "0.0.0.0:8000")
+    assert os.environ["PRELOAD_DATA"] == "1" and os.environ["OMP_NUM_THREADS"] == "1"
+
+
+def test_workers_default_to_cpu_count_and_are_exported(clean_env):
+    ns = runpy.run_path(os.path.join(REPO, CONFS[2]))
+    assert ns["workers"] >= 1
+    assert os.environ["WEB_CONCURRENCY"] == str(ns["workers"])
+
+
+def test_worker_class_resolves(clean_env):
+    pytest.importorskip("uvicorn_worker")
+    from gunicorn.config import Config
+
+    ns = runpy.run_path(os.path.join(REPO, CONFS[0]))
+    cfg = Config()
+    cfg.set("worker_class", ns["worker_class"])
+    assert cfg.worker_class.__name__ == "UvicornWorker"
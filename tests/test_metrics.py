@@ -0,0 +1,37 @@
+"""wisata_common.metrics & endpoint /metrics kedua app."""
+from wisata_common.metrics import MetricsRegistry
+
+from conftest import PREDICT_KEY
+
+
+def test_registry_renders_prometheus_text():
+    m = MetricsRegistry(buckets=(0.1, 1.0))
+    m.describe("x_total", "counter", "Contoh.")
+    m.inc("x_total", {"route": '/a"b'})
+    m.inc("x_total", {"route": '/a"b'}, 2)
+    m.observe("x_seconds", {"route": "/a"}, 0.5)
+    text = m.render()
+    assert "# TYPE x_total counter" in text
+    assert 'x_total{route="/a\\"b"} 3' in text
+    assert 'x_seconds_bucket{route="/a",le="0.1"} 0' in text
+    assert 'x_seconds_bucket{route="/a",le="1.0"} 1' in text
+    assert 'x_seconds_bucket{route="/a",le="+Inf"} 1' in text
+    assert 'x_seconds_count{route="/a"} 1' in text
+    assert m.get("x_total", {"route": '/a"b'}) == 3
+
+
+def test_api_metrics_use_route_template(api_client):
+    api_client.get("/wisata/cells/qqw7")
+    text = api_client.get("/metrics").text
+    assert "# TYPE pariwisata_http_requests_total counter" in text
+    assert 'route="/wisata/cells/{cell}"' in text
+    assert "pariwisata_startup_stage_seconds" in text
+
+
+def test_predict_metrics_prefix(make_predict):
+    from fastapi.testclient import TestClient
+
+    with TestClient(make_predict().app) as client:
+        client.get("/health", headers={"X-API-Key": PREDICT_KEY})
+        text = client.get("/metrics", headers={"X-API-Key": PREDICT_KEY}).text
+    assert 'berapaya_http_requests_total{method="GET",route="/health",status="200"} 1' in text
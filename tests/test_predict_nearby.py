@@ -0,0 +1,42 @@
+"""/predict-nearby pada laravel/predict/app.py."""
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import PREDICT_KEY, wait_ready
+
+HEADERS = {"X-API-Key": PREDICT_KEY}
+
+
+@pytest.fixture
+def limited_predict(make_predict):
+    mod = make_predict(RATE_LIMIT_RPS="0.01", RATE_LIMIT_BURST="3")
+    with TestClient(mod.app) as client:
+        wait_ready(client, headers=HEADERS)
+        yield mod, client
+
+
+def _payload(mod):
+    return {"destinasi": str(mod.DF["Destinasi"].iloc[0]), "lat": -7.7956, "lon": 110.3695, "radius_km": 10}
+
+
+def test_predict_nearby_keeps_rate_limit_headers(limited_predict):
+    mod, client = limited_predict
+    remaining = []
+    for _ in range(3):
+        r = client.post("/predict-nearby", json=_payload(mod), headers=HEADERS)
+        assert r.status_code == 200, r.text
+        assert r.headers["content-type"] == "application/json"
+        assert r.headers["X-RateLimit-Limit"] == "3"
+        remaining.append(int(r.headers["X-RateLimit-Remaining"]))
+    assert remaining == [2, 1, 0]
+
+    r = client.post("/predict-nearby", json=_payload(mod), headers=HEADERS)
+    assert r.status_code == 429
+    assert r.headers["X-RateLimit-Remaining"] == "0"
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+def test_predict_nearby_requires_api_key(limited_predict):
+    mod, client = limited_predict
+    r = client.post("/predict-nearby", json=_payload(mod), headers={"X-API-Key": "salah"})
+    assert r.status_code == 403
@@ -0,0 +1,70 @@
+"""Kesiapan parsial laravel/predict/app.py: tiap bagian (excel/model/geo/itinerary) tersedia begitu selesai."""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from conftest import PREDICT_KEY, wait_ready
+
+HEADERS = {"X-API-Key": PREDICT_KEY}
+
+
+def _wait_part(client, part, timeout=60.0):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        if client.get("/readyz", params={"part": part}, headers=HEADERS).status_code == 200:
+            return
+        time.sleep(0.02)
+    raise RuntimeError(f"bagian {part} tidak siap")
+
+
+def test_parts_become_ready_independently(make_predict, monkeypatch):
+    mod = make_predict()
+    release = threading.Event()
+    train = mod.train_model
+
+    def slow_train(df):
+        release.wait(60)
+        return train(df)
+
+    monkeypatch.setattr(mod, "train_model", slow_train)
+    with TestClient(mod.app) as client:
+        try:
+            _wait_part(client, "excel")
+            _wait_part(client, "geo")
+            # model masih training: endpoint yang hanya butuh Excel sudah melayani, sisanya 503 + progres
+            assert client.get("/metadata", headers=HEADERS).status_code == 200
+            for part in ("model", "itinerary"):
+                assert client.get("/readyz", params={"part": part}, headers=HEADERS).status_code == 503
+            r = client.get("/readyz", headers=HEADERS)
+            assert r.status_code == 503
+            detail = r.json()["detail"]
+            assert detail["status"] == "starting" and detail["ready_parts"] == ["excel", "geo"]
+            assert detail["progress"]["train_model"]["status"] == "running"
+            assert detail["progress"]["load_geojson"]["status"] == "done"
+            payload = {"destinasi": str(mod.DF["Destinasi"].iloc[0]), "lat": -7.7956, "lon": 110.3695, "radius_km": 10}
+            assert client.post("/predict-nearby", json=payload, headers=HEADERS).status_code == 503
+            assert client.get("/readyz", params={"part": "bukan"}, headers=HEADERS).status_code == 422
+        finally:
+            release.set()
+        r = wait_ready(client, headers=HEADERS)
+        assert r.json()["ready_parts"] == ["excel", "geo", "itinerary", "model"]
+        assert client.post("/predict-nearby", json=payload, headers=HEADERS).status_code == 200
+
+
+def test_failed_stage_is_reported(make_predict, monkeypatch):
+    mod = make_predict()
+
+    def broken(df):
+        raise ValueError("kolom hilang")
+
+    monkeypatch.setattr(mod, "train_model", broken)
+    with TestClient(mod.app) as client:
+        t0 = time.perf_counter()
+        while mod.WARMUP_ERROR is None and time.perf_counter() - t0 < 30:
+            time.sleep(0.02)
+        detail = client.get("/readyz", headers=HEADERS).json()["detail"]
+        assert detail["status"] == "failed" and "kolom hilang" in detail["error"]
+        assert detail["progress"]["train_model"]["status"] == "failed" and "excel" in detail["ready_parts"]
+        assert client.get("/health", headers=HEADERS).status_code == 503
+        assert client.get("/metadata", headers=HEADERS).status_code == 200   # Excel tetap bisa dipakai
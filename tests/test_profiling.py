@@ -0,0 +1,65 @@
+"""Profiling opt-in (wisata_common.profiling) & endpoint /admin/profiles."""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from wisata_common.profiling import StackSampler
+from conftest import PREDICT_KEY, wait_ready
+
+TOKEN = "rahasia"
+
+
+def _busy(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_sampler_only_records_tracked_threads():
+    stop = threading.Event()
+    other = threading.Thread(target=_busy, args=(stop,), daemon=True)
+    other.start()
+    sampler = StackSampler(0.001)
+    sampler.start()
+    try:
+        with sampler.track():
+            t0 = time.perf_counter()
+            while time.perf_counter() - t0 < 0.1:
+                sum(i * i for i in range(1000))
+    finally:
+        sampler.stop()
+        stop.set()
+        other.join()
+    assert sampler.samples > 0
+    folded = sampler.folded()
+    assert "test_sampler_only_records_tracked_threads" in folded
+    assert "_busy" not in folded
+
+
+def test_api_profile_roundtrip(make_api):
+    mod = make_api(PROFILE_ADMIN_TOKEN=TOKEN, PROFILE_INTERVAL_MS="1")
+    with TestClient(mod.app) as client:
+        wait_ready(client)
+        assert client.get("/wisata/objects").headers.get("x-profile-id") is None   # tanpa header: tidak diprofil
+        r = client.get("/wisata/nearest", params={"lat": -7.8, "lon": 110.37, "k": 5}, headers={"X-Profile": TOKEN})
+        assert r.status_code == 200
+        profile_id = r.headers["x-profile-id"]
+
+        assert client.get("/admin/profiles").status_code == 403
+        listed = client.get("/admin/profiles", headers={"X-Admin-Token": TOKEN}).json()
+        assert [p["id"] for p in listed] == [profile_id]
+        assert listed[0]["path"] == "/wisata/nearest" and "folded" not in listed[0]
+        r = client.get(f"/admin/profiles/{profile_id}", headers={"X-Admin-Token": TOKEN})
+        assert r.status_code == 200
+        assert "attachment" in r.headers["content-disposition"]
+        assert client.get("/admin/profiles/tidak-ada", headers={"X-Admin-Token": TOKEN}).status_code == 404
+
+
+def test_admin_profiles_denied_without_token(make_api, make_predict):
+    # Sampling acak saja (tanpa token): endpoint admin tetap ditolak
+    with TestClient(make_api(PROFILE_SAMPLE_RATE="1").app) as client:
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": ""}).status_code == 403
+    with TestClient(make_api().app) as client:
+        assert client.get("/admin/profiles").status_code == 404
+    with TestClient(make_predict(PROFILE_SAMPLE_RATE="1").app) as client:
+        assert client.get("/admin/profiles", headers={"X-API-Key": PREDICT_KEY}).status_code == 403
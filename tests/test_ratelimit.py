@@ -0,0 +1,152 @@
+"""wisata_common.ratelimit (jam palsu, deterministik) & pemasangannya di laravel/predict dan backend/api."""
+import pytest
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from wisata_common.ratelimit import (
+    InMemoryBucketStore,
+    RateLimiter,
+    RedisBucketStore,
+    enforce_rate_limit,
+    make_rate_limiter,
+    parse_key_quotas,
+)
+from conftest import BACKEND_MAIN, PREDICT_KEY, load_app, wait_ready
+
+
+class FakeClock:
+    def __init__(self, t: float = 1000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+    def advance(self, seconds: float) -> None:
+        self.t += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_burst_then_refill(clock):
+    rl = RateLimiter(rate=2.0, burst=4.0, clock=clock)
+    assert [rl.check("k", 1)[0] for _ in range(5)] == [True] * 4 + [False]
+    allowed, remaining, retry_after = rl.check("k", 1)
+    assert not allowed and remaining == 0 and retry_after == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert rl.check("k", 1)[:2] == (True, 0.0)
+    clock.advance(60)   # refill dibatasi kapasitas burst
+    assert rl.check("k", 1)[1] == pytest.approx(3.0)
+
+
+def test_cost_weights(clock):
+    rl = RateLimiter(rate=1.0, burst=10.0, clock=clock)
+    assert rl.check("k", 5)[:2] == (True, 5.0)
+    assert rl.check("k", 0)[:2] == (True, 10.0)        # biaya 0 (probe) tidak memakai token
+    allowed, remaining, retry_after = rl.check("k", 6)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    assert rl.check("k", 50)[0] is False                # biaya > burst dipotong ke burst, tetap menunggu refill
+    clock.advance(10)
+    assert rl.check("k", 50)[:2] == (True, 0.0)
+
+
+def test_keys_have_separate_buckets_and_overrides(clock):
+    rl = RateLimiter(rate=1.0, burst=1.0, clock=clock, overrides={"vip": (10.0, 20.0)})
+    assert rl.check("a", 1)[0] and not rl.check("a", 1)[0]
+    assert rl.check("b", 1)[0]
+    assert rl.quota("vip") == (10.0, 20.0)
+    assert all(rl.check("vip", 1)[0] for _ in range(20))
+    assert not rl.check("vip", 1)[0]
+
+
+def test_zero_rate_disables_limit(clock):
+    rl = RateLimiter(rate=0.0, burst=0.0, clock=clock)
+    assert all(rl.check("k", 100)[0] for _ in range(10))
+
+
+def test_parse_key_quotas():
+    assert parse_key_quotas("") == {}
+    assert parse_key_quotas(" a=5/10 , b=200 ") == {"a": (5.0, 10.0), "b": (200.0, 400.0)}
+
+
+def test_make_rate_limiter_splits_quota_per_worker():
+    rl = make_rate_limiter(100, 200, "a=10/20", workers=4)
+    assert (rl.rate, rl.burst) == (25.0, 50.0)
+    assert rl.quota("a") == (2.5, 5.0)
+    single = make_rate_limiter(100, 200, "a=10/20", workers=1)
+    assert (single.rate, single.burst, single.quota("a")) == (100, 200, (10.0, 20.0))
+
+
+def test_redis_store_matches_in_memory(clock):
+    fakeredis = pytest.importorskip("fakeredis")
+    try:
+        redis_store = RedisBucketStore(prefix="test:rl:", client=fakeredis.FakeRedis())
+        redis_store.take("probe", 1, 1, 1, 0)
+    except Exception as e:   # fakeredis tanpa dukungan Lua
+        pytest.skip(f"Lua tidak tersedia di fakeredis: {e}")
+    mem = RateLimiter(2.0, 3.0, InMemoryBucketStore(), clock=clock)
+    red = RateLimiter(2.0, 3.0, redis_store, clock=clock)
+    for step, cost in [(0, 1), (0, 1), (0, 2), (0.25, 1), (1.0, 1), (0, 3)]:
+        clock.advance(step)
+        a, b = mem.check("k", cost), red.check("k", cost)
+        assert a[0] == b[0] and a[1] == pytest.approx(b[1]) and a[2] == pytest.approx(b[2])
+
+
+def _limited_app(limiter):
+    app = FastAPI()
+
+    def guard(request: Request, response: Response):
+        enforce_rate_limit(limiter, request, response, "k", {"/mahal/{n}": 3.0, "/gratis": 0.0})
+
+    @app.get("/mahal/{n}", dependencies=[Depends(guard)])
+    def mahal(n: int):
+        return {"n": n}
+
+    @app.get("/gratis", dependencies=[Depends(guard)])
+    def gratis():
+        return {}
+
+    return app
+
+
+def test_enforce_sets_headers_and_retry_after(clock):
+    client = TestClient(_limited_app(RateLimiter(1.0, 4.0, clock=clock)))
+    r = client.get("/mahal/1")   # biaya per template route, bukan path mentah
+    assert r.status_code == 200
+    assert (r.headers["X-RateLimit-Limit"], r.headers["X-RateLimit-Remaining"]) == ("4", "1")
+    assert client.get("/gratis").headers["X-RateLimit-Remaining"] == "4"
+    r = client.get("/mahal/2")
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "2"              # butuh 2 token lagi pada 1 token/detik
+    assert r.headers["X-RateLimit-Remaining"] == "0"
+    clock.advance(2)
+    assert client.get("/mahal/3").status_code == 200
+
+
+def test_predict_app_uses_shared_limiter(make_predict, clock):
+    mod = make_predict()
+    mod.RATE_LIMITER = RateLimiter(1.0, 5.0, clock=clock)
+    headers = {"X-API-Key": PREDICT_KEY}
+    with TestClient(mod.app) as client:
+        wait_ready(client, headers=headers)   # /readyz gratis
+        assert client.get("/metadata", headers=headers).status_code == 200
+        r = client.post("/itinerary", json={"lat": -7.8, "lon": 110.37}, headers=headers)   # bobot 5
+        assert r.status_code == 429
+        assert r.headers["Retry-After"] == "1"
+        assert 'berapaya_rate_limited_total{route="/itinerary"} 1' in client.get("/metrics", headers=headers).text
+
+
+def test_backend_app_uses_shared_limiter(wisata_layer):
+    mod = load_app(BACKEND_MAIN, {"GEOJSON_PATH": wisata_layer, "API_KEY": "kunci", "API_KEYS": None,
+                                  "RATE_LIMIT_RPS": "0.001", "RATE_LIMIT_BURST": "4", "RATE_LIMIT_KEYS": "vip=1/10",
+                                  "RATE_LIMIT_REDIS_URL": None, "WEB_CONCURRENCY": "2", "PRELOAD_DATA": None})
+    assert (mod.RATE_LIMITER.burst, mod.RATE_LIMITER.quota("vip")) == (2.0, (0.5, 5.0))
+    client = TestClient(mod.app)
+    headers = {"X-API-Key": "kunci"}
+    params = {"lat": -7.8, "lon": 110.37, "k": 3}
+    assert client.get("/recommend", params=params, headers=headers).headers["X-RateLimit-Remaining"] == "0"
+    assert client.get("/recommend", params=params, headers=headers).status_code == 429
+    assert client.get("/health", headers=headers).status_code == 200
+    assert client.get("/health", headers={"X-API-Key": "salah"}).status_code == 403
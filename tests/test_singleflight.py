@@ -0,0 +1,49 @@
+"""wisata_common.singleflight."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wisata_common.metrics import MetricsRegistry
+from wisata_common.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    metrics = MetricsRegistry()
+    flight = SingleFlight("nearest", metrics, "x_singleflight_total")
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {"ok": True}
+
+    pool = ThreadPoolExecutor(4)
+    futures = [pool.submit(flight.do, "k", slow) for _ in range(4)]
+    # tunggu sampai leader + 3 follower tercatat, baru lepaskan leader
+    for _ in range(500):
+        if metrics.get("x_singleflight_total", {"endpoint": "nearest", "role": "follower"}) == 3:
+            break
+        time.sleep(0.01)
+    release.set()
+    results = [f.result(5) for f in futures]
+    pool.shutdown()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert metrics.get("x_singleflight_total", {"endpoint": "nearest", "role": "leader"}) == 1
+
+
+def test_error_is_shared_and_not_cached():
+    flight = SingleFlight("predict")
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("gagal")))
+    # bukan cache: panggilan berikutnya menjalankan fn lagi
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight("predict")
+    assert [flight.do(k, lambda k=k: k * 2) for k in range(3)] == [0, 2, 4]
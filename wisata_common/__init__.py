@@ -0,0 +1,7 @@
+"""
+Kode bersama untuk app FastAPI di repo ini (api/, laravel/predict/, backend/api/).
+
+Modul di sini tidak di-import lewat paket ini; tiap app meng-import submodul yang dibutuhkan
+(mis. wisata_common.metrics). Submodul yang butuh numpy/shapely/pyproj hanya di-import dari
+thread warm-up app, jadi app tetap hidup seketika tanpa menunggu library berat.
+"""
@@ -0,0 +1,158 @@
+"""
+Sel geohash (numpy murni) & pencarian nearest berbasis ring sel.
+
+Kode geohash disimpan sebagai integer (5 bit per karakter, bit lon lebih dulu). Prefix kode = sel induk,
+jadi satu array kode presisi penuh yang tersortir melayani sel presisi berapa pun: sel = satu rentang kode.
+Modul ini meng-import numpy & pyproj; app memuatnya bersama library berat di thread warm-up.
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pyproj import Geod
+
+ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+INDEX_PRECISION = 9   # presisi kode yang disimpan per titik (45 bit, sel ~5 m)
+
+GEOD = Geod(ellps="WGS84")
+
+
+def geodesic_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Jarak geodesic WGS84 (km) dari satu titik ke banyak titik sekaligus (hasil = geopy.geodesic)."""
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    if lats.size == 0:
+        return np.empty(lats.shape)
+    _, _, m = GEOD.inv(np.full(lons.shape, lon), np.full(lats.shape, lat), lons, lats)
+    return np.asarray(m) / 1000.0
+
+
+def bits(precision: int) -> Tuple[int, int]:
+    """Jumlah bit (lon, lat) pada presisi tsb; bit lon selalu lebih dulu saat diselang-seling."""
+    total = 5 * precision
+    return (total + 1) // 2, total // 2
+
+
+def cell_xy(lat: Any, lon: Any, precision: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Koordinat integer sel (ix = kolom lon, iy = baris lat) pada grid presisi tsb."""
+    nlon, nlat = bits(precision)
+    ix = np.floor((np.asarray(lon, dtype=float) + 180.0) / 360.0 * (1 << nlon)).astype(np.int64)
+    iy = np.floor((np.asarray(lat, dtype=float) + 90.0) / 180.0 * (1 << nlat)).astype(np.int64)
+    return np.clip(ix, 0, (1 << nlon) - 1), np.clip(iy, 0, (1 << nlat) - 1)
+
+
+def interleave(ix: Any, iy: Any, precision: int) -> np.ndarray:
+    """(ix, iy) -> kode geohash integer (5 bit per karakter)."""
+    nlon, nlat = bits(precision)
+    ix, iy = np.asarray(ix, dtype=np.int64), np.asarray(iy, dtype=np.int64)
+    code = np.zeros(np.broadcast(ix, iy).shape, dtype=np.int64)
+    for i in range(5 * precision):
+        src, nbits = (ix, nlon) if i % 2 == 0 else (iy, nlat)
+        code = (code << 1) | ((src >> (nbits - 1 - i // 2)) & 1)
+    return code
+
+
+def deinterleave(code: int, precision: int) -> Tuple[int, int]:
+    ix = iy = 0
+    for i in range(5 * precision):
+        bit = (code >> (5 * precision - 1 - i)) & 1
+        if i % 2 == 0:
+            ix = (ix << 1) | bit
+        else:
+            iy = (iy << 1) | bit
+    return ix, iy
+
+
+def encode(code: int, precision: int) -> str:
+    return "".join(ALPHABET[(code >> (5 * (precision - 1 - i))) & 31] for i in range(precision))
+
+
+def decode(cell: str) -> int:
+    code = 0
+    for ch in cell:
+        v = ALPHABET.find(ch)
+        if v < 0:
+            raise ValueError(f"Karakter geohash tidak valid: {ch!r}")
+        code = (code << 5) | v
+    return code
+
+
+def bounds(ix: int, iy: int, precision: int) -> Tuple[float, float, float, float]:
+    """(min_lon, min_lat, max_lon, max_lat) sel."""
+    nlon, nlat = bits(precision)
+    w, h = 360.0 / (1 << nlon), 180.0 / (1 << nlat)
+    return -180.0 + ix * w, -90.0 + iy * h, -180.0 + (ix + 1) * w, -90.0 + (iy + 1) * h
+
+
+def build_cell_index(lats: np.ndarray, lons: np.ndarray, precision: int) -> Dict[str, Any]:
+    """Index sel untuk titik-titik (lats, lons); titik tanpa koordinat dilewati.
+
+    "codes" = kode presisi INDEX_PRECISION tersortir, "rows" = posisi titik (di array input) per kode,
+    "span" = rentang (ix, iy) sel presisi `precision` yang berisi titik; `precision` = ukuran sel ring.
+    """
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+    codes = interleave(*cell_xy(lats[valid], lons[valid], INDEX_PRECISION), INDEX_PRECISION)
+    order = np.argsort(codes, kind="stable")
+    ix, iy = cell_xy(lats[valid], lons[valid], precision)
+    span = (int(ix.min()), int(ix.max()), int(iy.min()), int(iy.max())) if len(valid) else (0, -1, 0, -1)
+    return {"codes": codes[order], "rows": valid[order], "span": span, "precision": precision}
+
+
+def cell_rows(cells: Dict[str, Any], codes: np.ndarray, precision: int) -> np.ndarray:
+    """Posisi titik di dalam sel-sel `codes` presisi `precision` (dua searchsorted per sel)."""
+    shift = 5 * (INDEX_PRECISION - precision)
+    lo = np.searchsorted(cells["codes"], codes << shift, side="left")
+    hi = np.searchsorted(cells["codes"], (codes + 1) << shift, side="left")
+    parts = [cells["rows"][a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def ring_cells(ix0: int, iy0: int, r: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sel pada keliling persegi berjarak (Chebyshev) tepat r dari (ix0, iy0)."""
+    if r == 0:
+        return np.array([ix0], dtype=np.int64), np.array([iy0], dtype=np.int64)
+    side = np.arange(-r, r + 1, dtype=np.int64)
+    inner = side[1:-1]
+    dx = np.concatenate([side, side, np.full(inner.size, -r), np.full(inner.size, r)])
+    dy = np.concatenate([np.full(side.size, -r), np.full(side.size, r), inner, inner])
+    return ix0 + dx, iy0 + dy
+
+
+def ring_nearest(cells: Dict[str, Any], lats: np.ndarray, lons: np.ndarray, lat: float, lon: float, k: float,
+                 radius_km: Optional[float] = None, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Kandidat nearest via ring sel geohash yang diperlebar di sekitar (lat, lon).
+
+    Berhenti begitu k titik terdekat (dalam radius) pasti sudah tercakup: jarak minimum ke titik mana pun
+    di luar ring saat ini (batas konservatif) tidak lebih kecil dari jarak kandidat ke-k, atau ring sudah
+    melewati radius / seluruh data. k=inf berarti semua titik dalam radius. `allowed` (bool per titik)
+    membatasi kandidat. Kembalikan (posisi titik, jarak km) semua titik yang dicek, tak berurutan.
+    """
+    p = cells["precision"]
+    x_min, x_max, y_min, y_max = cells["span"]
+    if x_max < x_min:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    ix0, iy0 = (int(v) for v in cell_xy(lat, lon, p))
+    r_start = max(0, x_min - ix0, ix0 - x_max, y_min - iy0, iy0 - y_max)   # ring sebelum ini pasti kosong
+    r_max = max(ix0 - x_min, x_max - ix0, iy0 - y_min, y_max - iy0)
+    cos_lat = math.cos(math.radians(lat))
+    rows_parts: List[np.ndarray] = []
+    dist_parts: List[np.ndarray] = []
+    for r in range(r_start, r_max + 1):
+        ixs, iys = ring_cells(ix0, iy0, r)
+        keep = (ixs >= x_min) & (ixs <= x_max) & (iys >= y_min) & (iys <= y_max)
+        rows = cell_rows(cells, interleave(ixs[keep], iys[keep], p), p)
+        if allowed is not None:
+            rows = rows[allowed[rows]]
+        rows_parts.append(rows)
+        dist_parts.append(geodesic_km(lat, lon, lats[rows], lons[rows]))
+        west, south, _, _ = bounds(ix0 - r, iy0 - r, p)
+        _, _, east, north = bounds(ix0 + r, iy0 + r, p)
+        dlat_km = min(lat - south, north - lat) * 110.574
+        dlon_km = 6371.0 * math.asin(min(1.0, cos_lat * math.sin(math.radians(min(lon - west, east - lon, 90.0)))))
+        bound = 0.99 * min(dlat_km, dlon_km)
+        if radius_km is not None and bound >= radius_km:
+            break
+        limit = bound if radius_km is None else min(bound, radius_km)
+        if sum(int(np.count_nonzero(d <= limit)) for d in dist_parts) >= k:
+            break
+    return np.concatenate(rows_parts), np.concatenate(dist_parts)
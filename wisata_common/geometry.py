@@ -0,0 +1,55 @@
+"""
+Titik perwakilan geometry secara vektor (shapely 2) — dipakai api/, backend/api & mainn.py.
+
+Modul ini meng-import numpy & shapely; app yang memuat library berat secara lazy memuatnya di thread warm-up.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+
+def _point_of(geom: Optional[BaseGeometry], centroid: bool) -> Optional[BaseGeometry]:
+    """Jalur per-baris untuk geometry yang membuat operasi vektor gagal (mis. self-intersection)."""
+    if geom is None or geom.is_empty:
+        return None
+    if geom.geom_type == "Point":
+        return geom
+    if not centroid:
+        try:
+            return geom.representative_point()
+        except Exception:
+            pass
+    try:
+        return geom.centroid
+    except Exception:
+        return None
+
+
+def points_xy(geoms: np.ndarray, method: str = "representative") -> Tuple[np.ndarray, np.ndarray]:
+    """Koordinat titik perwakilan untuk seluruh array geometry sekaligus (tanpa loop per baris).
+
+    Geometry null/kosong -> NaN. Point dipakai apa adanya; selain itu centroid (method "centroid",
+    tanpa membedakan huruf besar/kecil) atau point_on_surface.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    n = len(geoms)
+    x = np.full(n, np.nan)
+    y = np.full(n, np.nan)
+    valid = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+    if not valid.any():
+        return x, y
+    centroid = method.lower() == "centroid"
+    pts = geoms.copy()
+    others = valid & (shapely.get_type_id(geoms) != 0)  # 0 = Point
+    if others.any():
+        try:
+            pts[others] = shapely.centroid(geoms[others]) if centroid else shapely.point_on_surface(geoms[others])
+        except Exception:
+            # geometry invalid -> jatuh ke jalur per-baris yang punya fallback centroid
+            pts[others] = [_point_of(g, centroid) for g in geoms[others]]
+            valid &= ~shapely.is_missing(pts)
+    x[valid] = shapely.get_x(pts[valid])
+    y[valid] = shapely.get_y(pts[valid])
+    return x, y
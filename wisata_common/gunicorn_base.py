@@ -0,0 +1,43 @@
+"""
+Setelan gunicorn bersama untuk api/, backend/api & laravel/predict (gunicorn + UvicornWorker).
+
+Tiap gunicorn.conf.py cukup ``from wisata_common.gunicorn_base import *``; gunicorn membaca nama
+setelan (bind, workers, worker_class, ...) dari namespace file konfigurasi.
+
+preload_app + PRELOAD_DATA=1: data dimuat SEKALI di master sebelum fork, lalu gc.freeze(); worker
+berbagi halaman memori yang sama (copy-on-write) alih-alih memuat ulang data masing-masing.
+
+Jumlah worker default = jumlah CPU yang boleh dipakai proses (affinity). Pekerjaan per request
+dominan CPU (numpy/pandas/shapely), jadi lebih dari 1 worker per core hanya menambah context
+switch. Kalau container dibatasi kuota (docker --cpus), set WEB_CONCURRENCY secara eksplisit.
+Jumlah worker final ditulis balik ke WEB_CONCURRENCY (dibaca app saat preload, mis. untuk
+membagi kuota rate limit per worker).
+
+Worker class dari paket ``uvicorn-worker``; ``uvicorn.workers`` sudah deprecated di uvicorn.
+"""
+import os
+
+__all__ = ["bind", "workers", "worker_class", "preload_app", "timeout", "graceful_timeout", "keepalive", "accesslog"]
+
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS/Windows
+        return os.cpu_count() or 1
+
+
+# Dibaca app saat di-import oleh master (preload); BLAS 1 thread per worker agar tidak oversubscribe
+os.environ.setdefault("PRELOAD_DATA", "1")
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or _cpu_count()
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
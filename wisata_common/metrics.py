@@ -0,0 +1,101 @@
+"""Metrics format teks Prometheus: registry thread-safe & middleware latensi per template route."""
+import threading
+import time
+from typing import Dict, List, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """Counter, gauge & histogram sederhana (thread-safe) yang dirender ke format eksposisi Prometheus."""
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._hists: Dict[str, Dict[Tuple[Tuple[str, str], ...], List[float]]] = {}
+
+    def describe(self, name: str, kind: str, text: str) -> None:
+        self._help[name] = (kind, text)
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, labels: Dict[str, str], value: float) -> None:
+        with self._lock:
+            self._values.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def get(self, name: str, labels: Dict[str, str]) -> float:
+        return self._values.get(name, {}).get(tuple(sorted(labels.items())), 0.0)
+
+    def observe(self, name: str, labels: Dict[str, str], seconds: float) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # [count per bucket..., +Inf count, sum]
+            h = self._hists.setdefault(name, {}).setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, b in enumerate(self.buckets):
+                if seconds <= b:
+                    h[i] += 1
+            h[-2] += 1
+            h[-1] += seconds
+
+    @staticmethod
+    def _fmt_labels(key: Tuple[Tuple[str, str], ...]) -> str:
+        if not key:
+            return ""
+        esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"')
+        return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in key) + "}"
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(set(self._values) | set(self._hists)):
+                kind, text = self._help.get(name, ("untyped", ""))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, val in sorted(self._values.get(name, {}).items()):
+                    lines.append(f"{name}{self._fmt_labels(key)} {val:.6g}")
+                for key, h in sorted(self._hists.get(name, {}).items()):
+                    for b, cnt in zip(self.buckets, h):
+                        lines.append(f"{name}_bucket{self._fmt_labels(key + (('le', str(b)),))} {cnt:.0f}")
+                    lines.append(f"{name}_bucket{self._fmt_labels(key + (('le', '+Inf'),))} {h[-2]:.0f}")
+                    lines.append(f"{name}_count{self._fmt_labels(key)} {h[-2]:.0f}")
+                    lines.append(f"{name}_sum{self._fmt_labels(key)} {h[-1]:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Hitung request & latensi per template route (bukan path mentah, agar kardinalitas label tetap kecil).
+
+    Menulis `<prefix>_http_requests_total` dan `<prefix>_http_request_duration_seconds` ke `metrics`.
+    """
+    def __init__(self, app, metrics: MetricsRegistry, prefix: str):
+        self.app = app
+        self.metrics = metrics
+        self.requests_total = f"{prefix}_http_requests_total"
+        self.duration = f"{prefix}_http_request_duration_seconds"
+        metrics.describe(self.requests_total, "counter", "Jumlah request HTTP per route & status.")
+        metrics.describe(self.duration, "histogram", "Latensi request HTTP per route.")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status_code = 500
+
+        async def _send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = {"method": scope["method"], "route": route}
+            self.metrics.observe(self.duration, labels, time.perf_counter() - t0)
+            self.metrics.inc(self.requests_total, {**labels, "status": str(status_code)})
@@ -0,0 +1,169 @@
+"""Profiling opt-in berbasis sampling stack untuk app FastAPI (folded stacks, format flamegraph).
+
+Pemasangan di app:
+
+    app.add_middleware(ProfilingMiddleware, profiles=PROFILES, admin_token=..., sample_rate=..., interval_ms=...)
+    app.router.route_class = ProfiledRoute   # route yang didaftarkan sesudahnya dibungkus profiled()
+"""
+import asyncio
+import functools
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from fastapi.routing import APIRoute
+
+IDLE_FRAMES = {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select"), ("threading.py", "_wait_for_tstate_lock")}
+
+
+class StackSampler(threading.Thread):
+    """Sampler statistik: ambil stack thread endpoint tiap interval, simpan sebagai folded stacks (format flamegraph).
+
+    Hanya thread yang terdaftar lewat track() (thread threadpool yang menjalankan endpoint request ini) yang
+    tersampel, jadi request lain, warm-up, dan thread latar tidak ikut masuk profil; stack idle
+    (menunggu lock/queue/selector) dibuang.
+    """
+    def __init__(self, interval_s: float):
+        super().__init__(daemon=True)
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.threads: set = set()
+        self._stop_evt = threading.Event()
+
+    @contextmanager
+    def track(self):
+        tid = threading.get_ident()
+        self.threads.add(tid)
+        try:
+            yield
+        finally:
+            self.threads.discard(tid)
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval_s):
+            frames = sys._current_frames()
+            for tid in tuple(self.threads):
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                parts = []
+                while frame is not None:
+                    c = frame.f_code
+                    parts.append(f"{os.path.basename(c.co_filename)}:{c.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(parts))] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        self.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+ACTIVE_SAMPLER: ContextVar[Optional[StackSampler]] = ContextVar("active_sampler", default=None)
+_profile_seq = itertools.count(1)
+
+
+def profiled(endpoint: Callable) -> Callable:
+    """Bungkus endpoint: thread yang menjalankannya didaftarkan ke sampler request ini.
+
+    Sampler diteruskan lewat contextvar (ikut tersalin ke thread threadpool), signature asli tetap
+    terlihat FastAPI lewat functools.wraps.
+    """
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def _async_wrapper(*args, **kwargs):
+            sampler = ACTIVE_SAMPLER.get()
+            if sampler is None:
+                return await endpoint(*args, **kwargs)
+            with sampler.track():
+                return await endpoint(*args, **kwargs)
+        return _async_wrapper
+
+    @functools.wraps(endpoint)
+    def _wrapper(*args, **kwargs):
+        sampler = ACTIVE_SAMPLER.get()
+        if sampler is None:
+            return endpoint(*args, **kwargs)
+        with sampler.track():
+            return endpoint(*args, **kwargs)
+    return _wrapper
+
+
+class ProfiledRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+
+class ProfilingMiddleware:
+    """Profil sebagian request (`sample_rate`) atau yang membawa header X-Profile: <admin_token>.
+
+    Hasil (metadata + folded stacks) ditambahkan ke `profiles` (deque ring milik app); id profil
+    dikirim balik lewat header X-Profile-Id. Hanya dipasang jika profiling diaktifkan lewat env,
+    jadi tanpa overhead saat nonaktif.
+    """
+    def __init__(self, app, profiles: deque, admin_token: Optional[str], sample_rate: float, interval_ms: float):
+        self.app = app
+        self.profiles = profiles
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.interval_s = interval_ms / 1000.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        forced = False
+        if self.admin_token:
+            for k, v in scope.get("headers", []):
+                if k == b"x-profile" and v.decode("latin-1") == self.admin_token:
+                    forced = True
+                    break
+        if not forced and random.random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        profile_id = f"{int(time.time())}-{next(_profile_seq)}"
+        status_code = 500
+
+        async def _send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler = StackSampler(self.interval_s)
+        started = datetime.now(tz=timezone.utc)
+        t0 = time.perf_counter()
+        sampler.start()
+        token = ACTIVE_SAMPLER.set(sampler)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            ACTIVE_SAMPLER.reset(token)
+            # join() bisa menunggu satu interval sampling: jangan di event loop
+            await asyncio.get_running_loop().run_in_executor(None, sampler.stop)
+            self.profiles.append({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "started_at": started.isoformat(),
+                "duration_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+                "samples": sampler.samples,
+                "folded": sampler.folded(),
+            })
@@ -0,0 +1,145 @@
+"""
+Rate limiting token bucket per API key, dengan kuota per key & bobot biaya per route.
+
+State bucket ada di memori proses (InMemoryBucketStore) atau di Redis (RedisBucketStore, dibagi antar
+worker & instance). Waktu diambil dari `clock` yang bisa diganti, sehingga refill bisa diuji deterministik.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+
+class InMemoryBucketStore:
+    """Bucket di memori proses (per worker). State: key -> (token, waktu update terakhir)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, key: str, cost: float, rate: float, burst: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            return allowed, tokens
+
+
+class RedisBucketStore:
+    """Bucket bersama di Redis (antar worker & instance); refill + ambil token atomik via skrip Lua."""
+    SCRIPT = """
+local rate, burst, now, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local b = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then tokens = tokens - cost; allowed = 1 end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "rl:", client=None):
+        if client is None:
+            import redis  # opsional; hanya dibutuhkan bila RATE_LIMIT_REDIS_URL diisi
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._script = self._client.register_script(self.SCRIPT)
+        self._prefix = prefix
+
+    def take(self, key: str, cost: float, rate: float, burst: float, now: float) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[self._prefix + key], args=[rate, burst, now, cost])
+        return bool(int(allowed)), float(tokens)
+
+
+class RateLimiter:
+    """Token bucket per API key dengan kuota per key & bobot biaya per request.
+
+    `store` menentukan di mana state disimpan (memori proses atau Redis); `clock` default monotonic,
+    time.time untuk Redis (dibagi antar mesin). Key mentah tidak pernah disimpan: bucket diberi nama dari hash key.
+    """
+    def __init__(self, rate: float, burst: float, store=None, clock: Callable[[], float] = time.monotonic,
+                 overrides: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.rate, self.burst = rate, burst
+        self.store = store or InMemoryBucketStore()
+        self.clock = clock
+        self.overrides = dict(overrides or {})
+
+    def quota(self, api_key: str) -> Tuple[float, float]:
+        return self.overrides.get(api_key, (self.rate, self.burst))
+
+    def check(self, api_key: str, cost: float) -> Tuple[bool, float, float]:
+        """(diizinkan, sisa token, detik sampai cukup token)."""
+        rate, burst = self.quota(api_key)
+        if rate <= 0 or cost <= 0:
+            return True, burst, 0.0
+        cost = min(cost, burst)   # biaya > kapasitas tidak akan pernah lolos
+        bucket = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        allowed, tokens = self.store.take(bucket, cost, rate, burst, self.clock())
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return allowed, tokens, retry_after
+
+
+def parse_key_quotas(spec: str) -> Dict[str, Tuple[float, float]]:
+    """'keyA=5/10,keyB=200' -> {keyA: (5, 10), keyB: (200, 400)} (burst default 2x rps)."""
+    out: Dict[str, Tuple[float, float]] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, quota = part.partition("=")
+        rps, _, burst = quota.partition("/")
+        out[key.strip()] = (float(rps), float(burst) if burst else 2.0 * float(rps))
+    return out
+
+
+def make_rate_limiter(rps: float, burst: float, key_quotas: str = "", redis_url: Optional[str] = None,
+                      workers: int = 1, redis_prefix: str = "rl:") -> RateLimiter:
+    """Limiter dari konfigurasi env app (RATE_LIMIT_RPS/BURST/KEYS/REDIS_URL, WEB_CONCURRENCY).
+
+    Tanpa Redis tiap worker punya bucket sendiri, jadi kuota (termasuk override per key) dibagi rata
+    dengan jumlah worker agar total tetap sesuai konfigurasi.
+    """
+    overrides = parse_key_quotas(key_quotas)
+    if redis_url:
+        # waktu dinding: bucket dibagi antar mesin, monotonic tiap proses tidak sebanding
+        return RateLimiter(rps, burst, RedisBucketStore(redis_url, redis_prefix), clock=time.time, overrides=overrides)
+    n = max(1, workers)
+    if n > 1:
+        logging.getLogger("uvicorn.error").warning(
+            "Rate limit tanpa RATE_LIMIT_REDIS_URL dengan %d worker: bucket per proses, kuota tiap worker dibagi %d "
+            "(distribusi request antar worker tidak rata, set RATE_LIMIT_REDIS_URL untuk kuota yang presisi)", n, n)
+        overrides = {k: (r / n, b / n) for k, (r, b) in overrides.items()}
+    return RateLimiter(rps / n, burst / n, overrides=overrides)
+
+
+def enforce_rate_limit(limiter: RateLimiter, request: Request, response: Response, api_key: str,
+                       costs: Dict[str, float], default_cost: float = 1.0,
+                       on_limited: Optional[Callable[[str], None]] = None) -> None:
+    """Ambil token seharga bobot route request ini; 429 + Retry-After bila bucket kosong.
+
+    Biaya dicari per template route (bukan path mentah). Header X-RateLimit-* di-set pada `response`
+    (response yang diinjeksi FastAPI ke dependency); `on_limited(route)` dipanggil untuk tiap penolakan.
+    """
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    cost = costs.get(route, default_cost)
+    allowed, remaining, retry_after = limiter.check(api_key, cost)
+    limit = limiter.quota(api_key)[1]
+    if not allowed:
+        if on_limited is not None:
+            on_limited(route)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Terlalu banyak request untuk API key ini; coba lagi dalam {retry_after:.1f} detik.",
+            headers={
+                "Retry-After": str(max(1, math.ceil(retry_after))),
+                "X-RateLimit-Limit": str(int(limit)),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
+    response.headers["X-RateLimit-Limit"] = str(int(limit))
+    response.headers["X-RateLimit-Remaining"] = str(int(remaining))
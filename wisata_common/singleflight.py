@@ -0,0 +1,59 @@
+"""Request coalescing (single-flight) untuk endpoint sync yang berjalan di threadpool."""
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from wisata_common.metrics import MetricsRegistry
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Gabungkan pemanggilan `do(key, fn)` yang sedang berjalan dengan key sama.
+
+    Pemanggil pertama (leader) menjalankan `fn`; pemanggil lain dengan key sama yang datang
+    sebelum selesai hanya menunggu lalu memakai hasil (atau exception) yang sama. Endpoint sync
+    berjalan di threadpool, jadi penantian cukup memakai threading.Event. Hasil tidak disimpan
+    setelah selesai — ini bukan cache.
+
+    Bila `metrics` diisi, tiap panggilan dihitung di counter `metric` dengan label endpoint=`name`
+    dan role=leader/follower.
+    """
+    def __init__(self, name: str, metrics: Optional[MetricsRegistry] = None, metric: str = "singleflight_total"):
+        self.name = name
+        self.metrics = metrics
+        self.metric = metric
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, _Flight] = {}
+        if metrics is not None:
+            metrics.describe(metric, "counter", "Panggilan single-flight per endpoint (leader menghitung, follower menumpang).")
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if self.metrics is not None:
+            self.metrics.inc(self.metric, {"endpoint": self.name, "role": "leader" if leader else "follower"})
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result